@@ -0,0 +1,38 @@
+# Load packages and modules
+import os, sys, arcpy, multiprocessing
+from wdpa.runner import optional_argument
+from wdpa.batch import run_batch
+from wdpa.export import output_batch_to_excel
+
+# The worker processes import this script again: only run it in the main process
+if __name__ == '__main__':
+    # the worker processes are started with python.exe, not with ArcGIS Pro
+    if sys.platform == 'win32':
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
+
+    # Load input
+    # CSV file listing the archived releases: release,path,type (see wdpa/batch.py)
+    input_manifest = sys.argv[1]
+    output_path = sys.argv[2]
+    # optional: names of the checks to run, separated by ';' (default: all checks)
+    names = optional_argument(3)
+    # optional: rule pack file (.json, .yaml or .toml) with the thresholds and allowed values of the checks
+    rule_pack = (optional_argument(4) or [None])[0]
+    # optional: number of worker processes (default: the number of processors)
+    workers = int((optional_argument(5) or [0])[0]) or None
+    # optional: memory limit of each worker process in MB (not on Windows)
+    memory_limit_mb = int((optional_argument(6) or [0])[0]) or None
+    # optional: directory of the snapshots of the feature classes, see wdpa/snapshot.py
+    cache_dir = (optional_argument(7) or [None])[0]
+
+    # Let us welcome our guest of honour
+    arcpy.AddMessage('\nAll hail the WDPA\n')
+
+    # Check the releases in parallel, and count the rows flagged by each check
+    arcpy.AddMessage('--- Running QA checks on the archived releases ---')
+    series_df = run_batch(input_manifest, names, rule_pack, workers, memory_limit_mb, cache_dir, arcpy.AddMessage)
+
+    # Write output to file
+    arcpy.AddMessage('Writing output to Excel')
+    output_batch_to_excel(series_df, output_path)
+    arcpy.AddMessage('\nThe QA checks on the archived releases have finished.')
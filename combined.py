@@ -0,0 +1,48 @@
+# Load packages and modules
+import sys, arcpy
+from wdpa.qa import arcgis_table_to_df, poly_checks, pt_checks, name_checks, integrity_checks, meta_checks, \
+                    INPUT_FIELDS_POLY, INPUT_FIELDS_PT, INPUT_FIELDS_INTEGRITY, INPUT_FIELDS_META
+from wdpa.runner import optional_argument, select_checks, required_fields, run_checks, run_integrity_checks
+from wdpa.export import output_errors_to_excel
+
+# Load input: the Polygons, Points and Source Table are each read once,
+# and shared by the polygon, point and integrity checks
+input_poly = sys.argv[1]
+input_pt = sys.argv[2]
+input_meta = sys.argv[3]
+output_path = sys.argv[4]
+# optional: names of the checks to run, separated by ';' (default: all checks but the
+# similar name checks of name_checks, which are only run if named)
+names = optional_argument(5)
+# raises an error for unknown checks
+selected = [check['name'] for check in select_checks(poly_checks + integrity_checks + meta_checks, names, name_checks)]
+checks_poly = [check for check in poly_checks + name_checks if check['name'] in selected]
+checks_pt = [check for check in pt_checks + name_checks if check['name'] in selected]
+checks_integrity = [check for check in integrity_checks if check['name'] in selected]
+checks_meta = [check for check in meta_checks if check['name'] in selected]
+
+# Let us welcome our guest of honour
+arcpy.AddMessage('\nAll hail the WDPA\n')
+
+# Convert the tables to pandas DataFrames, with the fields of all checks run on them
+arcpy.AddMessage('Converting to pandas DataFrame')
+fields_poly = set(required_fields(checks_poly, INPUT_FIELDS_POLY) + INPUT_FIELDS_INTEGRITY)
+fields_pt = set(required_fields(checks_pt, INPUT_FIELDS_PT) + INPUT_FIELDS_INTEGRITY)
+poly_df = arcgis_table_to_df(input_poly, [field for field in INPUT_FIELDS_POLY if field in fields_poly])
+pt_df = arcgis_table_to_df(input_pt, [field for field in INPUT_FIELDS_PT if field in fields_pt])
+meta_df = arcgis_table_to_df(input_meta, INPUT_FIELDS_META)
+
+# Run the integrity checks and the checks on the Source Table,
+# and write the output of each run to Excel
+arcpy.AddMessage('--- Running integrity checks across Polygons, Points and Source Table ---')
+result = run_integrity_checks(poly_df, pt_df, meta_df, checks_integrity, arcpy.AddMessage)
+meta_result = run_checks(meta_df, checks_meta, arcpy.AddMessage)
+result.update((name, meta_result[name]) for name in meta_result)
+output_errors_to_excel(result, output_path, checks_integrity + checks_meta, 'meta')
+
+arcpy.AddMessage('--- Running QA checks on Polygons ---')
+output_errors_to_excel(run_checks(poly_df, checks_poly, arcpy.AddMessage), output_path, checks_poly, 'poly')
+
+arcpy.AddMessage('--- Running QA checks on Points ---')
+output_errors_to_excel(run_checks(pt_df, checks_pt, arcpy.AddMessage), output_path, checks_pt, 'point')
+arcpy.AddMessage('\nThe QA checks on POLYGONS, POINTS and the SOURCE TABLE have finished. \n\nWritten by Stijn den Haan and Yichuan Shi\nAugust 2019')
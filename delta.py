@@ -0,0 +1,32 @@
+# Load packages and modules
+import sys, arcpy
+from wdpa.qa import arcgis_table_to_df
+from wdpa.runner import optional_argument
+from wdpa.delta import load_global_index, run_delta_checks, delta_checks, GLOBAL_FIELDS
+from wdpa.export import output_errors_to_excel
+
+# Load input
+input_submission = sys.argv[1]
+input_global = sys.argv[2]
+# directory of the cached index of the global table, built on first use
+cache_dir = sys.argv[3]
+output_path = sys.argv[4]
+# optional: METADATAIDs whose records in the global table are replaced by the submission
+replaced_metadataid = [int(each) for each in optional_argument(5)]
+
+# Let us welcome our guest of honour
+arcpy.AddMessage('\nAll hail the WDPA\n')
+
+# Only the submission is read; the global table is read from its index
+arcpy.AddMessage('Converting to pandas DataFrame')
+submission_df = arcgis_table_to_df(input_submission, GLOBAL_FIELDS)
+global_index = load_global_index(input_global, cache_dir, arcpy.AddMessage)
+
+# Run the checks on the submission and the global table
+arcpy.AddMessage('--- Running delta QA checks against the global WDPA ---')
+result = run_delta_checks(submission_df, global_index, delta_checks, replaced_metadataid, arcpy.AddMessage)
+
+# Write output to file
+arcpy.AddMessage('Writing output to Excel')
+output_errors_to_excel(result, output_path, delta_checks, 'delta')
+arcpy.AddMessage('\nThe delta QA checks have finished.')
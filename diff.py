@@ -0,0 +1,24 @@
+# Load packages and modules
+import sys, arcpy
+from wdpa.history import load_run, run_info, diff_runs
+from wdpa.export import output_diff_to_excel
+
+# Load input: two runs stored by poly.py or point.py, e.g. of last month and of this month
+old_run_path = sys.argv[1]
+new_run_path = sys.argv[2]
+output_path = sys.argv[3]
+
+# Let us welcome our guest of honour
+arcpy.AddMessage('\nAll hail the WDPA\n')
+
+# Compare the WDPA_PIDs flagged by each check in both runs
+old_info, new_info = run_info(old_run_path), run_info(new_run_path)
+arcpy.AddMessage(f'--- Comparing the QA runs of {old_info["date"]} and {new_info["date"]} ---')
+old_run = load_run(old_run_path)
+new_run = load_run(new_run_path)
+summary_df, changes = diff_runs(old_run, new_run)
+
+# Write output to file
+arcpy.AddMessage('Writing output to Excel')
+output_diff_to_excel(summary_df, changes, output_path, new_info['datatype'])
+arcpy.AddMessage('\nThe comparison of the QA runs has finished.')
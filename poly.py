@@ -1,32 +1,48 @@
 # Load packages and modules
 import sys, arcpy
-from wdpa.qa import arcgis_table_to_df, find_wdpa_rows, poly_checks, INPUT_FIELDS_POLY
-from wdpa.export import output_errors_to_excel
+from wdpa.qa import read_table_chunks, where_clause, poly_checks, name_checks, INPUT_FIELDS_POLY
+from wdpa.runner import optional_argument, select_checks, required_fields
+from wdpa.pipeline import run_pipeline
+from wdpa.export import output_error_matrix, check_matrix_formats
+from wdpa.history import save_run
 
 # Load input
 input_poly = sys.argv[1]
 output_path = sys.argv[2]
+# optional: names of the checks to run, separated by ';' (default: all checks but the
+# similar name checks of name_checks, which are only run if named)
+checks = select_checks(poly_checks, optional_argument(3), name_checks)
+# optional: only check the rows of these ISO3s, METADATAIDs and WDPAIDs (or 'min-max' WDPAID ranges)
+query = where_clause(iso3=optional_argument(4),
+                     metadataid=optional_argument(5),
+                     wdpaid=optional_argument(6))
+# optional: also write the error matrix, one row per WDPA_PID and one column per check, as 'xlsx' and/or 'parquet'
+matrix_formats = optional_argument(7)
+check_matrix_formats(matrix_formats)
+# optional: rule pack file (.json, .yaml or .toml) with the thresholds and allowed values of the checks
+rule_pack = (optional_argument(8) or [None])[0]
+# optional: directory where the flagged WDPA_PIDs of each check are stored, to compare runs with diff.py
+store_dir = (optional_argument(9) or [None])[0]
+# optional: directory for temporary files, to run the checks on rows of the same WDPAID or WDPA_PID out of core
+spill_dir = (optional_argument(10) or [None])[0]
 
 # Let us welcome our guest of honour
 arcpy.AddMessage('\nAll hail the WDPA\n')
 
-# Convert Polygon table to pandas DataFrame
+# Read the Polygon table in chunks of rows
 arcpy.AddMessage('Converting to pandas DataFrame')
-poly_df = arcgis_table_to_df(input_poly, INPUT_FIELDS_POLY)
-result = dict()
+if query:
+    arcpy.AddMessage('Only checking rows where: ' + query)
+# only the fields read by the selected checks are imported
+chunks = read_table_chunks(input_poly, required_fields(checks, INPUT_FIELDS_POLY), query)
 
-# Run the checks
+# Run the checks on the chunks while they are read, and write the output
+# to Excel while the checks run
 arcpy.AddMessage('--- Running QA checks on Polygons ---')
-for poly_check in poly_checks: # poly_checks is a dictionary with checks' descriptive names and function names
-    arcpy.AddMessage('Running:' + poly_check['name'])
-    # checks are not currently optimised, thus return all pids regardless
-    wdpa_pid = poly_check['func'](poly_df, True)
-
-    # For each check, obtain the rows that contain errors
-    if wdpa_pid.size > 0:
-        result[poly_check['name']] = find_wdpa_rows(poly_df, wdpa_pid)
-
-# Write output to file
-arcpy.AddMessage('Writing output to Excel')
-output_errors_to_excel(result, output_path, poly_checks, 'poly')
+result = run_pipeline(chunks, checks, output_path, 'poly', arcpy.AddMessage, rules=rule_pack, spill_dir=spill_dir)
+if matrix_formats:
+    arcpy.AddMessage('Writing the error matrix')
+    output_error_matrix(result, output_path, checks, 'poly', matrix_formats)
+if store_dir:
+    arcpy.AddMessage('Storing the run in ' + save_run(result, store_dir, checks, 'poly'))
 arcpy.AddMessage('\nThe QA checks on POLYGONS have finished. \n\nWritten by Stijn den Haan and Yichuan Shi\nAugust 2019')
\ No newline at end of file
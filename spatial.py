@@ -0,0 +1,43 @@
+# Load packages and modules
+import sys, arcpy
+from wdpa.runner import optional_argument, select_checks
+from wdpa.spatial import read_geometries, run_spatial_checks, spatial_checks, boundary_checks, load_boundary_index, \
+                         SPATIAL_FIELDS_POLY, SPATIAL_FIELDS_PT
+from wdpa.export import output_errors_to_excel
+
+# Load input: local file sources of the geometries, e.g. a GeoPackage exported from the geodatabase
+input_poly = sys.argv[1]
+input_pt = sys.argv[2]
+output_path = sys.argv[3]
+# optional: layers of the inputs, if they hold several (e.g. both tables in one GeoPackage)
+poly_layer = (optional_argument(4) or [None])[0]
+pt_layer = (optional_argument(5) or [None])[0]
+# optional: names of the checks to run, separated by ';' (default: all checks)
+check_names = optional_argument(6)
+# optional: boundary dataset of the countries and EEZs with their ISO3, and a directory to cache its index
+input_boundaries = (optional_argument(7) or [None])[0]
+cache_dir = (optional_argument(8) or [None])[0]
+
+# The ISO3 location checks are only run with a boundary dataset
+checks = spatial_checks
+if input_boundaries:
+    arcpy.AddMessage('Loading the boundary dataset')
+    checks = checks + boundary_checks(load_boundary_index(input_boundaries, cache_dir, log=arcpy.AddMessage))
+checks = select_checks(checks, check_names)
+
+# Let us welcome our guest of honour
+arcpy.AddMessage('\nAll hail the WDPA\n')
+
+# Read the geometries with the fields of the spatial checks
+arcpy.AddMessage('Reading geometries')
+poly_gdf = read_geometries(input_poly, SPATIAL_FIELDS_POLY, poly_layer)
+pt_gdf = read_geometries(input_pt, SPATIAL_FIELDS_PT, pt_layer)
+
+# Run the spatial checks, on an index of the polygons built once
+arcpy.AddMessage('--- Running spatial QA checks ---')
+result = run_spatial_checks(poly_gdf, pt_gdf, checks, arcpy.AddMessage)
+
+# Write output to file
+arcpy.AddMessage('Writing output to Excel')
+output_errors_to_excel(result, output_path, checks, 'spatial')
+arcpy.AddMessage('\nThe spatial QA checks have finished.')
@@ -0,0 +1,31 @@
+# Load packages and modules
+import sys, arcpy
+from wdpa.qa import arcgis_table_to_df, where_clause
+from wdpa.runner import optional_argument
+from wdpa.sweep import AreaSweep, SIGMAS, FLOORS
+from wdpa.export import output_sweep_to_excel
+
+# Load input
+input_poly = sys.argv[1]
+output_path = sys.argv[2]
+# optional: stdevs and absolute differences (km²) to sweep, separated by ';'
+sigmas = [float(each) for each in optional_argument(3)] or SIGMAS
+floors = [float(each) for each in optional_argument(4)] or FLOORS
+# optional: only sweep the rows of these ISO3s
+query = where_clause(iso3=optional_argument(5))
+
+# Let us welcome our guest of honour
+arcpy.AddMessage('\nAll hail the WDPA\n')
+
+# Only the area fields are read
+arcpy.AddMessage('Converting to pandas DataFrame')
+poly_df = arcgis_table_to_df(input_poly, ['WDPAID', 'WDPA_PID', 'GIS_AREA', 'REP_AREA', 'GIS_M_AREA', 'REP_M_AREA'], query)
+
+# Sort the relative sizes once, and count the flagged rows for each threshold
+arcpy.AddMessage('--- Sweeping the thresholds of the statistical area checks ---')
+sweep_df = AreaSweep(poly_df).table(sigmas, floors)
+
+# Write output to file
+arcpy.AddMessage('Writing output to Excel')
+output_sweep_to_excel(sweep_df, output_path)
+arcpy.AddMessage('\nThe threshold sweep has finished.')
@@ -0,0 +1,61 @@
+import unittest as unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.runner import run_checks
+from wdpa.batch import read_manifest, run_batch
+
+names = ['ivd_iucn_cat', 'tiny_gis_area', 'dif_name_same_id']
+
+
+def release(seed, n=500):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({'WDPAID': rng.randint(0, 400, n),
+                         'WDPA_PID': [str(each) for each in range(n)],
+                         'NAME': rng.choice(['De Veluwe', 'Veluwe'], n, p=[0.95, 0.05]),
+                         'IUCN_CAT': rng.choice(['Ia', 'II', 'Not a category'], n),
+                         'GIS_AREA': rng.uniform(0, 10, n)})
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        self.releases = [release(0), release(1).drop(columns='IUCN_CAT')]
+        lines = ['release,path']
+        for number, release_df in enumerate(self.releases):
+            path = os.path.join(self.directory, f'{number}.pkl')
+            release_df.to_pickle(path)
+            lines.append(f'2019-0{number + 1},{path}')
+        lines.append('2019-03,' + os.path.join(self.directory, 'missing.pkl'))
+
+        self.manifest = os.path.join(self.directory, 'manifest.csv')
+        with open(self.manifest, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def test_manifest(self):
+        entries = read_manifest(self.manifest)
+        self.assertListEqual([entry['type'] for entry in entries], ['poly'] * 3)
+        with self.assertRaises(ValueError):
+            read_manifest(os.path.join(os.path.dirname(__file__), 'test_batch.py'))
+
+    def test_batch(self):
+        series_df = run_batch(self.manifest, names, workers=2, log=lambda message: None)
+        self.assertListEqual(list(series_df['release']), ['2019-01', '2019-02', '2019-03'])
+
+        checks = [check for check in qa.poly_checks if check['name'] in names]
+        expected = run_checks(self.releases[0], checks, log=lambda message: None)
+        for name in names:
+            self.assertEqual(series_df[name].iloc[0], expected.count(name) if name in expected else 0)
+
+        # the second release has no IUCN_CAT, the third does not exist
+        self.assertTrue(pd.isna(series_df['ivd_iucn_cat'].iloc[1]))
+        self.assertEqual(series_df['error'].iloc[1], '')
+        self.assertTrue(series_df['error'].iloc[2].startswith('ERROR'))
+
+if __name__ == '__main__':
+    unittest.main()
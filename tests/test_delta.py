@@ -0,0 +1,74 @@
+import unittest as unittest
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.runner import run_checks
+from wdpa.delta import GlobalIndex, GLOBAL_FIELDS, delta_checks, run_delta_checks, \
+                       save_global_index, read_global_index
+
+rng = np.random.RandomState(0)
+
+
+def wdpa_table(n, first_pid):
+    return pd.DataFrame(dict({field: rng.choice(['A', 'B'], n, p=[0.9, 0.1]) for field in GLOBAL_FIELDS},
+                             WDPAID=rng.randint(0, 300, n).astype(float),
+                             WDPA_PID=[str(each) for each in range(first_pid, first_pid + n)],
+                             METADATAID=rng.randint(0, 50, n)))
+
+global_df = wdpa_table(1000, 0)
+submission_df = wdpa_table(100, 990) # WDPA_PIDs 990-999 are in use
+submission_df.loc[5, 'WDPA_PID'] = '1050' # duplicate in the submission
+
+# the checks of the global WDPA that the delta checks extend
+checks = [check for check in qa.poly_checks if check['name'] in set(check['name'] for check in delta_checks)]
+
+
+class TestDelta(unittest.TestCase):
+    def test_same_as_checks(self):
+        # the delta checks flag the submission rows that the checks flag on the union of both tables
+        self.assertGreater(len(checks), 10)
+        for check in checks:
+            submission = submission_df
+            if check['name'] != 'duplicate_wdpa_pid':
+                # the rows of a WDPA_PID in use would be flagged with the global rows of this WDPA_PID
+                submission = submission_df.assign(WDPA_PID='s' + submission_df['WDPA_PID'])
+            result = run_delta_checks(submission, GlobalIndex.build(global_df),
+                                      [each for each in delta_checks if each['name'] == check['name']], log=lambda message: None)
+            union_df = pd.concat([submission, global_df], ignore_index=True)
+            expected = run_checks(union_df, [check], log=lambda message: None)
+
+            flagged = union_df['WDPA_PID'].values[expected.positions(check['name'])] if check['name'] in expected else []
+            expected_pid = sorted(set(flagged) & set(submission['WDPA_PID']))
+            pid = sorted(set(result[check['name']]['WDPA_PID'])) if check['name'] in result else []
+            self.assertListEqual(pid, expected_pid, check['name'])
+
+    def test_metadataid_in_use(self):
+        submission = pd.DataFrame({'WDPAID': [1., 2.], 'WDPA_PID': ['a', 'b'], 'METADATAID': [7, 8]})
+        known = pd.DataFrame({'WDPAID': [1., 3.], 'WDPA_PID': ['c', 'd'], 'METADATAID': [7, 8]})
+        global_index = GlobalIndex.build(pd.concat([known, wdpa_table(2, 100)[GLOBAL_FIELDS[3:]]], axis=1))
+        check = [check for check in delta_checks if check['name'] == 'check_metadataid_in_use']
+
+        result = run_delta_checks(submission, global_index, check, log=lambda message: None)
+        self.assertListEqual(list(result['check_metadataid_in_use']['WDPA_PID']), ['b'])
+        # unless the global records of METADATAID 8 are replaced by the submission
+        self.assertNotIn('check_metadataid_in_use', run_delta_checks(submission, global_index, check, [8], log=lambda message: None))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'global.delta.pkl')
+            save_global_index(GlobalIndex.build(global_df), path)
+            self.assertIsInstance(read_global_index(path), GlobalIndex)
+
+            # indexes cached with other fields, or by an older version, are built again
+            with open(path, 'wb') as f:
+                pickle.dump(((0, GLOBAL_FIELDS[:3]), GlobalIndex.build(global_df)), f)
+            self.assertIsNone(read_global_index(path))
+            with open(path, 'wb') as f:
+                pickle.dump(GlobalIndex.build(global_df), f)
+            self.assertIsNone(read_global_index(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest as unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.runner import run_checks
+from wdpa.external import ExternalSorter, GroupedChecks, GROUPED_CHECKS
+
+rng = np.random.RandomState(0)
+n = 3000
+wdpa_df = pd.DataFrame({'WDPAID': rng.randint(0, 2000, n).astype(float),
+                        'WDPA_PID': [str(each) for each in range(n)],
+                        'NAME': rng.choice(['De Veluwe', 'Veluwe', None], n, p=[0.95, 0.03, 0.02]),
+                        'STATUS_YR': pd.array(rng.choice([2000, 2001, None], n, p=[0.97, 0.02, 0.01]), dtype='Int64')})
+wdpa_df.loc[:20, 'WDPAID'] = np.nan
+wdpa_df.loc[30:32, 'WDPA_PID'] = '5'
+
+checks = [check for check in qa.poly_checks
+          if check['name'] in ('duplicate_wdpa_pid', 'dif_name_same_id', 'dif_status_yr_same_id')]
+
+
+class TestExternal(unittest.TestCase):
+    def test_sorter(self):
+        sorter = ExternalSorter(self.tmp(), run_size=100, block_size=10)
+        keys = rng.randint(0, 50, 1000).astype(np.uint64)
+        for start in range(0, 1000, 64):
+            records = np.empty(len(keys[start:start + 64]), dtype=[('key', np.uint64)])
+            records['key'] = keys[start:start + 64]
+            sorter.add(records)
+
+        blocks = [block['key'] for block in sorter.merge()]
+        self.assertListEqual(list(np.concatenate(blocks)), sorted(keys))
+        # all records of a key are in the same block
+        self.assertEqual(sum(len(np.unique(block)) for block in blocks), len(np.unique(keys)))
+
+    def test_same_as_checks(self):
+        grouped = GroupedChecks(checks, run_size=500, block_size=50)
+        for start in range(0, n, 700):
+            grouped.add(wdpa_df.iloc[start:start + 700])
+        positions = grouped.positions()
+
+        expected = run_checks(wdpa_df, checks, log=lambda message: None)
+        self.assertListEqual(sorted(positions), sorted(expected))
+        for name in positions:
+            self.assertListEqual(list(positions[name]), list(expected.positions(name)))
+
+    def test_rows(self):
+        grouped = GroupedChecks(checks, self.tmp(), run_size=500, block_size=50, keep_rows=True)
+        for start in range(0, n, 700):
+            grouped.add(wdpa_df.iloc[start:start + 700])
+        positions, rows = grouped.rows()
+
+        # all rows with the WDPA_PIDs of the flagged rows, read back from the chunks
+        expected = run_checks(wdpa_df, checks, log=lambda message: None)
+        self.assertListEqual(sorted(positions), sorted(expected))
+        for name in positions:
+            self.assertListEqual(list(positions[name]), list(expected.positions(name)))
+        flagged = np.unique(np.concatenate(list(positions.values())))
+        self.assertListEqual(list(rows['WDPA_PID']), list(wdpa_df['WDPA_PID'].values[flagged]))
+
+    def test_grouped_checks(self):
+        self.assertEqual(GROUPED_CHECKS['dif_name_same_id'], ('WDPAID', 'NAME'))
+
+    def tmp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return directory.name
+
+if __name__ == '__main__':
+    unittest.main()
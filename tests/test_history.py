@@ -0,0 +1,50 @@
+import unittest as unittest
+import tempfile
+import numpy as np
+import pandas as pd
+from wdpa.results import CheckResults
+from wdpa.history import save_run, load_run, run_info, diff_keys, diff_runs
+
+checks = [{'name': 'tiny_gis_area'}, {'name': 'ivd_iucn_cat'}, {'name': 'ivd_meta_year', 'key': 'METADATAID'}]
+
+
+def run(wdpa_df, flagged):
+    result = CheckResults(wdpa_df)
+    for name, positions in flagged.items():
+        result.add(name, np.array(positions))
+    return result
+
+
+class TestHistory(unittest.TestCase):
+    def test_diff_keys(self):
+        rng = np.random.RandomState(0)
+        old = np.unique(rng.randint(0, 1000, 300).astype(str))
+        new = np.unique(rng.randint(0, 1000, 300).astype(str))
+        flagged, resolved, persisting = diff_keys(old, new)
+        self.assertListEqual(list(flagged), sorted(set(new) - set(old)))
+        self.assertListEqual(list(resolved), sorted(set(old) - set(new)))
+        self.assertListEqual(list(persisting), sorted(set(new) & set(old)))
+
+    def test_save_and_diff(self):
+        wdpa_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4'], 'METADATAID': [10, 10, 11, 12]})
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            old_path = save_run(run(wdpa_df, {'tiny_gis_area': [0, 1], 'ivd_meta_year': [2]}), store_dir, checks, 'poly')
+            old_run = load_run(old_path)
+            new_run = load_run(save_run(run(wdpa_df, {'tiny_gis_area': [1, 3]}), store_dir, checks[:1] + checks[2:], 'poly'))
+            self.assertEqual(run_info(old_path)['datatype'], 'poly')
+
+        self.assertListEqual(list(old_run['tiny_gis_area']), ['1', '2'])
+        self.assertListEqual(list(old_run['ivd_meta_year']), [11])
+        self.assertEqual(len(old_run['ivd_iucn_cat']), 0)
+
+        summary_df, changes = diff_runs(old_run, new_run)
+        summary_df = summary_df.set_index('check')
+        self.assertListEqual(list(summary_df.loc['tiny_gis_area', ['newly_flagged', 'resolved', 'persisting']]), [1, 1, 1])
+        self.assertListEqual(list(summary_df.loc['ivd_meta_year', ['newly_flagged', 'resolved', 'persisting']]), [0, 1, 0])
+        # ivd_iucn_cat was not run the second time
+        self.assertTrue(pd.isna(summary_df.loc['ivd_iucn_cat', 'new']))
+        self.assertListEqual(list(changes['tiny_gis_area']['status']), ['new', 'resolved'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest as unittest
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds that importing wdpa.qa may take, on top of importing numpy and pandas
+IMPORT_BUDGET = 0.5
+
+
+def run_python(code):
+    '''
+    Run code in a new Python process, as the ArcGIS Pro toolbox does, and return what it prints as JSON.
+    '''
+
+    return json.loads(subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, universal_newlines=True))
+
+
+class TestImport(unittest.TestCase):
+    def test_import_wdpa_is_cheap(self):
+        loaded = run_python('import sys, json, wdpa, wdpa.runner\n'
+                            'print(json.dumps([name for name in ("numpy", "pandas", "arcpy", "wdpa.qa") if name in sys.modules]))')
+        self.assertListEqual(loaded, [])
+
+    def test_import_qa(self):
+        # reading data (e.g. the ISO3 list) and arcpy are loaded on first use, not on import
+        result = run_python('import sys, json, time, numpy, pandas\n'
+                            'reads = []\n'
+                            'pandas.read_csv = lambda *args, **kwargs: reads.append(args)\n'
+                            'start = time.perf_counter()\n'
+                            'import wdpa.qa\n'
+                            'print(json.dumps({"seconds": time.perf_counter() - start,\n'
+                            '                  "reads": len(reads), "arcpy": "arcpy" in sys.modules}))')
+        self.assertEqual(result['reads'], 0)
+        self.assertFalse(result['arcpy'])
+        self.assertLess(result['seconds'], IMPORT_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
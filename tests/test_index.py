@@ -0,0 +1,57 @@
+import unittest as unittest
+from wdpa import index
+import pandas as pd
+import numpy as np
+import os
+import tempfile
+
+wdpa_df = pd.DataFrame({'WDPAID': [1., 2., 2., 3., np.nan, 2.],
+                        'WDPA_PID': ['1', '2_A', '2_B', '3', '4', '2_C'],
+                        'ISO3': ['NLD', 'BEL', 'NLD;BEL', 'FRA', 'NLD', np.nan],
+                        'METADATAID': [10, 11, 11, 12, 10, 11]})
+
+
+class TestKeyIndex(unittest.TestCase):
+    def test_rows(self):
+        self.assertListEqual(list(index.find_rows(wdpa_df, 'WDPAID', [2, 3])), [1, 2, 3, 5])
+
+    def test_missing_keys(self):
+        self.assertListEqual(list(index.find_rows(wdpa_df, 'WDPA_PID', ['5', '2_A'])), [1])
+
+    def test_multivalue_field(self):
+        self.assertListEqual(list(index.find_rows(wdpa_df, 'ISO3', ['BEL'])), [1, 2])
+
+    def test_duplicated_rows(self):
+        self.assertListEqual(list(index.key_index(wdpa_df, 'WDPAID').duplicated_rows()), [1, 2, 5])
+
+    def test_select_rows(self):
+        selected = index.select_rows(wdpa_df, iso3=['NLD'], wdpaid=['1-2'])
+        self.assertListEqual(list(selected['WDPA_PID']), ['1', '2_B'])
+
+
+class TestSaveIndexes(unittest.TestCase):
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'test.idx.npz')
+            index.save_indexes(wdpa_df, path)
+
+            other_df = wdpa_df.copy()
+            self.assertTrue(index.load_indexes(other_df, path))
+            self.assertListEqual(list(index.find_rows(other_df, 'METADATAID', [11])), [1, 2, 5])
+
+            # indexes of another table are not loaded
+            self.assertFalse(index.load_indexes(wdpa_df.iloc[1:], path))
+
+    def test_changed_field(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, 'test.idx.npz')
+            index.save_indexes(wdpa_df, path)
+
+            # the same WDPA_PIDs, but another ISO3: only the ISO3 index is built again
+            other_df = wdpa_df.copy()
+            other_df.loc[0, 'ISO3'] = 'BEL'
+            self.assertTrue(index.load_indexes(other_df, path))
+            self.assertListEqual(list(index.find_rows(other_df, 'ISO3', ['BEL'])), [0, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest as unittest
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.memo import LRUCache, memo_cache, map_distinct, map_values, isin_distinct
+
+wdpa_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4', '5', '6'],
+                        'ISO3': ['NLD', 'NLD;BEL', 'XXX', 'NLD', np.nan, 'BEL'],
+                        'NAME': ['De Veluwe', 'De <Veluwe>', 'De Veluwe', 'Biesbosch*', np.nan, 'Biesbosch']})
+
+
+class TestMemo(unittest.TestCase):
+    def setUp(self):
+        memo_cache.clear()
+
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache.put_many('upper', ['a', 'b'], ['A', 'B'])
+        cache.get_many('upper', ['a']) # 'b' is now the least recently used
+        cache.put_many('upper', ['c'], ['C'])
+        self.assertEqual(len(cache.data), 2)
+        self.assertListEqual(cache.get_many('upper', ['a', 'c'])[:2], ['A', 'C'])
+        self.assertNotEqual(cache.get_many('upper', ['b'])[0], 'B')
+
+    def test_map_distinct(self):
+        calls = []
+        def length(value):
+            calls.append(value)
+            return len(value)
+
+        result = map_distinct(wdpa_df, 'NAME', length, key='length', na_value=-1, dtype=int)
+        self.assertListEqual(list(result), [9, 11, 9, 10, -1, 9])
+        self.assertEqual(len(calls), 4) # once per distinct value
+
+        # chunks of the table reuse the results of the cache
+        map_values(wdpa_df['NAME'].iloc[:3], length, key='length', na_value=-1, dtype=int)
+        self.assertEqual(len(calls), 4)
+        self.assertGreater(memo_cache.hits, 0)
+
+    def test_isin(self):
+        pd.testing.assert_series_equal(isin_distinct(wdpa_df, 'ISO3', ['NLD', 'BEL']),
+                                       wdpa_df['ISO3'].isin(['NLD', 'BEL']))
+        pd.testing.assert_series_equal(isin_distinct(wdpa_df, 'ISO3', ['NLD', np.nan]),
+                                       wdpa_df['ISO3'].isin(['NLD', np.nan]))
+
+    def test_checks(self):
+        self.assertListEqual(list(qa.forbidden_character(wdpa_df, 'NAME', True)), ['2', '4'])
+        self.assertListEqual(list(qa.forbidden_character(wdpa_df.iloc[2:], 'NAME', True)), ['4'])
+
+if __name__ == '__main__':
+    unittest.main()
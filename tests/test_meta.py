@@ -0,0 +1,32 @@
+import unittest as unittest
+import pandas as pd
+from wdpa.qa import meta_checks, INPUT_FIELDS_META
+from wdpa.columns import parse_typed_columns
+from wdpa.runner import run_checks
+
+meta_df = pd.DataFrame({field: ['Not Reported'] * 4 for field in INPUT_FIELDS_META})
+meta_df['METADATAID'] = [1, 2, 2, 3]
+meta_df['DATA_TITLE'] = ['WDPA', 'WDPA <2>', 'WDPA', None]
+meta_df['YEAR'] = ['2000', '1990', 'unknown', '2000']
+meta_df['UPDATE_YR'] = ['2001', '1990', '2000', '1999']
+meta_df['LANGUAGE'] = ['English', 'Elvish', 'English', 'English']
+meta_df['CHAR_SET'] = 'UTF8'
+parse_typed_columns(meta_df)
+
+
+class TestMetaChecks(unittest.TestCase):
+    def test_rows_by_metadataid(self):
+        result = run_checks(meta_df, meta_checks, log=lambda message: None)
+
+        self.assertListEqual(list(result['duplicate_metadataid']['METADATAID']), [2, 2])
+        # only the offending row of a duplicate METADATAID
+        self.assertListEqual(list(result['ivd_meta_year']['METADATAID']), [2])
+        self.assertListEqual(list(result['ivd_meta_year']['YEAR']), ['unknown'])
+        self.assertListEqual(list(result['ivd_meta_update_yr_lt_year']['METADATAID']), [3])
+        self.assertListEqual(list(result['check_meta_language']['LANGUAGE']), ['Elvish'])
+        self.assertListEqual(list(result['ivd_meta_character_data_title']['DATA_TITLE']), ['WDPA <2>'])
+        self.assertListEqual(list(result['ivd_meta_nan_data_title']['METADATAID']), [3])
+        self.assertNotIn('check_meta_char_set', result)
+
+if __name__ == '__main__':
+    unittest.main()
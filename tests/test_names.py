@@ -0,0 +1,77 @@
+import unittest as unittest
+import itertools
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.names import normalise_name, strip_designation, name_ngrams, similar_name_pairs, similar_names
+from wdpa.runner import run_checks
+
+wdpa_df = pd.DataFrame({'WDPAID': [1, 2, 3, 3, 4, 5, 6, 7, 8],
+                        'WDPA_PID': ['1', '2', '3_A', '3_B', '4', '5', '6', '7', '8'],
+                        'NAME': ['De Veluwe', 'De Veluwa', 'Lake District', 'Lake District', 'Peak District',
+                                 'Réserve naturelle 12', 'Reserve Naturelle 13', 'De VeLUwe', np.nan],
+                        'ISO3': ['NLD', 'NLD', 'GBR', 'GBR', 'GBR', 'FRA', 'FRA', 'BEL', 'NLD'],
+                        'DESIG': ['Nationaal Park'] * 9,
+                        'DESIG_ENG': ['National Park'] * 9})
+
+# forest reserves of Zambia: only the names of Kafue Flats are similar without the designation
+forest_df = pd.DataFrame({'WDPAID': [1, 2, 3, 4, 5, 6],
+                          'WDPA_PID': ['1', '2', '3', '4', '5', '6'],
+                          'NAME': ['Kafue Forest Reserve', 'Kabwe Forest Reserve', 'Mpika Forest Reserve',
+                                   'Lusaka Forest Reserve', 'Kafue Flats Forest Reserve', 'Kafue Flat Local Forest'],
+                          'ISO3': ['ZMB'] * 6,
+                          'DESIG': ['National Forest'] * 5 + ['Local Forest'],
+                          'DESIG_ENG': ['Forest Reserve'] * 6})
+
+
+class TestSimilarNames(unittest.TestCase):
+    def test_normalise(self):
+        self.assertEqual(normalise_name(' Parc  National des Cévennes!'), 'parc national des cevennes')
+        self.assertEqual(strip_designation('kafue forest reserve', ['Forest Reserve', 'National Forest']), 'kafue')
+        self.assertEqual(strip_designation('forest reserve', ['Forest Reserve']), 'forest reserve')
+
+    def test_check(self):
+        # the same NAME in another ISO3 (BEL), or of the same WDPAID (3), is not flagged
+        self.assertListEqual(list(qa.similar_name_dif_wdpaid(wdpa_df, True)), ['1', '2'])
+
+        # the similar name checks are not run by default
+        self.assertNotIn('sim_name_dif_id', [check['name'] for check in qa.poly_checks + qa.pt_checks])
+        result = run_checks(wdpa_df, [check for check in qa.name_checks if check['name'] == 'sim_name_dif_id'],
+                            log=lambda message: None)
+        self.assertListEqual(list(result['sim_name_dif_id']['similar_WDPAID']), [2, 1])
+
+    def test_designation(self):
+        # the words of the designations shared by the names of a block are ignored
+        positions, matches = similar_names(forest_df, 'NAME')
+        self.assertListEqual(list(positions), [4, 5])
+        self.assertListEqual(list(matches['similar_WDPAID']), [6, 5])
+
+    def test_common_designation(self):
+        # a large block of names with the same designation stays linear
+        rng = np.random.RandomState(0)
+        letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+        n = 20000
+        names = [''.join(rng.choice(letters, rng.randint(5, 9))) + ' Conservation Easement' for each in range(n)]
+        easement_df = pd.DataFrame({'WDPAID': np.arange(n), 'NAME': names, 'ISO3': 'USA',
+                                    'DESIG': 'Conservation Easement', 'DESIG_ENG': 'Conservation Easement'})
+
+        positions, matches = similar_names(easement_df, 'NAME')
+        self.assertLess(len(positions), n // 100)
+
+    def test_same_as_all_pairs(self):
+        rng = np.random.RandomState(0)
+        words = ['parc', 'national', 'de', 'veluwe', 'hoge', 'kempen', 'lake', 'district', 'peak', 'bos', 'site']
+        names = sorted({' '.join(rng.choice(words, rng.randint(1, 4))) for each in range(300)})
+        blocks = rng.choice(['a', 'b'], len(names))
+
+        left, right, similarity = similar_name_pairs(blocks, names, 0.6)
+
+        expected = []
+        for a, b in itertools.combinations(range(len(names)), 2):
+            x, y = name_ngrams(names[a]), name_ngrams(names[b])
+            if blocks[a] == blocks[b] and len(x & y) / len(x | y) >= 0.6:
+                expected.append((a, b))
+        self.assertListEqual(sorted(zip(left, right)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest as unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from wdpa import qa
+from wdpa.runner import run_checks
+from wdpa.pipeline import run_pipeline
+from wdpa.export import output_errors_to_excel, excel_output_path
+
+rng = np.random.RandomState(0)
+n = 1000
+wdpa_df = pd.DataFrame({'WDPAID': rng.randint(0, 600, n).astype(float),
+                        'WDPA_PID': [str(each) for each in range(n)],
+                        'NAME': rng.choice(['De Veluwe', 'Veluwe', 'De <Veluwe>'], n, p=[0.9, 0.05, 0.05]),
+                        'REP_AREA': rng.choice([0., 0.0001, 10.], n, p=[0.02, 0.03, 0.95]),
+                        'MARINE': rng.choice(['0', '1', '2', '3'], n, p=[0.5, 0.2, 0.28, 0.02])})
+wdpa_df.loc[[10, 510, 990], 'WDPA_PID'] = '5' # duplicates in different chunks
+
+checks = [check for check in qa.poly_checks
+          if check['name'] in ('duplicate_wdpa_pid', 'tiny_rep_area', 'ivd_marine',
+                               'dif_name_same_id', 'ivd_character_name')]
+
+
+def chunks(size=300):
+    for start in range(0, n, size):
+        yield wdpa_df.iloc[start:start + size]
+
+
+class TestPipeline(unittest.TestCase):
+    def test_same_as_run_checks(self):
+        with tempfile.TemporaryDirectory() as outpath, tempfile.TemporaryDirectory() as expected_path:
+            result = run_pipeline(chunks(), checks, outpath, 'poly', log=lambda message: None)
+            expected = run_checks(wdpa_df, checks, log=lambda message: None)
+
+            # positions of the row checks are offset by the rows of the chunks before
+            self.assertSetEqual(set(result), set(expected))
+            for name in expected:
+                self.assertListEqual(list(result.positions(name)), list(expected.positions(name)), name)
+            self.assertTrue(result['duplicate_wdpa_pid']['WDPA_PID'].eq('5').all())
+
+            # the workbook written while the checks ran is the same as the one written after
+            output_errors_to_excel(expected, expected_path, checks, 'poly')
+            wb = load_workbook(excel_output_path(outpath, 'poly'))
+            expected_wb = load_workbook(excel_output_path(expected_path, 'poly'))
+            self.assertListEqual(wb.sheetnames, expected_wb.sheetnames)
+            for sheetname in wb.sheetnames:
+                self.assertListEqual([list(row) for row in wb[sheetname].values],
+                                     [list(row) for row in expected_wb[sheetname].values], sheetname)
+
+    def test_out_of_core(self):
+        # the table checks of checks are grouped checks: only the offending rows are kept
+        with tempfile.TemporaryDirectory() as outpath, tempfile.TemporaryDirectory() as expected_path, \
+             tempfile.TemporaryDirectory() as spill_dir:
+            result = run_pipeline(chunks(), checks, outpath, 'poly', log=lambda message: None, spill_dir=spill_dir)
+            expected = run_checks(wdpa_df, checks, log=lambda message: None)
+
+            self.assertSetEqual(set(result), set(expected))
+            self.assertLess(len(result.wdpa_df), n)
+            for name in expected:
+                self.assertListEqual(list(result[name]['WDPA_PID']), list(expected[name]['WDPA_PID']), name)
+
+            output_errors_to_excel(expected, expected_path, checks, 'poly')
+            wb = load_workbook(excel_output_path(outpath, 'poly'))
+            expected_wb = load_workbook(excel_output_path(expected_path, 'poly'))
+            for sheetname in expected_wb.sheetnames:
+                self.assertListEqual([list(row) for row in wb[sheetname].values],
+                                     [list(row) for row in expected_wb[sheetname].values], sheetname)
+            # the spilled records and chunks are removed
+            self.assertListEqual(os.listdir(spill_dir), [])
+
+    def test_error_in_stage(self):
+        def failing_chunks():
+            yield wdpa_df.iloc[:300]
+            raise ValueError('ERROR: cannot read the table')
+
+        with tempfile.TemporaryDirectory() as outpath:
+            with self.assertRaises(ValueError):
+                run_pipeline(failing_chunks(), checks, outpath, 'poly', log=lambda message: None)
+            # no incomplete workbook is saved
+            self.assertListEqual(os.listdir(outpath), [])
+
+if __name__ == '__main__':
+    unittest.main()
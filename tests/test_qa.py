@@ -0,0 +1,82 @@
+import unittest as unittest
+from unittest import mock
+from wdpa import qa
+from wdpa.runner import run_integrity_checks
+import pandas as pd
+import numpy as np
+
+# checks of wdpa.qa on small DataFrames, without arcpy or the test geodatabase
+
+
+class TestIntCrit(unittest.TestCase):
+    def test_valid_int_crit(self):
+        self.assertTrue(qa.valid_int_crit('(i)(iii)(x)'))
+        self.assertFalse(qa.valid_int_crit('(iii)(i)'))
+        self.assertFalse(qa.valid_int_crit('(i)(i)'))
+        self.assertFalse(qa.valid_int_crit(''))
+        self.assertFalse(qa.valid_int_crit('(i)\n'))
+
+    def test_invalid_int_crit_ramsar_whs(self):
+        int_crit_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4'],
+                                    'INT_CRIT': ['(ii)(iv)', '(iv)(ii)', 'Not Reported', '(xi)'],
+                                    'DESIG_ENG': ['Ramsar Site, Wetland of International Importance'] * 3 + ['National Park']})
+        self.assertListEqual(list(qa.invalid_int_crit_desig_eng_ramsar_whs(int_crit_df, True)), ['2'])
+
+class TestStatusYr(unittest.TestCase):
+    status_yr_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4', '5', '6'],
+                                 'STATUS_YR': ['0', '1990', '1700', '3000', 'unknown', np.nan]})
+
+    def test_invalid_status_yr(self):
+        self.assertListEqual(list(qa.invalid_status_yr(self.status_yr_df, True)), ['3', '4'])
+
+    def test_invalid_status_yr_format(self):
+        self.assertListEqual(list(qa.invalid_status_yr_format(self.status_yr_df, True)), ['5', '6'])
+
+class TestCountryCodes(unittest.TestCase):
+    iso3_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4'],
+                            'ISO3': ['NLD', 'NLD;XXX', np.nan, 'NLD;']})
+
+    def test_invalid_iso3(self):
+        # the ISO3 list is downloaded; the checks are run with a fixed list
+        with mock.patch.object(qa, 'get_iso3', return_value=frozenset(['NLD', 'BEL'])):
+            self.assertListEqual(list(qa.invalid_iso3(self.iso3_df, True)), ['2', '3', '4'])
+
+            rows = self.iso3_df.iloc[1:]
+            columns = qa.country_code_columns('ISO3')(rows)
+            self.assertListEqual(list(columns['invalid_ISO3']), ['XXX', '<missing>', '<missing>'])
+
+class TestIntegrity(unittest.TestCase):
+    # the Polygons with more fields than the integrity checks read, as in combined.py
+    poly_df = pd.DataFrame({'WDPAID': [1., 2., 3.], 'WDPA_PID': ['1', '2', '3'], 'METADATAID': [10, 11, 12],
+                            'NAME': ['A', 'B', 'C'], 'ISO3': ['NLD'] * 3, 'DESIG': ['Park'] * 3, 'MARINE': ['0'] * 3})
+    pt_df = pd.DataFrame({'WDPAID': [2., 4.], 'WDPA_PID': ['2', '3'], 'METADATAID': [11, 13],
+                          'NAME': ['B', 'D'], 'ISO3': ['NLD'] * 2, 'DESIG': ['Park'] * 2})
+    meta_df = pd.DataFrame({'METADATAID': [10, 11, 13, 14], 'DATA_TITLE': ['WDPA'] * 4})
+
+    def test_integrity_checks(self):
+        result = run_integrity_checks(self.poly_df, self.pt_df, self.meta_df, qa.integrity_checks, log=lambda message: None)
+
+        self.assertListEqual(list(result['overlap_wdpaid']['WDPA_PID']), ['2'])
+        self.assertListEqual(list(result['overlap_wdpa_pid']['WDPA_PID']), ['2', '3'])
+        self.assertListEqual(list(result['metaid_only_in_data']['METADATAID']), [12])
+        self.assertListEqual(list(result['metaid_only_in_metadata']['METADATAID']), [14])
+
+        # the polygons are output with the fields of the integrity checks only
+        for name in ['overlap_wdpaid', 'overlap_wdpa_pid', 'metaid_only_in_data']:
+            self.assertListEqual(list(result[name].columns), qa.INPUT_FIELDS_INTEGRITY)
+        self.assertListEqual(list(result['metaid_only_in_metadata'].columns), ['METADATAID', 'DATA_TITLE'])
+
+class TestWhereClause(unittest.TestCase):
+    def test_no_scope(self):
+        self.assertEqual(qa.where_clause(), '')
+
+    def test_scope(self):
+        self.assertEqual(qa.where_clause(metadataid=[1, '2'], wdpaid=['10-20', 40597]),
+                         'METADATAID IN (1, 2) AND ((WDPAID >= 10 AND WDPAID <= 20) OR WDPAID IN (40597))')
+
+    def test_invalid_iso3(self):
+        with self.assertRaises(ValueError):
+            qa.where_clause(iso3=["NLD' OR '1'='1"])
+
+if __name__ == '__main__':
+    unittest.main()
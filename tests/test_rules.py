@@ -0,0 +1,71 @@
+import unittest as unittest
+import json
+import os
+import tempfile
+import threading
+import pandas as pd
+from wdpa import rules, runner
+from wdpa.qa import invalid_marine, area_invalid_gis_area
+
+checks = [{'name': 'ivd_marine', 'func': invalid_marine, 'fields': ['MARINE']},
+          {'name': 'tiny_gis_area', 'func': area_invalid_gis_area, 'fields': ['GIS_AREA']}]
+
+wdpa_df = pd.DataFrame({'WDPAID': [1, 2, 3],
+                        'WDPA_PID': ['1', '2', '3'],
+                        'MARINE': ['0', '1', '3'],
+                        'GIS_AREA': [0.00005, 0.5, 10.0]})
+
+
+class TestCompileRules(unittest.TestCase):
+    def test_defaults(self):
+        pack = rules.compile_rules({'thresholds': {'coast_min': 0.2}})
+        self.assertEqual(pack.thresholds['coast_min'], 0.2)
+        self.assertEqual(pack.thresholds['coast_max'], rules.DEFAULT_RULES['thresholds']['coast_max'])
+        self.assertEqual(pack.values['ivd_marine'], ('0', '1', '2'))
+
+    def test_invalid_rules(self):
+        for invalid in ({'threshold': {}},
+                        {'thresholds': {'not_a_threshold': 1}},
+                        {'thresholds': {'coast_min': '0.2'}},
+                        {'thresholds': {'coast_min': 0.95}},
+                        {'values': {'ivd_marine': [0, 1, 2]}},
+                        {'values': {'forbidden_characters': []}},
+                        {'values': {'forbidden_characters': ['<', '']}}):
+            with self.assertRaises(ValueError):
+                rules.compile_rules(invalid)
+
+    def test_load_once(self):
+        path = os.path.join(tempfile.mkdtemp(), 'strict.json')
+        with open(path, 'w') as f:
+            json.dump({'name': 'strict', 'thresholds': {'min_area_km2': 1}}, f)
+
+        self.assertIs(rules.load_rules(path), rules.load_rules(path))
+
+
+class TestUseRules(unittest.TestCase):
+    def test_rules_per_thread(self):
+        pack = rules.compile_rules({'values': {'ivd_marine': ['0', '1', '2', '3']}})
+        seen = []
+
+        with rules.use_rules(pack):
+            thread = threading.Thread(target=lambda: seen.append(rules.rule_values('ivd_marine')))
+            thread.start()
+            thread.join()
+            self.assertListEqual(rules.rule_values('ivd_marine'), ['0', '1', '2', '3'])
+
+        self.assertListEqual(seen, [['0', '1', '2']])
+        self.assertIs(rules.active_rules(), rules.DEFAULT_PACK)
+
+    def test_run_rule_packs(self):
+        packs = [rules.DEFAULT_PACK,
+                 rules.compile_rules({'name': 'loose', 'values': {'ivd_marine': ['0', '1', '2', '3']},
+                                      'thresholds': {'min_area_km2': 1}})]
+        result = runner.run_rule_packs(wdpa_df, checks, packs, log=lambda message: None)
+
+        self.assertListEqual(list(result['default']['ivd_marine']['WDPA_PID']), ['3'])
+        self.assertNotIn('ivd_marine', result['loose'])
+        self.assertListEqual(list(result['default']['tiny_gis_area']['WDPA_PID']), ['1'])
+        self.assertListEqual(list(result['loose']['tiny_gis_area']['WDPA_PID']), ['1', '2'])
+
+if __name__ == '__main__':
+    unittest.main()
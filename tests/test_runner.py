@@ -0,0 +1,118 @@
+import unittest as unittest
+from wdpa import runner, features, results, qa
+import pandas as pd
+import numpy as np
+
+# checks as declared in poly_checks / pt_checks, without the functions
+checks = [{'name': 'tiny_gis_area', 'fields': ['GIS_AREA']},
+          {'name': 'ivd_iucn_cat', 'fields': ['IUCN_CAT']},
+          {'name': 'dif_name_same_id', 'fields': ['WDPAID', 'NAME']}]
+
+input_fields = ['WDPAID', 'WDPA_PID', 'NAME', 'IUCN_CAT', 'GIS_AREA', 'ISO3']
+
+
+class TestSelectChecks(unittest.TestCase):
+    def test_all_checks(self):
+        self.assertEqual(runner.select_checks(checks, []), checks)
+
+    def test_selected_checks_keep_order(self):
+        selected = runner.select_checks(checks, ['ivd_iucn_cat', 'tiny_gis_area'])
+        self.assertListEqual([check['name'] for check in selected], ['tiny_gis_area', 'ivd_iucn_cat'])
+
+    def test_optional_checks(self):
+        # optional checks are only selected by name
+        optional = [{'name': 'sim_name_dif_id', 'fields': ['WDPAID', 'NAME']}]
+        self.assertEqual(runner.select_checks(checks, [], optional), checks)
+        selected = runner.select_checks(checks, ['sim_name_dif_id', 'ivd_iucn_cat'], optional)
+        self.assertListEqual([check['name'] for check in selected], ['ivd_iucn_cat', 'sim_name_dif_id'])
+
+    def test_unknown_check(self):
+        with self.assertRaises(ValueError):
+            runner.select_checks(checks, ['not_a_check'])
+
+    def test_parse_multivalue(self):
+        self.assertListEqual(runner.parse_multivalue("tiny_gis_area;'ivd_iucn_cat'"), ['tiny_gis_area', 'ivd_iucn_cat'])
+        self.assertListEqual(runner.parse_multivalue('#'), [])
+
+
+class TestRequiredFields(unittest.TestCase):
+    def test_single_check(self):
+        self.assertListEqual(runner.required_fields(checks[:1], input_fields), ['WDPAID', 'WDPA_PID', 'GIS_AREA'])
+
+    def test_union_in_input_order(self):
+        self.assertListEqual(runner.required_fields(checks, input_fields),
+                             ['WDPAID', 'WDPA_PID', 'NAME', 'IUCN_CAT', 'GIS_AREA'])
+
+    def test_undeclared_fields(self):
+        self.assertListEqual(runner.required_fields([{'name': 'other'}], input_fields), input_fields)
+
+features.register_isin_feature('test_marine2', 'MARINE', ['2'])
+
+feature_checks = [{'name': 'zero_rep_m_area_marine12', 'features': ['test_marine2']},
+                  {'name': 'ivd_iucn_cat'},
+                  {'name': 'ivd_no_take_marine12', 'features': ['test_marine2']}]
+
+
+class TestFeatures(unittest.TestCase):
+    def test_schedule_shared_features_together(self):
+        self.assertListEqual([check['name'] for check in features.schedule_checks(feature_checks)],
+                             ['zero_rep_m_area_marine12', 'ivd_no_take_marine12', 'ivd_iucn_cat'])
+
+    def test_feature_freed_after_last_check(self):
+        wdpa_df = pd.DataFrame({'MARINE': ['0', '1', '2']})
+        cache = features.FeatureCache(feature_checks)
+
+        self.assertListEqual(list(cache.get(wdpa_df, 'test_marine2')), [False, False, True])
+        cache.release(feature_checks[0])
+        self.assertIn('test_marine2', cache.values)
+        cache.release(feature_checks[2])
+        self.assertNotIn('test_marine2', cache.values)
+
+class TestCheckResults(unittest.TestCase):
+    def test_compress_rows(self):
+        for positions in ([2, 5], list(range(0, 100, 2))):
+            stored = results.compress_rows(np.array(positions), 100)
+            self.assertListEqual(list(results.decompress_rows(stored, 100)), positions)
+
+    def test_rows_on_use(self):
+        wdpa_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3'], 'MARINE': ['0', '1', '2']})
+        result = results.CheckResults(wdpa_df)
+        result.add('ivd_marine', np.array([0, 2]))
+
+        self.assertEqual(result.count('ivd_marine'), 2)
+        self.assertListEqual(list(result['ivd_marine']['WDPA_PID']), ['1', '3'])
+
+    def test_output_fields(self):
+        wdpa_df = pd.DataFrame({'WDPAID': [1, 2, 3], 'WDPA_PID': ['1', '2', '3'],
+                                'NAME': ['De Veluwe', 'De <Veluwe>', 'Biesbosch*'], 'ISO3': ['NLD', 'NLD', 'NLD']})
+        check = [check for check in qa.poly_checks if check['name'] == 'ivd_character_name']
+        result = runner.run_checks(wdpa_df, check, log=lambda message: None)
+
+        # only the fields explaining the flag, and the forbidden characters found
+        self.assertListEqual(list(result['ivd_character_name'].columns), ['WDPAID', 'WDPA_PID', 'NAME', 'forbidden_characters'])
+        self.assertListEqual(list(result['ivd_character_name']['forbidden_characters']), ['< >', '*'])
+
+    def test_error_matrix(self):
+        wdpa_df = pd.DataFrame({'WDPAID': [1, 2, 3, 3], 'WDPA_PID': ['1', '2', '3', '3']})
+        result = results.CheckResults(wdpa_df)
+        result.add('ivd_iucn_cat', np.array([0, 3]))
+        result.add('tiny_gis_area', np.array([2]))
+
+        matrix = results.error_matrix(result, checks)
+        self.assertListEqual(list(matrix.columns), ['WDPAID', 'WDPA_PID', 'tiny_gis_area', 'ivd_iucn_cat', 'ERROR_COUNT'])
+        self.assertListEqual(list(matrix['WDPA_PID']), ['1', '3'])
+        self.assertListEqual(list(matrix['ERROR_COUNT']), [1, 2])
+
+    def test_error_matrix_missing_wdpa_pid(self):
+        # rows without a WDPA_PID are kept, one row each, next to a duplicated WDPA_PID
+        wdpa_df = pd.DataFrame({'WDPAID': [1, 2, 3, 3, 4], 'WDPA_PID': [np.nan, '2', '3', '3', np.nan]})
+        result = results.CheckResults(wdpa_df)
+        result.add('ivd_iucn_cat', np.array([0, 3, 4]))
+        result.add('tiny_gis_area', np.array([2, 4]))
+
+        matrix = results.error_matrix(result, checks)
+        self.assertListEqual(list(matrix['WDPAID']), [3, 1, 4])
+        self.assertListEqual(list(matrix['ERROR_COUNT']), [2, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
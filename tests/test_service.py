@@ -0,0 +1,84 @@
+import unittest as unittest
+import json
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+from wdpa.service import check_submission, QAServer
+from wdpa.delta import GlobalIndex, GLOBAL_FIELDS
+
+# the global WDPA: one point with the fields of the delta checks
+global_df = pd.DataFrame(dict({field: ['Not Reported'] for field in GLOBAL_FIELDS},
+                              WDPAID=[1.], WDPA_PID=['1'], METADATAID=[10], NAME=['De Veluwe']))
+
+rows = [{'WDPAID': 1, 'WDPA_PID': '1', 'METADATAID': 10, 'NAME': 'De Veluwa'},
+        {'WDPAID': 2, 'WDPA_PID': '2', 'METADATAID': 11, 'NAME': ''}]
+
+
+class TestCheckSubmission(unittest.TestCase):
+    def test_submission(self):
+        reply = check_submission({'type': 'point', 'rows': rows,
+                                  'checks': ['ivd_nan_present_name', 'duplicate_wdpa_pid', 'ivd_iucn_cat']})
+
+        self.assertDictEqual(reply['result'], {'ivd_nan_present_name': ['2']})
+        self.assertListEqual(reply['passed'], ['duplicate_wdpa_pid'])
+        self.assertListEqual(reply['skipped'], ['ivd_iucn_cat']) # IUCN_CAT was not submitted
+        self.assertNotIn('global', reply)
+
+    def test_against_global(self):
+        reply = check_submission({'type': 'point', 'rows': rows, 'checks': ['duplicate_wdpa_pid', 'dif_name_same_id']},
+                                 {'point': GlobalIndex.build(global_df)})
+
+        self.assertDictEqual(reply['result'], {})
+        self.assertDictEqual(reply['global'], {'duplicate_wdpa_pid': ['1'], 'dif_name_same_id': ['1']})
+
+        # the global records of a replaced METADATAID are not compared
+        reply = check_submission({'type': 'point', 'rows': rows, 'replaced_metadataid': [10]},
+                                 {'point': GlobalIndex.build(global_df)})
+        self.assertDictEqual(reply['global'], {})
+
+    def test_invalid_submission(self):
+        for submission in ([], {'type': 'line', 'rows': rows}, {'type': 'point', 'rows': 'WDPA'},
+                           {'type': 'point', 'rows': rows, 'checks': ['unknown']}):
+            with self.assertRaises(ValueError):
+                check_submission(submission)
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.server = QAServer(('127.0.0.1', 0), tables={'point': global_df}, log=lambda message: None)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def request(self, path, body=None):
+        data = None if body is None else json.dumps(body).encode('utf-8')
+        try:
+            with urllib.request.urlopen(self.url + path, data=data, timeout=10) as response:
+                return response.status, json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read().decode('utf-8'))
+
+    def test_get(self):
+        status, reply = self.request('/checks')
+        self.assertEqual(status, 200)
+        self.assertIn('ivd_nan_present_name', reply['point'])
+        self.assertEqual(self.request('/status'), (200, {'tables': {'point': 1}}))
+        self.assertEqual(self.request('/unknown')[0], 404)
+
+    def test_post(self):
+        status, reply = self.request('/check', {'type': 'point', 'rows': rows, 'checks': ['duplicate_wdpa_pid']})
+        self.assertEqual(status, 200)
+        self.assertDictEqual(reply['global'], {'duplicate_wdpa_pid': ['1']})
+
+    def test_post_errors(self):
+        # each invalid request gets a JSON reply
+        for body in ([], 'WDPA', {'type': 'point', 'rows': [1, 2]}):
+            status, reply = self.request('/check', body)
+            self.assertEqual(status, 400)
+            self.assertIn('error', reply)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest as unittest
+import importlib.util
+import pandas as pd
+
+HAS_GEOMETRY = all(importlib.util.find_spec(name) for name in ('shapely', 'geopandas'))
+
+if HAS_GEOMETRY:
+    import geopandas
+    from shapely.geometry import Point, Polygon, box
+    from wdpa import spatial
+
+
+@unittest.skipUnless(HAS_GEOMETRY, 'the spatial checks require shapely and geopandas')
+class TestSpatialChecks(unittest.TestCase):
+    def setUp(self):
+        geometries = [box(0, 0, 1, 1),
+                      box(0, 0, 1, 1.01),                               # near duplicate of the first
+                      box(5, 5, 6, 6),
+                      Polygon([(10, 10), (11, 11), (11, 10), (10, 11)])]  # self-intersection
+        self.poly_gdf = geopandas.GeoDataFrame({'WDPAID': [1, 2, 3, 4],
+                                                'WDPA_PID': ['1', '2', '3', '4']},
+                                               geometry=geometries, crs='EPSG:4326')
+        self.poly_gdf['GIS_AREA'] = spatial.geometry_area_km2(self.poly_gdf)
+        self.poly_gdf.loc[2, 'GIS_AREA'] *= 2
+        self.pt_gdf = geopandas.GeoDataFrame({'WDPAID': [3, 9], 'WDPA_PID': ['3', '9']},
+                                             geometry=[Point(5.5, 5.5), Point(0.5, 0.5)], crs='EPSG:4326')
+
+    def test_checks(self):
+        result = spatial.run_spatial_checks(self.poly_gdf, self.pt_gdf, log=lambda message: None, workers=2)
+
+        self.assertListEqual(list(result['ivd_geometry']['WDPA_PID']), ['4'])
+        self.assertListEqual(list(result['duplicate_geometry']['WDPA_PID']), ['1', '2'])
+        self.assertListEqual(list(result['duplicate_geometry']['duplicate_of']), ['2', '1'])
+        self.assertListEqual(list(result['pt_in_poly_same_wdpaid']['WDPA_PID']), ['3'])
+        self.assertListEqual(list(result['ivd_gis_area_geometry']['WDPA_PID']), ['3'])
+
+    def test_iso3_location(self):
+        boundary_gdf = geopandas.GeoDataFrame({'ISO3': ['NLD', 'BEL', 'NLD']},
+                                              geometry=[box(0, 0, 2.5, 2), box(4, 4, 7, 7), box(10, 10, 11, 11)],
+                                              crs='EPSG:4326')
+        boundaries = spatial.BoundaryIndex.build(boundary_gdf, tile_size=1)
+        pt_gdf = geopandas.GeoDataFrame({'WDPA_PID': ['1', '2', '3', '4', '5', '6'],
+                                         'ISO3': ['NLD', 'BEL', 'BEL;NLD', 'ABNJ', 'ABNJ', 'NLD']},
+                                        geometry=[Point(2.5, 1.5), Point(1, 1), Point(10.5, 10.5),
+                                                  Point(20, 20), Point(5, 5), Point(2.52, 1)],
+                                        crs='EPSG:4326')
+
+        result = spatial.invalid_iso3_location(pt_gdf, boundaries)
+
+        self.assertListEqual(list(result['WDPA_PID']), ['2', '5'])
+        self.assertListEqual(list(result['location_ISO3']), ['NLD', 'BEL'])
+
+    def test_boundaries_missing(self):
+        with self.assertRaises(ValueError):
+            spatial.load_boundary_index('does_not_exist.gpkg')
+
+    def test_chunks(self):
+        # the same result when the pairs are checked in chunks of one: four near duplicate pairs
+        poly_gdf = geopandas.GeoDataFrame({'WDPAID': range(8), 'WDPA_PID': [str(each) for each in range(8)]},
+                                          geometry=[box(3 * (each // 2), 0, 3 * (each // 2) + 1, 1 + 0.01 * (each % 2))
+                                                    for each in range(8)], crs='EPSG:4326')
+        whole = spatial.duplicate_geometry(poly_gdf, None)
+        self.assertEqual(len(whole), 8)
+
+        spatial.CHUNK_SIZE, chunk_size = 1, spatial.CHUNK_SIZE
+        try:
+            # one chunk per pair, run in parallel threads
+            self.assertListEqual(spatial._map_chunks(lambda start, stop: (start, stop), 3, workers=2),
+                                 [(0, 1), (1, 2), (2, 3)])
+            chunked = spatial.duplicate_geometry(poly_gdf, None, workers=2)
+        finally:
+            spatial.CHUNK_SIZE = chunk_size
+        pd.testing.assert_frame_equal(whole, chunked)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest as unittest
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.rules import compile_rules, use_rules
+from wdpa.sweep import AreaSweep
+
+rng = np.random.RandomState(0)
+rep_area = rng.uniform(1, 1000, 200)
+wdpa_df = pd.DataFrame({'WDPA_PID': [str(each) for each in range(200)],
+                        'REP_AREA': rep_area,
+                        'GIS_AREA': rep_area * rng.lognormal(0, 0.8, 200),
+                        'REP_M_AREA': np.nan,
+                        'GIS_M_AREA': np.nan})
+
+
+class TestAreaSweep(unittest.TestCase):
+    def test_same_as_check(self):
+        sweep = AreaSweep(wdpa_df, ['gis_area_gt_rep_area'])
+
+        for sigma, floor in [(1, 0), (2, 50), (3, 100)]:
+            with use_rules(compile_rules({'thresholds': {'area_outlier_sigma': sigma,
+                                                         'max_allowed_size_diff_km2': floor}})):
+                expected = qa.area_invalid_too_large_gis(wdpa_df, True)
+            self.assertListEqual(list(sweep.pids('gis_area_gt_rep_area', sigma, floor)), list(expected))
+            self.assertEqual(sweep.count('gis_area_gt_rep_area', sigma, floor), len(expected))
+
+    def test_table(self):
+        table = AreaSweep(wdpa_df).table(sigmas=[2, 1], floors=[50, 0])
+
+        self.assertEqual(len(table), 4 * 2 * 2)
+        counts = table[table['check'] == 'gis_area_gt_rep_area']['flagged'].tolist()
+        # sigma 1 and 2, each with floor 0 and 50: fewer rows are flagged at higher thresholds
+        self.assertTrue(counts[0] >= counts[1] and counts[0] >= counts[2] >= counts[3])
+        self.assertTrue((table[table['check'] == 'gis_m_area_gt_rep_m_area']['flagged'] == 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest as unittest
+import numpy as np
+import pandas as pd
+from wdpa import qa
+from wdpa.text import text_anomalies, classify_text
+
+wdpa_df = pd.DataFrame({'WDPA_PID': ['1', '2', '3', '4', '5', '6', '7'],
+                        'NAME': ['RÃ©serve naturelle', 'Re\u0301serve naturelle', 'De\u200bVeluwe', 'De Veluwe\t',
+                                 'De Veluwe ', 'Réserve naturelle', np.nan]})
+
+
+class TestTextAnomalies(unittest.TestCase):
+    def test_anomalies(self):
+        self.assertListEqual(list(classify_text(wdpa_df['NAME'])),
+                             ['mojibake', 'not_nfc', 'zero_width', 'control;whitespace', 'whitespace', '', ''])
+        # text in Latin-1 or Windows-1252 characters is not mojibake
+        self.assertEqual(text_anomalies('Côte d’Ivoire'), '')
+
+    def test_check(self):
+        self.assertListEqual(list(qa.text_anomaly_name(wdpa_df, True)), ['1', '2', '3', '4', '5'])
+        self.assertFalse(qa.text_anomaly_name(wdpa_df.iloc[5:]))
+
+if __name__ == '__main__':
+    unittest.main()
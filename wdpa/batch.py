@@ -0,0 +1,244 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to run the QA checks on archived WDPA releases             ####
+###################################################################################
+
+'''
+To follow the quality of the WDPA over time, the checks are run on archived
+monthly releases, listed in a manifest: a CSV file with one row per release
+
+    release,path,type
+    2019-06,D:/archive/WDPA_Jun2019_Public.gdb/WDPA_poly_Jun2019,poly
+    2019-07,D:/archive/WDPA_Jul2019_poly.pkl,poly
+
+where path is a feature class, a pickled DataFrame (.pkl) or a Parquet file
+(.parquet), and type is 'poly' (default) or 'point'. Instead of loading and
+checking the releases one after the other, run_batch runs them in a pool of
+processes:
+
+- each worker process checks one release at a time, and keeps what it loaded
+  once between releases: the ISO3 list, the cache of wdpa.memo and the rule
+  pack, which is compiled once, before the releases are scheduled
+- the memory of each worker can be limited (memory_limit_mb); a release that
+  does not fit is reported as an error, without stopping the other releases
+- the checks whose fields a release does not have (older releases) are skipped
+
+The result is one table with a row per release, and the number of rows flagged
+by each check, e.g. to plot the errors over time.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import os
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from wdpa.rules import as_rules
+from wdpa.runner import select_checks, run_checks
+from wdpa.columns import parse_typed_columns
+from wdpa.qa import CHECKS
+
+# Columns of the manifest; type is optional
+MANIFEST_COLUMNS = ['release', 'path', 'type']
+
+# Columns of the time series before the counts of the checks
+SERIES_COLUMNS = ['release', 'type', 'rows', 'error']
+
+# State of a worker process, kept between the releases it checks
+_worker = dict()
+
+#########################
+#### 1. The manifest ####
+#########################
+
+def read_manifest(path):
+    '''
+    Return the releases listed in the manifest at path, as a list of dictionaries
+    with the release, path and type, in the order of the manifest.
+
+    ## Example ##
+    read_manifest('D:/archive/manifest.csv')
+    '''
+
+    manifest_df = pd.read_csv(path, dtype=str).fillna('')
+
+    missing = set(MANIFEST_COLUMNS[:2]) - set(manifest_df.columns)
+    if missing:
+        raise ValueError(f'ERROR: the manifest has no column(s): {", ".join(sorted(missing))}')
+
+    if 'type' not in manifest_df.columns:
+        manifest_df['type'] = 'poly'
+    manifest_df['type'] = manifest_df['type'].replace('', 'poly')
+
+    unknown = set(manifest_df['type']) - set(CHECKS)
+    if unknown:
+        raise ValueError(f'ERROR: unknown type(s) in the manifest: {", ".join(sorted(unknown))}')
+
+    if manifest_df.duplicated(['release', 'type']).any():
+        raise ValueError('ERROR: the manifest lists a release of the same type twice')
+
+    return manifest_df[MANIFEST_COLUMNS].to_dict('records')
+
+def load_release(path, input_fields, cache_dir=None):
+    '''
+    Return the archived release at path as a wdpa DataFrame, with those of the
+    input_fields it has.
+
+    ## Arguments ##
+    path --         feature class, pickled DataFrame (.pkl) or Parquet file (.parquet)
+    input_fields -- list of the fields to read, e.g. INPUT_FIELDS_POLY
+    cache_dir --    optional directory of the snapshots of feature classes, see wdpa.snapshot
+    '''
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in ('.pkl', '.parquet'):
+        wdpa_df = pd.read_pickle(path) if extension == '.pkl' else pd.read_parquet(path)
+        wdpa_df = wdpa_df[[field for field in input_fields if field in wdpa_df.columns]]
+        parse_typed_columns(wdpa_df)
+        return wdpa_df
+
+    import arcpy # imported on first use, as only needed to read feature classes
+
+    present = set(field.name for field in arcpy.ListFields(path))
+    input_fields = [field for field in input_fields if field in present]
+
+    if cache_dir:
+        from wdpa.snapshot import load_snapshot
+        return load_snapshot(path, input_fields, cache_dir)
+
+    from wdpa.qa import arcgis_table_to_df
+    return arcgis_table_to_df(path, input_fields)
+
+#############################
+#### 2. Worker processes ####
+#############################
+
+def _limit_memory(memory_limit_mb):
+    '''
+    Limit the memory of this process to memory_limit_mb, once. Return False if
+    it cannot be limited (Windows).
+    '''
+
+    if _worker.get('memory_limit_mb') == memory_limit_mb:
+        return True
+
+    try:
+        import resource
+    except ImportError:
+        return False
+
+    limit = int(memory_limit_mb * 2**20)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _worker['memory_limit_mb'] = memory_limit_mb
+
+    return True
+
+def check_release(entry, names, rules, memory_limit_mb=None, cache_dir=None):
+    '''
+    Run the checks on one release, in a worker process, and return a dictionary
+    with the release, type, number of rows, error ('' if none), and the number
+    of rows flagged by each check run ('counts').
+
+    ## Arguments ##
+    entry --           release of the manifest, see read_manifest
+    names --           names of the checks to run, if of the type (default: all checks of the type)
+    rules --           RulePack of the checks, see wdpa.rules
+    memory_limit_mb -- optional memory limit of the worker process
+    cache_dir --       optional directory of the snapshots, see wdpa.snapshot
+    '''
+
+    row = {'release': entry['release'], 'type': entry['type'], 'rows': np.nan, 'error': '', 'counts': {}}
+
+    try:
+        if memory_limit_mb:
+            _limit_memory(memory_limit_mb)
+
+        checks, input_fields = CHECKS[entry['type']]
+        checks = [check for check in checks if not names or check['name'] in names]
+        wdpa_df = load_release(entry['path'], input_fields, cache_dir)
+
+        # older releases lack some fields: only run the checks they can
+        present = set(wdpa_df.columns)
+        runnable = [check for check in checks if set(check.get('fields', input_fields)) | {'WDPA_PID'} <= present]
+
+        result = run_checks(wdpa_df, runnable, log=lambda message: None, rules=rules)
+        row['rows'] = len(wdpa_df)
+        row['counts'] = {check['name']: result.count(check['name']) if check['name'] in result else 0
+                         for check in runnable}
+
+    except MemoryError:
+        row['error'] = f'ERROR: the release does not fit in {memory_limit_mb} MB'
+    except Exception as error:
+        row['error'] = f'ERROR: {error}'
+
+    return row
+
+##########################
+#### 3. Run the batch ####
+##########################
+
+def run_batch(manifest, names=None, rules=None, workers=None, memory_limit_mb=None, cache_dir=None, log=print):
+    '''
+    Run the checks on all releases of the manifest in a pool of worker processes,
+    and return the time series: a DataFrame with one row per release (see
+    SERIES_COLUMNS) and the number of rows flagged by each check as columns. A
+    check that was not run on a release (e.g. its fields are missing) has no count.
+
+    ## Arguments ##
+    manifest --        path of the manifest, or a list of releases, see read_manifest
+    names --           optional names of the checks to run (default: all checks)
+    rules --           optional RulePack, or path of a rule pack file, see wdpa.rules
+    workers --         number of worker processes (default: the number of processors)
+    memory_limit_mb -- optional memory limit of each worker process (not on Windows)
+    cache_dir --       optional directory of the snapshots of feature classes, see wdpa.snapshot
+    log --             function used to report progress, e.g. arcpy.AddMessage
+
+    ## Example ##
+    run_batch('D:/archive/manifest.csv', workers=4, memory_limit_mb=6000)
+    '''
+
+    entries = read_manifest(manifest) if isinstance(manifest, str) else list(manifest)
+    # raises an error for unknown checks
+    select_checks([check for checks, fields in CHECKS.values() for check in checks], names)
+
+    rules = as_rules(rules) # compiled once, for all releases
+    workers = max(1, min(workers or os.cpu_count() or 1, len(entries)))
+
+    if memory_limit_mb and importlib.util.find_spec('resource') is None:
+        log('The memory of the worker processes cannot be limited on this system')
+
+    rows = dict()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(check_release, entry, names, rules, memory_limit_mb, cache_dir): number
+                   for number, entry in enumerate(entries)}
+
+        for future in as_completed(futures):
+            entry = entries[futures[future]]
+            try:
+                rows[futures[future]] = future.result()
+            except Exception as error:
+                # e.g. a worker process killed by the system
+                rows[futures[future]] = {'release': entry['release'], 'type': entry['type'],
+                                         'rows': np.nan, 'error': f'ERROR: {error}', 'counts': {}}
+            log(f'Checked release {entry["release"]} ({entry["type"]}) {rows[futures[future]]["error"]}'.rstrip())
+
+    rows = [rows[number] for number in range(len(entries))]
+
+    # the counts of the checks, in the order of poly_checks and pt_checks
+    names_run = [check['name'] for checks, fields in CHECKS.values() for check in checks]
+    counted = set(name for row in rows for name in row['counts'])
+    names_run = [name for name in dict.fromkeys(names_run) if name in counted]
+
+    series_df = pd.DataFrame([dict({column: row[column] for column in SERIES_COLUMNS}, **row['counts']) for row in rows],
+                             columns=SERIES_COLUMNS + names_run)
+    series_df[['rows'] + names_run] = series_df[['rows'] + names_run].astype('Int64')
+
+    return series_df
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,109 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to parse WDPA fields into typed columns                    ####
+###################################################################################
+
+'''
+Some WDPA fields hold numbers, but can be imported as text, e.g. STATUS_YR.
+Instead of comparing them as strings, they are parsed once per table into
+a typed column:
+
+- integer -- a nullable integer column (pandas 'Int64'), e.g. years
+- number --  a float column
+
+together with a boolean column of the values that could not be parsed, so
+that parse failures can be reported separately from e.g. out-of-range values.
+The typed columns are shared by all checks run on the same DataFrame.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import numpy as np
+import pandas as pd
+from wdpa.context import table_context
+
+# Fields parsed into typed columns when a table is imported, and their type
+TYPED_FIELDS = {'STATUS_YR': 'integer',
+                'YEAR': 'integer',
+                'UPDATE_YR': 'integer'}
+
+#########################
+#### 1. Parse values ####
+#########################
+
+def parse_number(values):
+    '''
+    Return values parsed as floats, and a boolean Series that is True
+    where a value is present but is not a number.
+
+    ## Example ##
+    parse_number(pd.Series(['1.5', 'abc', None]))
+    '''
+
+    values = pd.Series(values)
+    numbers = pd.to_numeric(values, errors='coerce').astype(float)
+    parse_error = numbers.isna() & values.notna()
+
+    return numbers, parse_error
+
+def parse_integer(values):
+    '''
+    Return values parsed as a nullable integer column, and a boolean Series
+    that is True where a value is present but is not an integer, e.g. 'abc' or '1990.5'.
+
+    ## Example ##
+    parse_integer(pd.Series(['1990', '0', 'abc', None]))
+    '''
+
+    numbers, parse_error = parse_number(values)
+
+    not_integer = numbers.notna() & (np.floor(numbers) != numbers)
+    parse_error = parse_error | not_integer
+
+    return numbers.where(~not_integer).round().astype('Int64'), parse_error
+
+PARSERS = {'integer': parse_integer,
+           'number': parse_number}
+
+##########################
+#### 2. Typed columns ####
+##########################
+
+def typed_column(wdpa_df, field, kind=None):
+    '''
+    Return the typed column of field, and the boolean Series of its parse failures.
+    The column is parsed on first use (or when the table is imported, see
+    parse_typed_columns) and shared by all checks run on wdpa_df.
+
+    ## Arguments ##
+    field -- string of the field to parse
+    kind --  'integer' or 'number'; leave None to use the type in TYPED_FIELDS
+
+    ## Example ##
+    status_yr, parse_error = typed_column(wdpa_df, 'STATUS_YR')
+    '''
+
+    kind = kind or TYPED_FIELDS.get(field, 'number')
+    typed = table_context(wdpa_df).setdefault('typed', dict())
+
+    if (field, kind) not in typed:
+        typed[(field, kind)] = PARSERS[kind](wdpa_df[field])
+
+    return typed[(field, kind)]
+
+def parse_typed_columns(wdpa_df):
+    '''
+    Parse all TYPED_FIELDS present in wdpa_df, e.g. when the table is imported.
+    '''
+
+    for field in TYPED_FIELDS:
+        if field in wdpa_df.columns:
+            typed_column(wdpa_df, field)
+
+    return wdpa_df
+
+#######################
+#### END OF SCRIPT ####
+#######################
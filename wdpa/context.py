@@ -0,0 +1,46 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script holding data shared by the checks run on the same table    ####
+###################################################################################
+
+'''
+Several checks need the same derived data of the WDPA table they are run on,
+e.g. the secondary indexes on WDPAID and WDPA_PID. Instead of adding columns
+to the DataFrame, this data is kept in a context that belongs to the DataFrame
+object, and is released when the DataFrame is garbage collected.
+
+Derived data assumes that the rows of the DataFrame are not modified in place
+after it has been computed. Subsets and copies of a DataFrame get their own context.
+'''
+
+import weakref
+
+_contexts = dict()
+
+def table_context(wdpa_df):
+    '''
+    Return the dictionary holding the data shared by the checks run on wdpa_df.
+
+    ## Example ##
+    table_context(wdpa_df)['index']
+    '''
+
+    key = id(wdpa_df)
+    context = _contexts.get(key)
+
+    if context is None:
+        context = _contexts.setdefault(key, dict())
+        weakref.finalize(wdpa_df, _contexts.pop, key, None) # release with the DataFrame
+
+    return context
+
+def clear_context(wdpa_df):
+    '''
+    Remove all data shared by the checks run on wdpa_df, e.g. after its rows changed.
+    '''
+
+    _contexts.pop(id(wdpa_df), None)
+
+#######################
+#### END OF SCRIPT ####
+#######################
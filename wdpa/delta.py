@@ -0,0 +1,264 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to check a submission against the global WDPA             ####
+###################################################################################
+
+'''
+A new submission has to be consistent with itself and with the global WDPA:
+its WDPA_PIDs must not be in use already, records with the same WDPAID must
+have the same NAME, DESIG, ... in the submission and in the global WDPA, and
+its METADATAIDs must not be in use by other protected areas.
+
+Instead of adding the submission to the global table and running the checks on
+the whole table again, the global table is summarised once in a GlobalIndex:
+
+- keys --  WDPAID, WDPA_PID and METADATAID of each global record
+- fields - the distinct (WDPAID, value, METADATAID) of each field checked
+           by the inconsistent_*_same_wdpaid checks
+
+each with a KeyIndex (see wdpa.index) on its key. The delta checks look up the
+submission's WDPA_PIDs, WDPAIDs and METADATAIDs in the GlobalIndex, so they
+only read the submission rows and the matching global records.
+
+The GlobalIndex is cached next to the snapshots (see wdpa.snapshot) and is built
+again when the global table is modified, or when GLOBAL_FIELDS or the layout of
+the GlobalIndex (GLOBAL_INDEX_VERSION) changed since it was cached.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from wdpa.index import KeyIndex
+from wdpa.snapshot import snapshot_paths, _source_mtime
+from wdpa.qa import poly_checks, find_wdpa_positions, arcgis_table_to_df
+from wdpa.results import CheckResults
+
+# Fields of the inconsistent_*_same_wdpaid checks, e.g. 'ivd_dif_desig_same_id': 'DESIG'
+INCONSISTENT_FIELDS = {check['name']: [field for field in check['fields'] if field != 'WDPAID'][0]
+                       for check in poly_checks if check['name'].endswith('_same_id')}
+
+# Fields to read from the global table to build the GlobalIndex
+GLOBAL_FIELDS = ['WDPAID', 'WDPA_PID', 'METADATAID'] + \
+                [field for field in dict.fromkeys(INCONSISTENT_FIELDS.values())
+                 if field not in ('WDPAID', 'WDPA_PID', 'METADATAID')]
+
+# Version of the layout of GlobalIndex: increase it when the layout changes,
+# so that cached indexes are built again
+GLOBAL_INDEX_VERSION = 1
+
+#########################
+#### 1. Global index ####
+#########################
+
+class GlobalIndex(object):
+    '''
+    Key and attribute index of the global WDPA, see the top of this script.
+
+    ## Example ##
+    global_index = GlobalIndex.build(global_df)
+    global_index.rows('keys', 'WDPA_PID', ['555555_A'])
+    '''
+
+    def __init__(self, tables, indexes):
+        self.tables = tables
+        self.indexes = indexes
+
+    @classmethod
+    def build(cls, global_df):
+        '''
+        Build the GlobalIndex of global_df, which holds at least the GLOBAL_FIELDS present in it.
+        '''
+
+        tables = {'keys': global_df[['WDPAID', 'WDPA_PID', 'METADATAID']].reset_index(drop=True)}
+        indexes = {'keys': {field: KeyIndex.build(tables['keys'][field].values)
+                            for field in ['WDPA_PID', 'METADATAID']}}
+
+        for field in set(INCONSISTENT_FIELDS.values()):
+            # the same value on several rows of a WDPAID only has to be kept once
+            table = global_df[list(dict.fromkeys(['WDPAID', field, 'METADATAID']))].drop_duplicates().reset_index(drop=True)
+            tables[field] = table
+            indexes[field] = {'WDPAID': KeyIndex.build(table['WDPAID'].values)}
+
+        return cls(tables, indexes)
+
+    def rows(self, table, field, keys, replaced_metadataid=()):
+        '''
+        Return the rows of the table ('keys' or a field) where field holds any of keys,
+        except the rows with a METADATAID in replaced_metadataid.
+        '''
+
+        rows = self.tables[table].iloc[self.indexes[table][field].rows(keys)]
+
+        if len(replaced_metadataid):
+            rows = rows[~rows['METADATAID'].isin(replaced_metadataid)]
+
+        return rows
+
+def global_index_settings():
+    '''
+    Return the settings a cached GlobalIndex was built with: the version of its
+    layout and the fields read from the global table.
+    '''
+
+    return (GLOBAL_INDEX_VERSION, list(GLOBAL_FIELDS))
+
+def save_global_index(global_index, path):
+    '''
+    Cache global_index at path, with the settings it was built with.
+    '''
+
+    with open(path, 'wb') as f:
+        pickle.dump((global_index_settings(), global_index), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def read_global_index(path):
+    '''
+    Return the GlobalIndex cached at path, or None if it does not exist, or was
+    built with other settings (see global_index_settings) or by an older version.
+    '''
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception: # e.g. a cached class that no longer exists
+        return None
+
+    if not isinstance(cached, tuple) or len(cached) != 2 or cached[0] != global_index_settings():
+        return None
+
+    return cached[1]
+
+def load_global_index(in_fc, cache_dir, log=print):
+    '''
+    Return the GlobalIndex of the global table in_fc, from the cache if it is
+    up to date, else read from in_fc and cached.
+
+    ## Example ##
+    load_global_index(in_fc='WDPA_Jun2019_Public.gdb/WDPA_poly_Jun2019',
+                      cache_dir='C:/Users/paintern/Desktop/cache')
+    '''
+
+    path = snapshot_paths(in_fc, cache_dir)[0][:-len('.pkl')] + '.delta.pkl'
+
+    if os.path.exists(path) and os.path.getmtime(path) >= _source_mtime(in_fc):
+        global_index = read_global_index(path)
+        if global_index is not None:
+            return global_index
+
+    log('Building the index of the global table')
+    global_index = GlobalIndex.build(arcgis_table_to_df(in_fc, GLOBAL_FIELDS))
+
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    save_global_index(global_index, path)
+
+    return global_index
+
+#########################
+#### 2. Delta checks ####
+#########################
+
+def delta_duplicate_wdpa_pid(wdpa_df, global_index, replaced_metadataid=(), return_pid=False):
+    '''
+    Return True if a WDPA_PID of the submission is duplicate in the submission, or
+    is already present in the global WDPA
+    Return list of these WDPA_PIDs, if return_pid is set True
+    '''
+
+    ids = wdpa_df['WDPA_PID']
+    in_global = global_index.rows('keys', 'WDPA_PID', ids.dropna().unique(), replaced_metadataid)
+    invalid_wdpa_pid = pd.unique(np.concatenate((ids[ids.duplicated()].values,
+                                                 ids[ids.isin(in_global['WDPA_PID'])].values)))
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+def delta_inconsistent_fields_same_wdpaid(wdpa_df, global_index, check_field, replaced_metadataid=(), return_pid=False):
+    '''
+    Factory Function: as inconsistent_fields_same_wdpaid, on the union of the submission
+    and the global WDPA, for the WDPAIDs of the submission only.
+
+    Return True if the rows of a WDPAID in the submission and the global WDPA
+    have different values for check_field
+    Return list of WDPA_PIDs of the submission where inconsistencies occur, if
+    return_pid is set True
+    '''
+
+    wdpaid = wdpa_df['WDPAID'].dropna().unique()
+    in_global = global_index.rows(check_field, 'WDPAID', wdpaid, replaced_metadataid)
+
+    values = pd.concat([wdpa_df[['WDPAID', check_field]], in_global[['WDPAID', check_field]]])
+    wdpaid_groups = values.groupby('WDPAID')[check_field].nunique()
+    invalid_wdpa_pid = wdpa_df[wdpa_df['WDPAID'].isin(wdpaid_groups[wdpaid_groups > 1].index)]['WDPA_PID'].values
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+def delta_metadataid_in_use(wdpa_df, global_index, replaced_metadataid=(), return_pid=False):
+    '''
+    Return True if a METADATAID of the submission is already used in the global WDPA
+    by protected areas (WDPAIDs) that are not in the submission
+    Return list of WDPA_PIDs of the submission with these METADATAIDs, if return_pid is set True
+    '''
+
+    in_global = global_index.rows('keys', 'METADATAID', wdpa_df['METADATAID'].dropna().unique(), replaced_metadataid)
+    in_use = in_global[~in_global['WDPAID'].isin(wdpa_df['WDPAID'])]['METADATAID']
+    invalid_wdpa_pid = wdpa_df[wdpa_df['METADATAID'].isin(in_use)]['WDPA_PID'].values
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+def _delta_inconsistent(check_field):
+    def check(wdpa_df, global_index, replaced_metadataid=(), return_pid=False):
+        return delta_inconsistent_fields_same_wdpaid(wdpa_df, global_index, check_field, replaced_metadataid, return_pid)
+    return check
+
+# Delta checks, named as the checks they extend to the global WDPA
+delta_checks = [{'name': 'duplicate_wdpa_pid', 'func': delta_duplicate_wdpa_pid, 'fields': ['WDPA_PID']}] + \
+               [{'name': name, 'func': _delta_inconsistent(field), 'fields': ['WDPAID', field]}
+                for name, field in INCONSISTENT_FIELDS.items()] + \
+               [{'name': 'check_metadataid_in_use', 'func': delta_metadataid_in_use, 'fields': ['WDPAID', 'METADATAID']}]
+
+def run_delta_checks(wdpa_df, global_index, checks=delta_checks, replaced_metadataid=(), log=print):
+    '''
+    Run the delta checks on the submission wdpa_df against global_index, and return
+    a dictionary with the names of the checks that failed as keys, and the DataFrame
+    of the offending submission rows as values.
+
+    ## Arguments ##
+    wdpa_df --             the submission, as a wdpa DataFrame
+    global_index --        GlobalIndex of the global WDPA, see load_global_index
+    replaced_metadataid -- METADATAIDs whose global records are replaced by the submission;
+                           these records are left out of the comparison
+
+    ## Example ##
+    run_delta_checks(submission_df, load_global_index(input_global, cache_dir),
+                     replaced_metadataid=[1234])
+    '''
+
+    result = CheckResults(wdpa_df)
+
+    for check in checks:
+        log('Running:' + check['name'])
+        wdpa_pid = check['func'](wdpa_df, global_index, replaced_metadataid, True)
+        if len(wdpa_pid) > 0:
+            result.add(check['name'], find_wdpa_positions(wdpa_df, wdpa_pid))
+
+    return result
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -67,60 +67,100 @@ def output_errors_to_excel(result, outpath, checks, datatype):
                            datatype='poly'])
     '''
         
-    # Function to find the row of the function_name
-    # Required to add a hyperlink of the tab to the 
-    # corresponding function_name cell
-    def find_row(function_name):
-        for row in wb['Summary'].iter_rows(min_row=1, max_row=wb['Summary'].max_row, max_col=1):
-            for cell in row: # iterate through the cells in rows 1 through the end
-                if cell.value == function_name: # select the correct cell
-                    return (wb['Summary'].cell(row=cell.row, column=1).row) # return cell's row number
-    
-    # Set variables - to later add the current day to the filename
+    wb = new_workbook()
+
+    # If the function's name - in the functions_list - is present in the
+    # result dictionary, add DataFrame to a new sheet. The DataFrames are
+    # obtained one at a time, see wdpa.results
+    counts = dict()
+    for function_name in [each['name'] for each in checks]:
+        if function_name in result:
+            errors = result[function_name]
+            write_error_sheet(wb, function_name, errors)
+            counts[function_name] = len(errors)
+
+    write_summary(wb, checks, counts)
+
+    # Save the workbook
+    wb.save(excel_output_path(outpath, datatype))
+    return
+
+def excel_output_path(outpath, datatype):
+    '''
+    Return the path of the Excel file: the current day and datatype are added to the filename.
+    '''
+
     filename = f'{datetime.datetime.now().strftime("%d%b%Y")}_WDPA_QA_checks_{datatype}.xlsx'
-    output = outpath + os.sep + filename
-    
+    return outpath + os.sep + filename
+
+def new_workbook():
+    '''
+    Return a new Excel workbook with an empty Summary sheet.
+    '''
+
     # Create the Excel workbook and the Summary sheet
     wb = Workbook()
     wb['Sheet'].title = 'Summary' # change default sheet's title
     wb["Summary"].append(["CHECK","RESULT", "COUNT"]) # add header for Summary sheet
 
-    # If the function's name - in the functions_list - is present in the 
-    # result dictionary, add DataFrame to a new sheet
+    return wb
+
+def write_error_sheet(wb, function_name, errors):
+    '''
+    Add a sheet function_name to wb with the rows of the DataFrame errors.
+    Sheets can be added in any order, e.g. as checks finish; write_summary
+    puts them in the order of the checks.
+
+    ## Example ##
+    write_error_sheet(wb, 'ivd_iucn_cat', result['ivd_iucn_cat'])
+    '''
+
+    ws = wb.create_sheet(function_name)
+    # export DataFrame rows to Excel
+    for row in dataframe_to_rows(errors, index=False):
+        ws.append(row)
+    # Add a hyperlink to each sheet, to return to the Summary with a single click
+    ws.insert_cols(1) # insert column at first position
+    ws.cell(row=1, column=1).value = 'To Summary'
+    ws.cell(row=1, column=1).hyperlink = (f'#Summary!A1')
+    ws.cell(row=1, column=1).style = 'Hyperlink'
+    ws.column_dimensions['A'].width = 14 # adjust width of column A
+    ws.freeze_panes = 'B2'
+    # red tab for failed checks, orange for checks to be checked
+    ws.sheet_properties.tabColor = RED if function_name.startswith('ivd') else ORANGE
+
+def write_summary(wb, checks, counts):
+    '''
+    Fill the Summary sheet of wb: 'Fail' or 'Check' and the number of offending rows
+    for the checks in counts, 'Pass' for the other checks.
+
+    ## Arguments ##
+    checks -- a list of all checks run, e.g. poly_checks
+    counts -- a dictionary with the names of the checks that failed as keys,
+              and the number of offending rows as values
+    '''
+
     function_names = [each['name'] for each in checks] # make a list of all checks' names
 
     for function_name in function_names:
-        if function_name in result:
-            ws = wb.create_sheet(function_name)
-        # export DataFrame rows to Excel
-            for row in dataframe_to_rows(result[function_name], index=False): 
-                ws.append(row)
-        # Add a hyperlink to each sheet, to return to the Summary with a single click
-            ws.insert_cols(1) # insert column at first position
-            ws.cell(row=1, column=1).value = 'To Summary'
-            ws.cell(row=1, column=1).hyperlink = (f'#Summary!A1')
-            ws.cell(row=1, column=1).style = 'Hyperlink'
-            ws.column_dimensions['A'].width = 14 # adjust width of column A
-            ws.freeze_panes = 'B2'
-        # add 'Check' or 'Fail' to Summary sheet
-            if function_name.startswith('ivd'):
-                wb['Summary'].append([function_name,'Fail', len(result[function_name])])
-                ws.sheet_properties.tabColor = RED # fail tab
-                link = f'#{function_name}!A1' # as above
-                wb['Summary'].cell(row=find_row(function_name), column=1).hyperlink = link
-                wb['Summary'].cell(row=find_row(function_name), column=1).style = 'Hyperlink'
-            else:
-                wb['Summary'].append([function_name,'Check', len(result[function_name])])
-                ws.sheet_properties.tabColor = ORANGE # check tab
-                link = f'#{function_name}!A1' # create link to cell A1 of function_name tab
-                # add link to the function_name of the Summary sheet, with hyperlink style
-                wb['Summary'].cell(row=find_row(function_name), column=1).hyperlink = link 
-                wb['Summary'].cell(row=find_row(function_name), column=1).style = 'Hyperlink'
- 
+        if function_name in counts:
+            # add 'Fail' or 'Check' to Summary sheet
+            summary_result = 'Fail' if function_name.startswith('ivd') else 'Check'
+            wb['Summary'].append([function_name, summary_result, counts[function_name]])
+            # add link to cell A1 of the function_name tab, with hyperlink style
+            link = f'#{function_name}!A1'
+            wb['Summary'].cell(row=wb['Summary'].max_row, column=1).hyperlink = link
+            wb['Summary'].cell(row=wb['Summary'].max_row, column=1).style = 'Hyperlink'
+
         # add 'Pass' to Summary sheet as no rows with invalid WDPA_PIDs are present
         else:
             wb['Summary'].append([function_name,'Pass'])
 
+    # put the sheets in the order of the checks
+    order = ['Summary'] + [name for name in function_names if name in counts]
+    for position, name in enumerate(order):
+        wb.move_sheet(name, offset=position - wb.sheetnames.index(name))
+
     # Conditional formatting - different colours for Check, Fail, and Pass
     def add_conditional_formatting(colour, summary_result, sheetname):
         '''
@@ -154,9 +194,164 @@ def output_errors_to_excel(result, outpath, checks, datatype):
     wb['Summary'].column_dimensions['A'].width = 31 # adjust column A's width
     wb['Summary'].freeze_panes = 'A2' # freeze header
 
-    # Save the workbook
-    wb.save(output)
-    return
+###################################################
+#### Function: output the error matrix to file ####
+###################################################
+
+MATRIX_FORMATS = ('xlsx', 'parquet')
+
+def check_matrix_formats(formats):
+    '''
+    Raise a ValueError if formats holds a format output_error_matrix cannot write,
+    e.g. before the checks are run.
+    '''
+
+    unknown = set(formats) - set(MATRIX_FORMATS)
+    if unknown:
+        raise ValueError(f'ERROR: unknown error matrix format(s): {", ".join(sorted(unknown))}')
+
+def output_error_matrix(result, outpath, checks, datatype, formats=('xlsx',)):
+    '''
+    Write the error matrix (see wdpa.results.error_matrix) - one row per offending
+    WDPA_PID and one column per check - to one file per format, next to the Excel
+    output of output_errors_to_excel.
+
+    ## Arguments ##
+    result --   CheckResults, e.g. returned by run_checks or run_pipeline
+    outpath --  the output directory where the files are to be saved
+    checks --   a list of the checks run, e.g. poly_checks
+    datatype -- a string specifying the input type: e.g. point or poly
+    formats --  'xlsx' and/or 'parquet'. Parquet requires pyarrow or fastparquet.
+
+    ## Example ##
+    output_error_matrix(result=result,
+                        outpath='C:\\Users\\paintern\\Desktop\\Stijn\\3. Data\\Test data',
+                        checks=poly_checks,
+                        datatype='poly',
+                        formats=['xlsx', 'parquet'])
+    '''
+
+    check_matrix_formats(formats)
+
+    # imported here, so that exporting to Excel does not load pandas and numpy
+    from wdpa.results import error_matrix
+
+    matrix_df = error_matrix(result, checks)
+    filename = f'{datetime.datetime.now().strftime("%d%b%Y")}_WDPA_QA_error_matrix_{datatype}'
+
+    if 'parquet' in formats:
+        matrix_df.to_parquet(outpath + os.sep + filename + '.parquet', index=False)
+
+    if 'xlsx' in formats:
+        # a single sheet without formatting, written row by row
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Errors')
+        for row in dataframe_to_rows(matrix_df, index=False):
+            ws.append(row)
+        wb.save(outpath + os.sep + filename + '.xlsx')
+
+##################################################################
+#### Function: output the threshold sweep (sensitivity table) ####
+##################################################################
+
+def output_sweep_to_excel(sweep_df, outpath):
+    '''
+    Write the sensitivity table of the statistical area checks (see wdpa.sweep) to
+    Excel: one sheet with all rows, and one sheet per check with the number of
+    flagged rows for each sigma (rows) and floor in km² (columns).
+
+    ## Arguments ##
+    sweep_df -- DataFrame returned by AreaSweep.table
+    outpath --  the output directory where the Excel file is to be saved
+
+    ## Example ##
+    output_sweep_to_excel(AreaSweep(poly_df).table(), outpath='C:\\Users\\paintern\\Desktop')
+    '''
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Sweep'
+    for row in dataframe_to_rows(sweep_df, index=False):
+        ws.append(row)
+
+    for name, check_df in sweep_df.groupby('check', sort=False):
+        grid = check_df.pivot(index='sigma', columns='floor_km2', values='flagged')
+        ws = wb.create_sheet(name[:31]) # Excel sheet names have at most 31 characters
+        ws.append(['sigma \\ floor_km2'] + list(grid.columns))
+        for sigma, counts in grid.iterrows():
+            ws.append([sigma] + list(counts))
+
+    wb.save(outpath + os.sep + f'{datetime.datetime.now().strftime("%d%b%Y")}_WDPA_QA_area_sweep.xlsx')
+
+##################################################
+#### Function: output the diff of two QA runs ####
+##################################################
+
+def output_diff_to_excel(summary_df, changes, outpath, datatype):
+    '''
+    Write the comparison of two QA runs (see wdpa.history.diff_runs) to Excel: a
+    Summary sheet with the number of newly flagged, resolved and persisting rows
+    of each check, and one sheet per check with its newly flagged and resolved rows.
+
+    ## Arguments ##
+    summary_df -- DataFrame of the counts of each check, returned by diff_runs
+    changes --    dictionary of the newly flagged and resolved rows, returned by diff_runs
+    outpath --    the output directory where the Excel file is to be saved
+    datatype --   a string specifying the input type: e.g. point or poly
+
+    ## Example ##
+    output_diff_to_excel(*diff_runs(load_run(old_path), load_run(new_path)),
+                         outpath='C:\\Users\\paintern\\Desktop', datatype='poly')
+    '''
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Summary'
+    for row in dataframe_to_rows(summary_df.astype(object).where(summary_df.notna(), None), index=False):
+        ws.append(row)
+    ws.freeze_panes = 'A2'
+
+    for name in summary_df['check']:
+        if name in changes:
+            ws = wb.create_sheet(name[:31]) # Excel sheet names have at most 31 characters
+            for row in dataframe_to_rows(changes[name], index=False):
+                ws.append(row)
+            ws.freeze_panes = 'A2'
+
+    wb.save(outpath + os.sep + f'{datetime.datetime.now().strftime("%d%b%Y")}_WDPA_QA_diff_{datatype}.xlsx')
+
+##########################################################
+#### Function: output the time series of the releases ####
+##########################################################
+
+def output_batch_to_excel(series_df, outpath):
+    '''
+    Write the number of rows flagged by each check in each release (see
+    wdpa.batch.run_batch) to Excel: one sheet per type of release, with a row per
+    release and a column per check.
+
+    ## Arguments ##
+    series_df -- DataFrame returned by run_batch
+    outpath --   the output directory where the Excel file is to be saved
+
+    ## Example ##
+    output_batch_to_excel(run_batch('D:/archive/manifest.csv'), outpath='C:\\Users\\paintern\\Desktop')
+    '''
+
+    wb = Workbook()
+    wb.remove(wb.active)
+
+    for datatype, type_df in series_df.groupby('type', sort=False):
+        type_df = type_df.dropna(axis=1, how='all').astype(object)
+        ws = wb.create_sheet(datatype)
+        for row in dataframe_to_rows(type_df.where(type_df.notna(), None), index=False):
+            ws.append(row)
+        ws.freeze_panes = 'B2'
+
+    if not wb.sheetnames:
+        wb.create_sheet('Releases')
+
+    wb.save(outpath + os.sep + f'{datetime.datetime.now().strftime("%d%b%Y")}_WDPA_QA_releases.xlsx')
 
 #######################
 #### END OF SCRIPT ####
@@ -0,0 +1,334 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to run the grouped checks out of core                      ####
+###################################################################################
+
+'''
+The inconsistent_*_same_wdpaid checks and duplicate_wdpa_pid compare the rows of
+a group (the same WDPAID, or the same WDPA_PID) with each other. Run on the whole
+table, they need all its rows in memory at once. To run them on tables larger
+than memory, e.g. archives of several WDPA releases, read in chunks (see
+qa.read_table_chunks), GroupedChecks sorts the groups out of core:
+
+- for each row of a chunk, a record is kept with the hash of its group field,
+  its position in the table, the hash of its WDPA_PID and the hash of each
+  field compared in the group
+- when run_size records are kept, they are sorted on the group hash and written
+  to a run file in spill_dir
+- after the last chunk, the sorted run files are merged (k-way merge), reading
+  block_size records of each at a time, into blocks holding whole groups
+- the groups of each merged block are checked: a WDPAID with more than one
+  distinct value of a field, or a WDPA_PID on more than one row
+
+Memory is bounded by run_size records while reading, and by block_size records
+per run file while merging. With keep_rows, the chunks are also written to
+spill_dir, and rows() reads back the rows with the WDPA_PIDs of the flagged rows,
+one chunk at a time, so that the table is not kept in memory to output them. Values are compared by their 64-bit hash, so that
+different values are taken as equal with a probability of about 2**-64.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from wdpa.qa import poly_checks
+
+# Checks that can be run out of core: name: (field of the group, field compared in the group),
+# e.g. 'dif_name_same_id': ('WDPAID', 'NAME'). duplicate_wdpa_pid compares the number of rows
+GROUPED_CHECKS = dict({'duplicate_wdpa_pid': ('WDPA_PID', None)},
+                      **{check['name']: ('WDPAID', [field for field in check['fields'] if field != 'WDPAID'][0])
+                         for check in poly_checks if check['name'].endswith('_same_id')})
+
+# Number of records sorted in memory before they are written to a run file
+RUN_SIZE = 1000000
+
+# Number of records read from each run file at a time while merging
+BLOCK_SIZE = 65536
+
+# Hash of missing values, which are not compared (as in DataFrame.nunique)
+_MISSING = np.uint64(0)
+
+###################################
+#### 1. Sorted records on disk ####
+###################################
+
+def hash_values(values):
+    '''
+    Return the 64-bit hash of each of values (a Series), with _MISSING for NaN.
+    '''
+
+    hashes = np.array(pd.util.hash_pandas_object(values, index=False).values, dtype=np.uint64)
+    hashes[hashes == _MISSING] = 1 # e.g. the hash of 0
+    hashes[values.isna().values] = _MISSING
+
+    return hashes
+
+class ExternalSorter(object):
+    '''
+    Sort records (a numpy structured array with a field 'key') that may not fit in
+    memory: records are sorted in runs of run_size and written to spill_dir, and
+    merge() yields them in order of key, in blocks holding all records of each key.
+
+    ## Example ##
+    sorter = ExternalSorter(spill_dir)
+    sorter.add(records)
+    for block in sorter.merge():
+        ...
+    '''
+
+    def __init__(self, spill_dir, run_size=RUN_SIZE, block_size=BLOCK_SIZE):
+        self.spill_dir = spill_dir
+        self.run_size = run_size
+        self.block_size = block_size
+        self.buffer = []
+        self.buffered = 0
+        self.paths = []
+
+    def add(self, records):
+        self.buffer.append(records)
+        self.buffered += len(records)
+        if self.buffered >= self.run_size:
+            self.spill()
+
+    def spill(self):
+        '''
+        Sort the records in memory and write them to a new run file.
+        '''
+
+        if not self.buffered:
+            return
+
+        records = np.concatenate(self.buffer)
+        records = records[np.argsort(records['key'], kind='stable')]
+        path = os.path.join(self.spill_dir, f'run_{len(self.paths)}.npy')
+        np.save(path, records)
+
+        self.paths.append(path)
+        self.buffer = []
+        self.buffered = 0
+
+    def merge(self):
+        '''
+        Yield all records added, sorted on key, in blocks holding all records of
+        each of their keys.
+        '''
+
+        self.spill()
+        if not self.paths:
+            return
+
+        runs = [np.load(path, mmap_mode='r') for path in self.paths]
+        read = [0] * len(runs)
+        buffers = [run[:0] for run in runs]
+
+        def read_block(i):
+            block = np.array(runs[i][read[i]:read[i] + self.block_size])
+            read[i] += len(block)
+            buffers[i] = np.concatenate([buffers[i], block])
+
+        while True:
+            for i in range(len(runs)):
+                if read[i] < len(runs[i]) and len(buffers[i]) < self.block_size:
+                    read_block(i)
+
+            # runs with records left to read: the records of the smallest key read last
+            # of these may continue in the run, all smaller keys have been read
+            open_runs = [i for i in range(len(runs)) if read[i] < len(runs[i])]
+            if not open_runs:
+                merged = np.concatenate(buffers)
+                if len(merged):
+                    yield merged[np.argsort(merged['key'], kind='stable')]
+                return
+
+            bound = min(buffers[i]['key'][-1] for i in open_runs)
+            ends = [np.searchsorted(buffer['key'], bound, side='left') for buffer in buffers]
+
+            if not sum(ends):
+                # a key holding more records than the buffers: read more of it
+                for i in open_runs:
+                    if buffers[i]['key'][-1] == bound:
+                        read_block(i)
+                continue
+
+            merged = np.concatenate([buffer[:end] for buffer, end in zip(buffers, ends)])
+            buffers = [buffer[end:] for buffer, end in zip(buffers, ends)]
+            yield merged[np.argsort(merged['key'], kind='stable')]
+
+###########################
+#### 2. Grouped checks ####
+###########################
+
+def grouped_rows(key, values=None):
+    '''
+    Return the positions (in key) of the rows of the groups to flag: the groups
+    with more than one distinct value (not _MISSING), or with more than one row
+    if values is None. Rows without a group (key _MISSING) are only flagged if
+    values is None, as duplicate_wdpa_pid does.
+
+    ## Arguments ##
+    key --    sorted array of the group of each row
+    values -- array of the hash of the value of each row, or None
+    '''
+
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=np.int64)
+    group = np.cumsum(np.r_[False, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=np.int64)
+
+    if values is None:
+        flagged = np.diff(np.r_[starts, len(key)]) > 1
+    else:
+        # the distinct values of each group: the first row of each (group, value)
+        order = np.lexsort((values, group))
+        sorted_group, sorted_values = group[order], values[order]
+        first = np.r_[True, (sorted_group[1:] != sorted_group[:-1]) | (sorted_values[1:] != sorted_values[:-1])]
+        distinct = np.bincount(sorted_group[first & (sorted_values != _MISSING)], minlength=len(starts))
+        flagged = (distinct > 1) & (key[starts] != _MISSING)
+
+    return np.flatnonzero(flagged[group])
+
+class GroupedChecks(object):
+    '''
+    Run the grouped checks (see GROUPED_CHECKS) on the chunks of a table, without
+    keeping the chunks in memory: add each chunk as it is read, and call positions()
+    (or rows(), with keep_rows) after the last chunk. The records are sorted in a
+    temporary directory in spill_dir.
+
+    ## Arguments ##
+    checks --    a list of checks, e.g. poly_checks; the checks not in GROUPED_CHECKS are ignored
+    spill_dir -- directory of the temporary run files, e.g. on a disk with space for the table
+    run_size --  number of records sorted in memory
+    block_size - number of records read from each run file while merging
+    keep_rows -- also write the chunks to spill_dir, to read the flagged rows back with rows()
+
+    ## Example ##
+    grouped = GroupedChecks(poly_checks, spill_dir='C:/Users/paintern/Desktop/spill')
+    for chunk in read_table_chunks(input_poly, INPUT_FIELDS_POLY):
+        grouped.add(chunk)
+    grouped.positions()
+    '''
+
+    def __init__(self, checks, spill_dir=None, run_size=RUN_SIZE, block_size=BLOCK_SIZE, keep_rows=False):
+        self.names = [check['name'] for check in checks if check['name'] in GROUPED_CHECKS]
+        self.directory = tempfile.mkdtemp(prefix='wdpa_', dir=spill_dir)
+        self.nrows = 0
+        self.keep_rows = keep_rows
+        self.chunks = [] # (path, position of the first row) of the chunks written, with keep_rows
+
+        # one sorter per group field, with a hash column per field compared
+        self.groups = dict()
+        for name in self.names:
+            group_field, check_field = GROUPED_CHECKS[name]
+            fields = self.groups.setdefault(group_field, [])
+            if check_field is not None and check_field not in fields:
+                fields.append(check_field)
+
+        self.sorters = dict()
+        for number, group_field in enumerate(self.groups):
+            directory = os.path.join(self.directory, str(number))
+            os.makedirs(directory)
+            self.sorters[group_field] = ExternalSorter(directory, run_size, block_size)
+
+    def add(self, chunk):
+        '''
+        Add the rows of chunk, the next rows of the table.
+        '''
+
+        wdpa_pid = hash_values(chunk['WDPA_PID'])
+        for group_field, fields in self.groups.items():
+            dtype = [('key', np.uint64), ('position', np.int64), ('wdpa_pid', np.uint64)] + \
+                    [(field, np.uint64) for field in fields]
+            records = np.empty(len(chunk), dtype=dtype)
+            records['key'] = wdpa_pid if group_field == 'WDPA_PID' else hash_values(chunk[group_field])
+            records['position'] = np.arange(self.nrows, self.nrows + len(chunk))
+            records['wdpa_pid'] = wdpa_pid
+            for field in fields:
+                records[field] = hash_values(chunk[field])
+            self.sorters[group_field].add(records)
+
+        if self.keep_rows:
+            path = os.path.join(self.directory, f'chunk_{len(self.chunks)}.pkl')
+            chunk.to_pickle(path)
+            self.chunks.append((path, self.nrows))
+
+        self.nrows += len(chunk)
+
+    def _flagged(self):
+        '''
+        Return a dictionary with the name of each grouped check that failed as key,
+        and the records of the rows of the flagged groups as value.
+        '''
+
+        found = {name: [] for name in self.names}
+
+        for group_field, fields in self.groups.items():
+            names = [name for name in self.names if GROUPED_CHECKS[name][0] == group_field]
+            for block in self.sorters[group_field].merge():
+                for name in names:
+                    check_field = GROUPED_CHECKS[name][1]
+                    rows = grouped_rows(block['key'], None if check_field is None else block[check_field])
+                    if len(rows):
+                        found[name].append(block[['position', 'wdpa_pid']][rows])
+
+        return {name: np.concatenate(found[name]) for name in self.names if found[name]}
+
+    def positions(self):
+        '''
+        Return a dictionary with the name of each grouped check that failed as key, and
+        the sorted positions in the table of the rows of the flagged groups as value.
+        '''
+
+        try:
+            flagged = self._flagged()
+        finally:
+            self.close()
+
+        return {name: np.sort(records['position']) for name, records in flagged.items()}
+
+    def rows(self):
+        '''
+        Return the rows with the WDPA_PIDs of the rows of the flagged groups, as
+        run_checks returns them (see qa.find_wdpa_positions), read back from the
+        chunks written with keep_rows, as two values: a dictionary with the name of
+        each grouped check that failed as key and the sorted positions in the table
+        of its rows as value, and a DataFrame of the rows of all these positions.
+        '''
+
+        if not self.keep_rows:
+            raise ValueError('ERROR: the rows of the table are only kept with keep_rows')
+
+        try:
+            wdpa_pids = {name: np.unique(records['wdpa_pid']) for name, records in self._flagged().items()}
+            found = {name: [] for name in wdpa_pids}
+            rows = []
+
+            # one chunk at a time
+            for path, start in self.chunks:
+                chunk = pd.read_pickle(path)
+                wdpa_pid = hash_values(chunk['WDPA_PID'])
+                keep = np.zeros(len(chunk), dtype=bool)
+                for name in wdpa_pids:
+                    flagged = np.isin(wdpa_pid, wdpa_pids[name])
+                    found[name].append(np.flatnonzero(flagged) + start)
+                    keep |= flagged
+                if keep.any():
+                    rows.append(chunk.iloc[np.flatnonzero(keep)])
+        finally:
+            self.close()
+
+        return {name: np.concatenate(found[name]) for name in wdpa_pids}, \
+               pd.concat(rows) if rows else pd.DataFrame()
+
+    def close(self):
+        '''
+        Remove the run files.
+        '''
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,214 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to share intermediate results between the QA checks       ####
+###################################################################################
+
+'''
+Many checks compute the same intermediate results, e.g. which rows have
+MARINE = 1 or 2, or which rows are Ramsar Sites or World Heritage Sites.
+These are registered here as named features, and the checks declare the
+features they use in poly_checks / pt_checks ('features').
+
+During a run (see wdpa.runner.run_checks), a FeatureCache computes each feature
+once, keeps it while checks that declared it still have to run, and frees it
+after the last of these checks. Features can depend on other features, which
+makes the checks and features a DAG. Outside a run, features are computed
+each time they are used.
+
+A FeatureCache belongs to the table and to the rule pack of the run (see
+wdpa.rules), so that runs with different rule packs on the same table do
+not share or free each other's features.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import threading
+from wdpa.context import table_context
+from wdpa.rules import active_rules
+
+# name: {'func': function computing the feature from wdpa_df, 'features': features it uses}
+FEATURES = dict()
+
+# (field, frozenset of values): name, for features that are 'field is in values'
+_ISIN_FEATURES = dict()
+
+##################################
+#### 1. Register the features ####
+##################################
+
+def register_feature(name, func, features=()):
+    '''
+    Register func as the feature name. func takes a wdpa DataFrame and returns
+    the intermediate result, e.g. a boolean Series. features lists the features
+    used by func, if any.
+
+    ## Example ##
+    register_feature('marine_gis_proportion',
+                     lambda wdpa_df: wdpa_df['GIS_M_AREA'] / wdpa_df['GIS_AREA'])
+    '''
+
+    FEATURES[name] = {'func': func, 'features': list(features)}
+
+def register_isin_feature(name, field, values):
+    '''
+    Register the feature name as wdpa_df[field].isin(values). The checks and factory
+    functions use field_isin, which shares this feature with all checks testing the
+    same field against the same values.
+
+    ## Example ##
+    register_isin_feature('marine12', 'MARINE', ['1', '2'])
+    '''
+
+    register_feature(name, lambda wdpa_df: _isin(wdpa_df, field, values))
+    _ISIN_FEATURES[(field, frozenset(values))] = name
+
+def _isin(wdpa_df, field, values):
+    # imported on first use, so that importing wdpa does not load pandas
+    from wdpa.memo import isin_distinct
+
+    return isin_distinct(wdpa_df, field, values)
+
+#############################
+#### 2. Use the features ####
+#############################
+
+def feature(wdpa_df, name):
+    '''
+    Return the feature name of wdpa_df, from the FeatureCache of the current run
+    if there is one.
+
+    ## Example ##
+    feature(wdpa_df, 'marine12')
+    '''
+
+    cache = table_context(wdpa_df).get(feature_cache_key())
+
+    if cache is None:
+        return FEATURES[name]['func'](wdpa_df)
+
+    return cache.get(wdpa_df, name)
+
+def field_isin(wdpa_df, field, values):
+    '''
+    Return wdpa_df[field].isin(values), shared with the other checks if it is
+    a registered feature. It is evaluated on the distinct values of field, see wdpa.memo.
+
+    ## Example ##
+    field_isin(wdpa_df, 'MARINE', ['1', '2'])
+    '''
+
+    name = _ISIN_FEATURES.get((field, frozenset(values)))
+
+    if name is None:
+        return _isin(wdpa_df, field, values)
+
+    return feature(wdpa_df, name)
+
+def feature_cache_key():
+    '''
+    Return the key of the FeatureCache of the current run in the table context:
+    one per rule pack.
+    '''
+
+    return ('features', active_rules().digest)
+
+def feature_closure(names):
+    '''
+    Return the features in names and all features these depend on.
+    '''
+
+    closure = set()
+    to_visit = list(names)
+
+    while to_visit:
+        name = to_visit.pop()
+        if name not in closure:
+            closure.add(name)
+            to_visit.extend(FEATURES[name]['features'])
+
+    return closure
+
+##################################
+#### 3. Features during a run ####
+##################################
+
+class FeatureCache(object):
+    '''
+    Memoise the features of one table during a run of checks. Each feature
+    is counted once for each check that needs it - directly, or through another
+    feature - and is freed after the last of these checks has run.
+
+    ## Example ##
+    cache = FeatureCache(checks)
+    table_context(wdpa_df)[feature_cache_key()] = cache
+    for check in checks:
+        check['func'](wdpa_df, True)
+        cache.release(check)
+    '''
+
+    def __init__(self, checks):
+        self.values = dict()
+        self.refcount = dict()
+        self.lock = threading.RLock()
+
+        for check in checks:
+            for name in feature_closure(check.get('features', [])):
+                self.refcount[name] = self.refcount.get(name, 0) + 1
+
+    def get(self, wdpa_df, name):
+        '''
+        Return the feature name of wdpa_df, computing it on first use.
+        '''
+
+        with self.lock:
+            if name not in self.values:
+                self.values[name] = FEATURES[name]['func'](wdpa_df)
+
+            return self.values[name]
+
+    def release(self, check):
+        '''
+        Free the features of check that no remaining check needs.
+        '''
+
+        with self.lock:
+            for name in feature_closure(check.get('features', [])):
+                self.refcount[name] -= 1
+                if self.refcount[name] <= 0:
+                    self.values.pop(name, None)
+
+def schedule_checks(checks):
+    '''
+    Return the checks in the order to run them: the checks are kept in their
+    order, except that checks sharing features are run one after the other,
+    so that the features are freed as soon as possible.
+
+    ## Example ##
+    schedule_checks(poly_checks)
+    '''
+
+    remaining = list(checks)
+    scheduled = []
+
+    while remaining:
+        check = remaining.pop(0)
+        scheduled.append(check)
+        shared = feature_closure(check.get('features', []))
+
+        # pull forward the checks that share features, also transitively
+        while shared:
+            sharing = [each for each in remaining if shared & feature_closure(each.get('features', []))]
+            if not sharing:
+                break
+            for each in sharing:
+                remaining.remove(each)
+                shared |= feature_closure(each.get('features', []))
+            scheduled.extend(sharing)
+
+    return scheduled
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,203 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to store the results of QA runs and compare them           ####
+###################################################################################
+
+'''
+The WDPA is checked every month. To see which errors are new, which were
+resolved and which persist since the last month, without opening two Excel
+workbooks, each run is stored as the sorted key values (e.g. WDPA_PID) flagged
+by each check that was run, in one compressed numpy file:
+
+    <store_dir>/<date>_WDPA_QA_run_<datatype>.npz
+
+A check that ran and passed is stored as an empty array, so that its errors
+of the previous run count as resolved. Two runs are compared check by check:
+as the arrays are sorted, the values of one run are found in the other by
+binary search (numpy.searchsorted), without building sets.
+
+    save_run(result, store_dir, poly_checks, 'poly')
+    diff_runs(load_run(old_path), load_run(new_path))
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import datetime
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Name of the array holding the description of the run
+_META = '__run__'
+
+# Fields identifying the rows of results without a 'key', in order of preference
+_KEYS = ['WDPA_PID', 'WDPAID', 'METADATAID']
+
+##########################
+#### 1. Store QA runs ####
+##########################
+
+def run_keys(result, check):
+    '''
+    Return the sorted distinct key values (e.g. WDPA_PIDs) flagged by check in result.
+
+    ## Arguments ##
+    result -- CheckResults, e.g. returned by run_checks, or a dictionary of
+              DataFrames, e.g. returned by run_integrity_checks
+    check --  the check, e.g. an element of poly_checks
+    '''
+
+    name = check['name']
+
+    if hasattr(result, 'positions'):
+        values = result.wdpa_df[check.get('key', 'WDPA_PID')].values
+        values = values[result.positions(name)] if name in result else values[:0]
+    elif name not in result:
+        values = np.array([], dtype=str)
+    else:
+        errors = result[name]
+        key = check.get('key', next((field for field in _KEYS if field in errors.columns), errors.columns[0]))
+        values = errors[key].values
+
+    values = np.asarray(values)
+    if values.dtype == object:
+        # stored without pickle
+        values = values.astype(str)
+
+    return np.unique(values)
+
+def run_path(store_dir, datatype, date=None):
+    '''
+    Return the path of the stored run of datatype on date (default: today).
+    '''
+
+    date = date or datetime.datetime.now()
+
+    return os.path.join(store_dir, f'{date.strftime("%Y%m%d")}_WDPA_QA_run_{datatype}.npz')
+
+def save_run(result, store_dir, checks, datatype):
+    '''
+    Store the key values flagged by each of the checks run, and return the path of the file.
+
+    ## Arguments ##
+    result --    CheckResults, e.g. returned by run_checks or run_pipeline
+    store_dir -- the directory where the runs are stored
+    checks --    a list of the checks run, e.g. poly_checks
+    datatype --  a string specifying the input type: e.g. point or poly
+
+    ## Example ##
+    save_run(result, store_dir='C:\\Users\\paintern\\Desktop\\runs', checks=poly_checks, datatype='poly')
+    '''
+
+    if not os.path.isdir(store_dir):
+        os.makedirs(store_dir)
+
+    path = run_path(store_dir, datatype)
+    names = [check['name'] for check in checks]
+    meta = json.dumps({'datatype': datatype,
+                       'date': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'checks': names})
+
+    arrays = {check['name']: run_keys(result, check) for check in checks}
+    np.savez_compressed(path, **{_META: np.array(meta)}, **arrays)
+
+    return path
+
+def run_info(path):
+    '''
+    Return the description of the stored run at path: its datatype, date and checks.
+
+    ## Example ##
+    run_info(path)['date']
+    '''
+
+    if not os.path.exists(path):
+        raise ValueError(f'ERROR: the QA run {path} does not exist')
+
+    with np.load(path, allow_pickle=False) as stored:
+        return json.loads(str(stored[_META]))
+
+def load_run(path):
+    '''
+    Return the stored run at path: a dictionary with the name of each check
+    run as key, and the sorted key values it flagged as value.
+    '''
+
+    names = run_info(path)['checks']
+
+    with np.load(path, allow_pickle=False) as stored:
+        return {name: stored[name] for name in names}
+
+############################
+#### 2. Compare QA runs ####
+############################
+
+def in_sorted(values, sorted_values):
+    '''
+    Return a boolean array: True for each of values that is in the sorted array sorted_values.
+    '''
+
+    if len(sorted_values) == 0 or len(values) == 0:
+        return np.zeros(len(values), dtype=bool)
+
+    position = np.searchsorted(sorted_values, values)
+    position[position == len(sorted_values)] = 0
+
+    return sorted_values[position] == values
+
+def diff_keys(old, new):
+    '''
+    Return the key values that are newly flagged, resolved and persisting,
+    from the sorted key values of a check in the old and the new run.
+
+    ## Example ##
+    diff_keys(np.array(['1', '2']), np.array(['2', '3'])) # ['3'], ['1'], ['2']
+    '''
+
+    new_in_old = in_sorted(new, old)
+
+    return new[~new_in_old], old[~in_sorted(old, new)], new[new_in_old]
+
+def diff_runs(old_run, new_run):
+    '''
+    Compare two stored runs (see load_run), and return two values:
+
+    - a DataFrame with, for each check, the number of rows flagged in each
+      run and the number that are newly flagged, resolved and persisting.
+      Checks run only once have no counts for the other run.
+    - a dictionary with the name of each check as key, and a DataFrame of
+      the newly flagged and resolved key values as value
+
+    ## Example ##
+    summary_df, changes = diff_runs(load_run(old_path), load_run(new_path))
+    '''
+
+    rows = []
+    changes = dict()
+
+    for name in list(old_run) + [name for name in new_run if name not in old_run]:
+        old, new = old_run.get(name), new_run.get(name)
+        row = {'check': name,
+               'old': np.nan if old is None else len(old),
+               'new': np.nan if new is None else len(new),
+               'newly_flagged': np.nan, 'resolved': np.nan, 'persisting': np.nan}
+
+        if old is not None and new is not None:
+            flagged, resolved, persisting = diff_keys(old, new)
+            row.update(newly_flagged=len(flagged), resolved=len(resolved), persisting=len(persisting))
+            if len(flagged) or len(resolved):
+                changes[name] = pd.DataFrame({'key': np.concatenate([flagged, resolved]),
+                                              'status': ['new'] * len(flagged) + ['resolved'] * len(resolved)})
+        rows.append(row)
+
+    counts = ['old', 'new', 'newly_flagged', 'resolved', 'persisting']
+    summary_df = pd.DataFrame(rows, columns=['check'] + counts).astype({count: 'Int64' for count in counts})
+
+    return summary_df, changes
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,292 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script containing the secondary indexes on the WDPA key fields    ####
+###################################################################################
+
+'''
+Checks, exports and scoped reruns repeatedly look up rows by WDPAID, WDPA_PID,
+ISO3 or METADATAID. Instead of scanning the whole table with isin for each lookup,
+a secondary index is built once per table for each of these fields:
+
+- keys --      the sorted unique values of the field
+- offsets --   the rows with keys[i] are positions[offsets[i]:offsets[i+1]]
+- positions -- the row positions (as used by DataFrame.iloc), ordered by key
+
+Looking up keys is a binary search (O(log n)) on keys, and the offsets give the
+boundaries of the groups of rows sharing a key, e.g. all rows of one WDPAID.
+
+The indexes are built on first use and shared by all checks run on the same
+DataFrame (see wdpa.context), and can be saved next to a cached table, so that
+they are only built once per snapshot of the WDPA.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import hashlib
+import numpy as np
+import pandas as pd
+from wdpa.context import table_context
+
+# Fields that are indexed when saving the indexes of a table
+INDEX_FIELDS = ['WDPAID', 'WDPA_PID', 'ISO3', 'METADATAID']
+
+# Fields that can hold multiple values, e.g. 'NLD;BEL': each value is indexed separately
+MULTIVALUE_FIELDS = {'ISO3': ';', 'PARENT_ISO3': ';'}
+
+######################
+#### 1. Key index ####
+######################
+
+def _key_array(values):
+    '''
+    Return values as an array that can be sorted and compared: numbers as float,
+    anything else (e.g. WDPA_PID, ISO3) as fixed-width unicode strings.
+    '''
+
+    values = np.asarray(values)
+
+    if values.dtype.kind in 'biuf':
+        return values.astype(float)
+
+    return values.astype(str)
+
+class KeyIndex(object):
+    '''
+    Sorted key array with offset table for one field of the WDPA.
+
+    ## Example ##
+    index = KeyIndex.build(wdpa_df['WDPAID'].values)
+    index.rows([555555, 555556])
+    '''
+
+    def __init__(self, keys, offsets, positions):
+        self.keys = keys
+        self.offsets = offsets
+        self.positions = positions
+
+    @classmethod
+    def build(cls, values, separator=None):
+        '''
+        Build the index of values, an array holding one value per row.
+        NaN / None values are not indexed. If separator is given, values
+        such as 'NLD;BEL' are indexed under each of their parts.
+        '''
+
+        values = np.asarray(values, dtype=object) if separator else np.asarray(values)
+        rows = np.flatnonzero(~pd.isna(values))
+        values = values[rows]
+
+        if separator:
+            parts = [str(value).split(separator) for value in values]
+            rows = np.repeat(rows, [len(each) for each in parts])
+            values = np.array([part for each in parts for part in each], dtype=object)
+
+        values = _key_array(values) if len(values) else np.array([], dtype=float)
+        order = np.argsort(values, kind='mergesort') # stable: table order within a key
+        sorted_values = values[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], sorted_values[1:] != sorted_values[:-1]))) \
+                 if len(sorted_values) else np.array([], dtype=np.int64)
+
+        return cls(keys=sorted_values[starts],
+                   offsets=np.append(starts, len(sorted_values)).astype(np.int64),
+                   positions=rows[order].astype(np.int64))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def sizes(self):
+        '''
+        Return the number of rows of each key.
+        '''
+
+        return np.diff(self.offsets)
+
+    def find(self, keys):
+        '''
+        Return the positions in self.keys of the keys that are present in the index.
+        '''
+
+        if len(self.keys) == 0:
+            return np.array([], dtype=np.int64)
+
+        if self.keys.dtype.kind == 'f':
+            keys = pd.to_numeric(pd.Series(keys, dtype=object), errors='coerce').dropna().values.astype(float)
+        else:
+            keys = np.asarray(keys).astype(str)
+
+        keys = np.unique(keys)
+        found = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+
+        return found[self.keys[found] == keys]
+
+    def group_rows(self, groups):
+        '''
+        Return the row positions of the groups (positions in self.keys), in table order.
+        '''
+
+        groups = np.asarray(groups, dtype=np.int64)
+        starts = self.offsets[groups]
+        sizes = self.offsets[groups + 1] - starts
+
+        # offsets[g] + 0, 1, ... sizes[g]-1 for each group g, without a Python loop
+        before = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+        idx = np.repeat(starts - before, sizes) + np.arange(sizes.sum(), dtype=np.int64)
+
+        return np.unique(self.positions[idx])
+
+    def rows(self, keys):
+        '''
+        Return the row positions of the rows holding any of keys, in table order.
+        '''
+
+        return self.group_rows(self.find(keys))
+
+    def range_rows(self, low, high):
+        '''
+        Return the row positions of the rows with a key between low and high (inclusive), in table order.
+        '''
+
+        start = np.searchsorted(self.keys, low, side='left')
+        end = np.searchsorted(self.keys, high, side='right')
+
+        return self.group_rows(np.arange(start, end))
+
+    def duplicated_rows(self, min_size=2):
+        '''
+        Return the row positions of the keys present on at least min_size rows, in table order.
+        '''
+
+        return self.group_rows(np.flatnonzero(self.sizes() >= min_size))
+
+#########################################
+#### 2. Indexes shared by the checks ####
+#########################################
+
+def key_index(wdpa_df, field):
+    '''
+    Return the KeyIndex of field for wdpa_df. It is built on first use, and then
+    shared by all checks and exports using the same DataFrame.
+
+    ## Example ##
+    key_index(wdpa_df, 'WDPAID').duplicated_rows()
+    '''
+
+    indexes = table_context(wdpa_df).setdefault('index', dict())
+
+    if field not in indexes:
+        indexes[field] = KeyIndex.build(wdpa_df[field].values, MULTIVALUE_FIELDS.get(field))
+
+    return indexes[field]
+
+def find_rows(wdpa_df, field, keys):
+    '''
+    Return the row positions of wdpa_df where field holds any of keys, in table order.
+    Use with wdpa_df.iloc to obtain the rows.
+
+    ## Example ##
+    wdpa_df.iloc[find_rows(wdpa_df, 'ISO3', ['NLD'])]
+    '''
+
+    return key_index(wdpa_df, field).rows(keys)
+
+def select_rows(wdpa_df, iso3=None, metadataid=None, wdpaid=None):
+    '''
+    Return the rows of wdpa_df of the specified ISO3s, METADATAIDs and/or WDPAIDs
+    (or 'min-max' WDPAID ranges), using the indexes. This is the in-memory counterpart of qa.where_clause, e.g. to
+    scope a rerun on a table that is already loaded or cached.
+
+    ## Example ##
+    select_rows(wdpa_df, iso3=['NLD'], metadataid=[1])
+    '''
+
+    positions = None
+
+    for field, keys in (('ISO3', iso3), ('METADATAID', metadataid), ('WDPAID', wdpaid)):
+        if keys:
+            index = key_index(wdpa_df, field)
+            # WDPAID ranges are written as 'min-max', as in qa.where_clause
+            ranges = [str(key).split('-', 1) for key in keys if isinstance(key, str) and '-' in key]
+            keys = [key for key in keys if not (isinstance(key, str) and '-' in key)]
+            rows = np.unique(np.concatenate([index.rows(keys)] +
+                                            [index.range_rows(float(low), float(high)) for low, high in ranges]))
+            positions = rows if positions is None else np.intersect1d(positions, rows)
+
+    if positions is None:
+        return wdpa_df
+
+    return wdpa_df.iloc[positions]
+
+#################################################
+#### 3. Save and load the indexes of a table ####
+#################################################
+
+def field_fingerprint(wdpa_df, field):
+    '''
+    Return a hash of the index (OBJECTID) and the values of field of wdpa_df, to
+    verify that a saved index of field belongs to this table. The hash does not
+    depend on the other fields, so it is the same for every selection of fields
+    of the same table, and changes when the values of field change.
+    '''
+
+    hashed = pd.util.hash_pandas_object(wdpa_df[field], index=True).values
+
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+def save_indexes(wdpa_df, path, fields=INDEX_FIELDS):
+    '''
+    Save the indexes of fields of wdpa_df to path (a .npz file), e.g. next to a cached
+    table, each with the fingerprint of its field (see field_fingerprint).
+
+    ## Example ##
+    save_indexes(wdpa_df, 'cache/WDPA_Jun2019_poly.idx.npz')
+    '''
+
+    arrays = {'nrows': np.array(len(wdpa_df))}
+
+    for field in fields:
+        if field in wdpa_df.columns:
+            index = key_index(wdpa_df, field)
+            arrays[field + '.fingerprint'] = np.array(field_fingerprint(wdpa_df, field))
+            arrays[field + '.keys'] = index.keys
+            arrays[field + '.offsets'] = index.offsets
+            arrays[field + '.positions'] = index.positions
+
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+def load_indexes(wdpa_df, path, fields=INDEX_FIELDS):
+    '''
+    Load the indexes saved at path and share them with the checks run on wdpa_df.
+    Only the indexes of the fields of wdpa_df with the same values as when saved
+    are loaded. Return False if none were loaded, e.g. if the file does not exist
+    or if the indexes were saved for another table.
+    '''
+
+    try:
+        saved = np.load(path)
+    except (IOError, OSError):
+        return False
+
+    loaded = False
+
+    with saved:
+        if 'nrows' not in saved.files or int(saved['nrows']) != len(wdpa_df):
+            return False
+
+        indexes = table_context(wdpa_df).setdefault('index', dict())
+        for field in fields:
+            if field in wdpa_df.columns and field + '.fingerprint' in saved.files and \
+               str(saved[field + '.fingerprint']) == field_fingerprint(wdpa_df, field):
+                indexes[field] = KeyIndex(keys=saved[field + '.keys'],
+                                          offsets=saved[field + '.offsets'],
+                                          positions=saved[field + '.positions'])
+                loaded = True
+
+    return loaded
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,201 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to evaluate functions once per distinct value of a field   ####
+###################################################################################
+
+'''
+Most checks of text fields evaluate a function of the value of each row: are
+all ISO3 codes in the ISO3 list, does the value hold a forbidden character, ...
+The WDPA has ~280k rows, but a field like DESIG_ENG or ISO3 only holds a few
+thousand distinct values. Instead of evaluating the function on each row:
+
+- the distinct values of a field, and the code of the value of each row
+  (pandas.factorize), are computed once per table and kept in its context
+  (see wdpa.context), for all checks reading the field
+- the function is evaluated on the distinct values only, and the result is
+  broadcast back to the rows through the codes
+- the results are kept in a bounded LRU cache, by function and value, shared
+  by all checks and by all chunks of the table during a run (see wdpa.pipeline)
+
+The key of a function in the cache must identify the function and all values
+it depends on, e.g. ('forbidden_character', pattern).
+
+    map_distinct(wdpa_df, 'ISO3', valid_codes, key='iso3', na_value=False, dtype=bool)
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from wdpa.context import table_context
+
+# Number of results kept in the cache of function results
+MEMO_SIZE = 2**16
+
+_MISSING = object()
+
+#############################
+#### 1. Cache of results ####
+#############################
+
+class LRUCache(object):
+    '''
+    Bounded cache of function results by (key, value), shared by threads. When
+    it is full, the least recently used result is removed.
+
+    ## Example ##
+    cache = LRUCache(1000)
+    cache.get_many('iso3', ['NLD', 'BEL'])
+    '''
+
+    def __init__(self, maxsize=MEMO_SIZE):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, key, values):
+        '''
+        Return the cached results of key for values, with _MISSING for those not cached.
+        '''
+
+        results = []
+
+        with self.lock:
+            for value in values:
+                result = self.data.get((key, value), _MISSING)
+                if result is _MISSING:
+                    self.misses += 1
+                else:
+                    self.data.move_to_end((key, value))
+                    self.hits += 1
+                results.append(result)
+
+        return results
+
+    def put_many(self, key, values, results):
+        '''
+        Cache the results of key for values.
+        '''
+
+        with self.lock:
+            for value, result in zip(values, results):
+                self.data[(key, value)] = result
+                self.data.move_to_end((key, value))
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = 0
+
+# The cache shared by all checks
+memo_cache = LRUCache()
+
+#####################################
+#### 2. Evaluate distinct values ####
+#####################################
+
+def distinct_values(wdpa_df, field):
+    '''
+    Return the codes and the distinct values of field (pandas.factorize), computed
+    once per table. NaN has code -1.
+
+    ## Example ##
+    codes, uniques = distinct_values(wdpa_df, 'DESIG_ENG')
+    '''
+
+    context = table_context(wdpa_df)
+    key = ('distinct', field)
+
+    if key not in context:
+        codes, uniques = pd.factorize(np.asarray(wdpa_df[field].values, dtype=object))
+        context[key] = (codes, np.asarray(uniques, dtype=object))
+
+    return context[key]
+
+def evaluate_distinct(uniques, func, key, dtype=object):
+    '''
+    Return func(value) for each of the distinct values uniques, as an array, from
+    the cache if evaluated before. Results are only cached if there are fewer
+    distinct values than the cache can hold, e.g. not for the names of all
+    protected areas, which are hardly ever evaluated twice.
+    '''
+
+    if len(uniques) > memo_cache.maxsize // 2:
+        return np.array([func(value) for value in uniques], dtype=dtype)
+
+    results = memo_cache.get_many(key, uniques)
+    missing = [i for i, result in enumerate(results) if result is _MISSING]
+
+    if missing:
+        computed = [func(uniques[i]) for i in missing]
+        memo_cache.put_many(key, [uniques[i] for i in missing], computed)
+        for i, result in zip(missing, computed):
+            results[i] = result
+
+    return np.array(results, dtype=dtype)
+
+def broadcast(codes, results, na_value):
+    '''
+    Return the result of each row, from the results of the distinct values and
+    the codes of the rows; na_value for NaN (code -1).
+    '''
+
+    results = np.append(results, np.array([na_value], dtype=results.dtype))
+
+    return results[codes]
+
+def map_values(values, func, key, na_value=None, dtype=object):
+    '''
+    Return func(value) for each of values (a Series or array), evaluated once per
+    distinct value; na_value for NaN.
+
+    ## Example ##
+    map_values(rows['NAME'].values, normalise_name, key='normalise_name')
+    '''
+
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+
+    return broadcast(codes, evaluate_distinct(np.asarray(uniques, dtype=object), func, key, dtype), na_value)
+
+def map_distinct(wdpa_df, field, func, key, na_value=None, dtype=object):
+    '''
+    Return func(value) for the value of field of each row of wdpa_df, as an array,
+    evaluated once per distinct value; na_value for NaN.
+
+    ## Arguments ##
+    func --     function of one value of field
+    key --      hashable identifying func and the values it depends on in the cache
+    na_value -- the result for NaN
+    dtype --    dtype of the results, e.g. bool
+
+    ## Example ##
+    map_distinct(wdpa_df, 'NAME', lambda value: '*' in value, key=('contains', '*'), na_value=False, dtype=bool)
+    '''
+
+    codes, uniques = distinct_values(wdpa_df, field)
+
+    return broadcast(codes, evaluate_distinct(uniques, func, key, dtype), na_value)
+
+def isin_distinct(wdpa_df, field, values):
+    '''
+    Return wdpa_df[field].isin(values), evaluated on the distinct values of field.
+    '''
+
+    codes, uniques = distinct_values(wdpa_df, field)
+    isin = pd.Series(uniques, dtype=object).isin(values).values
+    # NaN is in values if values hold NaN, as in Series.isin
+    na_value = bool(pd.Series(list(values), dtype=object).isna().any())
+
+    return pd.Series(broadcast(codes, isin, na_value), index=wdpa_df.index, name=field)
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,316 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to find similar names of different protected areas         ####
+###################################################################################
+
+'''
+The inconsistent_*_same_wdpaid checks find records of one WDPAID with different
+names. The same protected area is also submitted twice under different WDPAIDs,
+with a slightly different spelling, e.g. 'De Veluwe' and 'De Veluwa'. These are
+found by comparing the names of the protected areas in the same ISO3 with the
+same DESIG_ENG (a block):
+
+- the names are normalised: case, accents, punctuation and spacing are ignored
+- the words of the DESIG and DESIG_ENG of a record are removed from its name:
+  'Kafue Forest Reserve' and 'Kabwe Forest Reserve' share the trigrams of
+  'Forest Reserve', which would make them similar
+- two names are similar if the Jaccard similarity of their character trigrams
+  is at least 0.6 (rule 'similar_name_jaccard'), and they hold the same numbers
+  ('Site 12' and 'Site 13' are different sites)
+
+Instead of comparing all pairs of names of a block, the trigrams of each name
+are ordered from rare to common, and only the first (rarest) trigrams of each
+name are used: two names with a similarity above the threshold share at least
+two of these (prefix filtering). Each name is indexed under the pairs of these
+trigrams, and only the names indexed under the same pair are compared. Pairs of
+trigrams indexed for more than MAX_PREFIX_GROUP names of a block are too common
+to tell names apart, and are not compared, so that the number of comparisons
+stays linear in the number of names.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import re
+import unicodedata
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from wdpa.rules import rule
+from wdpa.memo import map_values
+
+# Length of the character n-grams compared
+NGRAM = 3
+
+# Number of n-grams of their prefixes that similar names share, see similar_name_pairs
+PREFIX_OVERLAP = 2
+
+# Largest number of names of a block compared under one index key, see similar_name_pairs
+MAX_PREFIX_GROUP = 1000
+
+# Number of candidate pairs generated at once, see _candidate_pairs
+PAIR_BATCH = 2000000
+
+############################
+#### 1. Normalise names ####
+############################
+
+def normalise_name(name):
+    '''
+    Return name in lower case, without accents and punctuation, and with single spaces.
+
+    ## Example ##
+    normalise_name('Parc National des Cévennes') # 'parc national des cevennes'
+    '''
+
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+
+    return ' '.join(re.sub(r'[\W_]+', ' ', name.casefold()).split())
+
+@lru_cache(maxsize=None)
+def _designation_words(designation):
+    '''
+    Return the words of the normalised designation.
+    '''
+
+    return normalise_name(designation).split()
+
+def strip_designation(name, designations):
+    '''
+    Return the normalised name without the words of its designations, or the
+    whole name if it only holds these words.
+
+    ## Arguments ##
+    name --         normalised name, see normalise_name
+    designations -- list of the designations of the record, e.g. its DESIG and DESIG_ENG
+
+    ## Example ##
+    strip_designation('kafue forest reserve', ['Forest Reserve', 'Local Forest']) # 'kafue'
+    '''
+
+    words = set(word for designation in designations for word in _designation_words(designation))
+    kept = [word for word in name.split() if word not in words]
+
+    return ' '.join(kept) if kept else name
+
+def name_ngrams(name, n=NGRAM):
+    '''
+    Return the set of character n-grams of the normalised name, padded with spaces.
+    '''
+
+    name = f' {name} '
+
+    return {name[i:i + n] for i in range(max(1, len(name) - n + 1))}
+
+###############################
+#### 2. Similar name pairs ####
+###############################
+
+def _pairs_in_groups(starts, ends, values):
+    '''
+    Return all pairs (left, right) of the values of each group values[start:end],
+    with left before right in the group.
+    '''
+
+    size = ends - starts
+    position = np.repeat(starts, size) + np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size)
+
+    # each value is paired with the values after it in its group
+    following = np.repeat(ends, size) - position - 1
+    first = np.repeat(position, following)
+    offset = np.arange(len(first)) - np.repeat(np.cumsum(following) - following, following)
+
+    return values[first], values[first + offset + 1]
+
+def _distinct(codes):
+    '''
+    Return the sorted distinct values of the integer array codes.
+    '''
+
+    codes = np.sort(codes)
+
+    return codes[np.r_[True, codes[1:] != codes[:-1]]] if len(codes) else codes
+
+def _candidate_pairs(groups, values, n_values):
+    '''
+    Return the distinct pairs (left, right) of values in the same group, with left
+    before right in the group. groups is sorted. Groups of more than MAX_PREFIX_GROUP
+    values are skipped, and the pairs are generated in batches of about PAIR_BATCH
+    pairs, so that memory stays bounded.
+    '''
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(groups)].astype(np.int64)
+    indexed = ends - starts <= MAX_PREFIX_GROUP
+    starts, ends = starts[indexed], ends[indexed]
+
+    # the groups of each batch hold at most PAIR_BATCH pairs, or one group
+    batch = np.cumsum((ends - starts) * (ends - starts - 1) // 2) // PAIR_BATCH
+    bounds = np.r_[np.flatnonzero(np.r_[True, batch[1:] != batch[:-1]]), len(batch)] if len(batch) else [0]
+
+    pairs, counted = [np.array([], dtype=np.int64)], 0
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        left, right = _pairs_in_groups(starts[first:last], ends[first:last], values)
+        pairs.append(_distinct(left * n_values + right))
+        counted += len(pairs[-1])
+        # the same pairs found in earlier batches are dropped
+        if counted > 2 * PAIR_BATCH:
+            pairs = [_distinct(np.concatenate(pairs))]
+            counted = len(pairs[0])
+
+    pair = _distinct(np.concatenate(pairs))
+
+    return pair // n_values, pair % n_values
+
+def similar_name_pairs(blocks, names, min_similarity, n=NGRAM):
+    '''
+    Return the pairs of different normalised names of the same block that are similar,
+    as three arrays: the positions of the names (left < right) and their similarity.
+
+    ## Arguments ##
+    blocks --         array of the block of each name, e.g. ISO3 and DESIG_ENG
+    names --          array of distinct normalised names (per block), see normalise_name
+    min_similarity -- smallest Jaccard similarity of the n-grams of similar names
+    '''
+
+    # one row per n-gram of each name; the n-grams are only compared within a block
+    gram_sets = [name_ngrams(name, n) for name in names]
+    size = np.fromiter((len(each) for each in gram_sets), dtype=np.int64, count=len(gram_sets))
+    gram, gram_values = pd.factorize(np.fromiter((each for grams in gram_sets for each in grams),
+                                                 dtype=object, count=size.sum()))
+    block = pd.factorize(np.asarray(blocks, dtype=object))[0].astype(np.int64)
+    name = np.repeat(np.arange(len(names)), size)
+    grams = pd.DataFrame({'name': name, 'key': block[name] * len(gram_values) + gram})
+
+    # order the n-grams of each name from rare to common, and keep the prefix of each
+    # name: similar names share at least PREFIX_OVERLAP n-grams of their prefixes
+    grams['frequency'] = grams.groupby('key')['key'].transform('size')
+    grams = grams.sort_values(['name', 'frequency', 'key'], kind='stable')
+    rank = grams.groupby('name').cumcount().values
+    prefix_length = size - np.ceil(min_similarity * size - 1e-9).astype(np.int64) + PREFIX_OVERLAP
+    prefix = grams[rank < prefix_length[grams['name'].values]]
+    prefix_key = pd.factorize(prefix['key'].values)[0].astype(np.int64)
+    prefix_name = prefix['name'].values
+
+    # each name is indexed under the pairs of n-grams of its prefix, so the names
+    # sharing PREFIX_OVERLAP n-grams of their prefixes share an index key; names with
+    # a few n-grams may be similar with one shared n-gram, and are also indexed under it
+    starts = np.flatnonzero(np.r_[True, prefix_name[1:] != prefix_name[:-1]]) if len(prefix_name) else \
+             np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(prefix_name)].astype(np.int64)
+    first, second = _pairs_in_groups(starts, ends, prefix_key)
+    single = np.ceil(min_similarity * size[prefix_name] - 1e-9) < PREFIX_OVERLAP
+    n_keys = prefix_key.max() + 1 if len(prefix_key) else 1
+    index = pd.DataFrame({'key': np.concatenate([np.minimum(first, second) * n_keys + np.maximum(first, second),
+                                                 prefix_key[single] * n_keys + prefix_key[single]]),
+                          'name': np.concatenate([_pairs_in_groups(starts, ends, prefix_name)[0],
+                                                  prefix_name[single]])}).sort_values(['key', 'name'], kind='stable')
+
+    # candidate pairs: the pairs of names indexed under the same key
+    left, right = _candidate_pairs(index['key'].values, index['name'].values, len(names))
+
+    # the sizes of similar names differ by at most a factor min_similarity
+    # names holding different numbers are different protected areas
+    numbers = pd.factorize(np.array([' '.join(re.findall(r'\d+', name)) for name in names], dtype=object))[0]
+    keep = (np.minimum(size[left], size[right]) >= min_similarity * np.maximum(size[left], size[right]) - 1e-9) & \
+           (numbers[left] == numbers[right])
+    left, right = left[keep], right[keep]
+
+    # compare the candidates: the number of n-grams they share
+    shared = np.fromiter((len(gram_sets[a] & gram_sets[b]) for a, b in zip(left, right)), dtype=np.int64, count=len(left))
+    similarity = shared / (size[left] + size[right] - shared)
+    similar = similarity >= min_similarity - 1e-9
+
+    return left[similar], right[similar], similarity[similar]
+
+#######################################################
+#### 3. Similar names of different protected areas ####
+#######################################################
+
+def _strip_designation(value):
+    '''
+    Return strip_designation of the name and designations of value, joined by '\\x1f'.
+    '''
+
+    name, *designations = value.split('\x1f')
+
+    return strip_designation(name, designations)
+
+def similar_names(wdpa_df, field, min_similarity=None):
+    '''
+    Return the rows of wdpa_df whose field is the same as or similar to that of a
+    row with another WDPAID, in the same ISO3 and with the same DESIG_ENG, as two
+    values: the positions of these rows, and a DataFrame with the most similar
+    WDPAID, its value of field and the similarity, for each of these rows.
+
+    ## Arguments ##
+    field --          field holding the names, e.g. 'NAME' or 'ORIG_NAME'
+    min_similarity -- smallest similarity of similar names (default: rule 'similar_name_jaccard')
+
+    ## Example ##
+    similar_names(wdpa_df, 'NAME')
+    '''
+
+    if min_similarity is None:
+        min_similarity = rule('similar_name_jaccard')
+
+    columns = ['similar_WDPAID', f'similar_{field}', f'{field}_similarity']
+    present = np.flatnonzero(wdpa_df[field].notna().values)
+    if len(present) == 0:
+        return present, pd.DataFrame(columns=columns)
+
+    rows = wdpa_df[['WDPAID', field, 'ISO3', 'DESIG', 'DESIG_ENG']].iloc[present]
+    block = (rows['ISO3'].fillna('').astype(str) + '\x1f' + rows['DESIG_ENG'].fillna('').astype(str)).values
+
+    # each distinct value is normalised once, and each distinct name and designations stripped once
+    normalised = map_values(rows[field].values, normalise_name, key='normalise_name')
+    designated = pd.Series(normalised) + '\x1f' + rows['DESIG'].fillna('').astype(str).values + \
+                 '\x1f' + rows['DESIG_ENG'].fillna('').astype(str).values
+    normalised = map_values(designated.values, _strip_designation, key='strip_designation')
+
+    # the distinct names of each block
+    entry, entries = pd.factorize(pd.Series(block) + '\x1f' + normalised)
+    entry_block = np.empty(len(entries), dtype=object)
+    entry_name = np.empty(len(entries), dtype=object)
+    entry_block[entry], entry_name[entry] = block, normalised
+
+    left, right, similarity = similar_name_pairs(entry_block, entry_name, min_similarity)
+
+    # pairs of names in both directions, and each name with itself (the same name of another WDPAID)
+    pairs = pd.DataFrame({'entry': np.concatenate([left, right, np.arange(len(entries))]),
+                          'other': np.concatenate([right, left, np.arange(len(entries))]),
+                          'similarity': np.concatenate([similarity, similarity, np.ones(len(entries))])})
+
+    # the WDPAIDs holding each name, with one of their values
+    ids = pd.DataFrame({'entry': entry, 'WDPAID': rows['WDPAID'].values, 'value': rows[field].values}) \
+            .drop_duplicates(['entry', 'WDPAID'])
+
+    # the most similar name of another WDPAID is one of the two smallest WDPAIDs
+    # of each similar name, so only these are compared
+    smallest = ids.sort_values(['entry', 'WDPAID'], kind='stable').groupby('entry').head(2)
+    matches = pairs.merge(smallest.rename(columns={'entry': 'other', 'WDPAID': 'other_WDPAID'}), on='other') \
+                   .sort_values(['entry', 'similarity', 'other_WDPAID'], ascending=[True, False, True], kind='stable')
+
+    # for each name, its best match, and its best match of a WDPAID other than the
+    # best one: the best match of each WDPAID holding the name is one of these two
+    best = matches.drop_duplicates('entry')
+    second = matches[matches['other_WDPAID'].values !=
+                     best.set_index('entry')['other_WDPAID'].reindex(matches['entry']).values].drop_duplicates('entry')
+
+    found = pd.DataFrame({'entry': entry, 'WDPAID': rows['WDPAID'].values, 'position': present}) \
+              .merge(pd.concat([best, second]), on='entry')
+    found = found[found['WDPAID'] != found['other_WDPAID']] \
+              .sort_values(['position', 'similarity', 'other_WDPAID'], ascending=[True, False, True], kind='stable') \
+              .drop_duplicates('position')
+
+    result = pd.DataFrame({columns[0]: found['other_WDPAID'].values,
+                           columns[1]: found['value'].values,
+                           columns[2]: found['similarity'].values})
+
+    return found['position'].values, result
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,297 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to read, check and export the WDPA in a pipeline           ####
+###################################################################################
+
+'''
+Reading the WDPA with a SearchCursor and writing the Excel workbook are mostly
+waiting on disk, whereas the checks keep the processor busy. Instead of running
+these one after the other, run_pipeline overlaps them:
+
+    reader thread --> chunks of rows --> checks --> offending rows --> exporter thread
+
+- The reader puts chunks of rows (see qa.read_table_chunks) on a bounded queue,
+  while the checks run on the chunks read before.
+- Checks that only look at one row at a time run on each chunk. Checks with
+  'scope': 'table' (e.g. same WDPAID, or statistics of the whole table) run once
+  all rows are read.
+- With a spill_dir, the checks comparing the rows of the same WDPAID or WDPA_PID
+  are run out of core on the chunks as they are read (see wdpa.external). If
+  these are the only checks with 'scope': 'table', the chunks are not kept in
+  memory either: only the offending rows of the row checks are kept, and the
+  rows flagged by the grouped checks are read back from spill_dir. Other table
+  checks need the whole table, which is then kept in memory as without a spill_dir.
+- The offending rows of each check go to the exporter as soon as the check has
+  finished, and are written to the workbook while the other checks still run.
+
+The queues are bounded, so that a slow exporter or checks do not make the
+reader hold the whole table in queues.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from wdpa.runner import run_checks, output_fields
+from wdpa.results import CheckResults
+from wdpa.rules import as_rules, use_rules
+from wdpa.export import excel_output_path, new_workbook, write_error_sheet, write_summary
+
+# Put on a queue after the last item
+_DONE = object()
+
+###################################
+#### 1. Stages of the pipeline ####
+###################################
+
+class _Stage(threading.Thread):
+    '''
+    Run target(*args) in a thread. If it raises, keep the exception
+    and stop the other stages of the pipeline.
+    '''
+
+    def __init__(self, stop, target, *args):
+        super().__init__(daemon=True)
+        self.stop = stop
+        self.target = target
+        self.args = args
+        self.error = None
+
+    def run(self):
+        try:
+            self.target(*self.args)
+        except BaseException as error:
+            self.error = error
+            self.stop.set()
+
+def _put(to_queue, item, stop):
+    '''
+    Put item on to_queue, waiting while it is full, unless the pipeline stops.
+    '''
+
+    while not stop.is_set():
+        try:
+            to_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+def _get(from_queue, stop):
+    '''
+    Return the next item of from_queue, or _DONE if the pipeline stops.
+    '''
+
+    while not stop.is_set():
+        try:
+            return from_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+    return _DONE
+
+def _raise_errors(stages):
+    for stage in stages:
+        if stage.error is not None:
+            raise stage.error
+
+def _read_chunks(chunks, chunk_queue, stop):
+    '''
+    Put the chunks of rows on chunk_queue, as they are read.
+    '''
+
+    for chunk in chunks:
+        if stop.is_set():
+            return
+        _put(chunk_queue, chunk, stop)
+
+    _put(chunk_queue, _DONE, stop)
+
+def _export_results(result_queue, stop, checks, outpath, datatype):
+    '''
+    Write the offending rows of each check to the workbook as they arrive,
+    and save the workbook after the last check.
+    '''
+
+    wb = new_workbook()
+    counts = dict()
+
+    while True:
+        item = _get(result_queue, stop)
+        if item is _DONE:
+            break
+        name, result = item
+        errors = result[name] # copy the offending rows from the table, one check at a time
+        write_error_sheet(wb, name, errors)
+        counts[name] = len(errors)
+
+    if stop.is_set(): # a stage failed; do not save an incomplete workbook
+        return
+
+    write_summary(wb, checks, counts)
+    wb.save(excel_output_path(outpath, datatype))
+
+#########################
+#### 2. Run pipeline ####
+#########################
+
+def run_pipeline(chunks, checks, outpath=None, datatype=None, log=print, queue_size=2, rules=None, spill_dir=None):
+    '''
+    Run the checks on the chunks of rows of a WDPA table, while the chunks are read,
+    and write the offending rows to Excel, as output_errors_to_excel does, while the
+    checks run. Return the same dictionary as run_checks.
+
+    Note: the rows of a check that runs on chunks are looked up in each chunk, thus
+    rows with the same WDPA_PID in other chunks are not added to its output.
+    When the table is not kept in memory (see spill_dir), the returned results are
+    of a table holding only the offending rows of all checks, in their order.
+
+    ## Arguments ##
+    chunks --     iterable of wdpa DataFrames with the same columns, e.g. read_table_chunks(...)
+                  or [poly_df]
+    checks --     a list of checks, e.g. poly_checks or pt_checks
+    outpath --    the output directory of the Excel file; leave None to not write Excel
+    datatype --   a string specifying the input type: e.g. point or poly
+    log --        function used to report progress, e.g. arcpy.AddMessage
+    queue_size -- number of chunks, and of check results, that can wait in the queues
+    rules --      optional RulePack, or path of a rule pack file, see wdpa.rules
+    spill_dir --  optional directory to run the grouped checks (same WDPAID, duplicate
+                  WDPA_PID) out of core, on the chunks as they are read, instead of
+                  grouping the whole table (see wdpa.external). The table is only kept
+                  in memory if other checks with 'scope': 'table' are run.
+
+    ## Example ##
+    run_pipeline(chunks=read_table_chunks(input_poly, INPUT_FIELDS_POLY),
+                 checks=poly_checks,
+                 outpath='C:\\Users\\paintern\\Desktop\\Stijn\\3. Data\\Test data',
+                 datatype='poly',
+                 log=arcpy.AddMessage)
+    '''
+
+    rules = as_rules(rules) # read once, for all chunks
+    stop = threading.Event()
+    chunk_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue(maxsize=queue_size)
+
+    stages = [_Stage(stop, _read_chunks, chunks, chunk_queue, stop)]
+    if outpath is not None:
+        stages.append(_Stage(stop, _export_results, result_queue, stop, checks, outpath, datatype))
+
+    row_checks = [check for check in checks if check.get('scope') != 'table']
+    table_checks = [check for check in checks if check.get('scope') == 'table']
+    grouped = None
+    out_of_core = False
+    if spill_dir is not None:
+        # imported here, as they load wdpa.qa
+        from wdpa.external import GroupedChecks, GROUPED_CHECKS
+        from wdpa.qa import find_wdpa_positions
+        # without other table checks, only the offending rows are kept in memory
+        out_of_core = all(check['name'] in GROUPED_CHECKS for check in table_checks)
+        grouped = GroupedChecks(table_checks, spill_dir, keep_rows=out_of_core)
+        table_checks = [check for check in table_checks if check['name'] not in GROUPED_CHECKS]
+
+    def report(name):
+        if outpath is not None:
+            _put(result_queue, (name, result), stop)
+
+    for stage in stages:
+        stage.start()
+
+    try:
+        # run the row checks on each chunk, while the next chunks are read
+        partial = {check['name']: [] for check in row_checks}
+        tables = []
+        kept = [] # positions of the rows of tables in the whole table, if only offending rows are kept
+        nrows = 0
+
+        while True:
+            chunk = _get(chunk_queue, stop)
+            if chunk is _DONE:
+                break
+            log(f'Checking rows {nrows + 1}-{nrows + len(chunk)}')
+
+            chunk_result = run_checks(chunk, row_checks, log=lambda message: None, rules=rules)
+            if grouped is not None:
+                grouped.add(chunk)
+            for name in chunk_result:
+                partial[name].append(chunk_result.positions(name) + nrows) # positions in the whole table
+            if out_of_core:
+                offending = np.unique(np.concatenate([chunk_result.positions(name) for name in chunk_result] or
+                                                    [np.array([], dtype=np.int64)]))
+                tables.append(chunk.iloc[offending])
+                kept.append(offending.astype(np.int64) + nrows)
+            else:
+                tables.append(chunk)
+            nrows += len(chunk)
+
+        _raise_errors(stages)
+
+        grouped_positions = dict()
+        if out_of_core:
+            log('Running the grouped checks out of core')
+            grouped_positions, grouped_rows = grouped.rows()
+            if grouped_positions:
+                tables.append(grouped_rows)
+                kept.append(np.unique(np.concatenate(list(grouped_positions.values()))))
+
+        # the whole table, or its offending rows, to look up the offending rows when they are exported
+        tables = [table for table in tables if len(table)] or tables[:1]
+        if len(tables) == 1:
+            wdpa_df = tables[0]
+        else:
+            wdpa_df = pd.concat(tables) if tables else pd.DataFrame()
+        del tables
+        if out_of_core:
+            # the offending rows in the order of the table, each once
+            kept = np.concatenate(kept) if kept else np.array([], dtype=np.int64)
+            kept, first = np.unique(kept, return_index=True)
+            wdpa_df = wdpa_df.iloc[first]
+        with use_rules(rules):
+            result = CheckResults(wdpa_df)
+
+        def add(check, positions):
+            if out_of_core:
+                positions = np.searchsorted(kept, positions) # positions in the offending rows
+            result.add(check['name'], positions, check.get('columns'), output_fields(check))
+            report(check['name'])
+
+        # the row checks have finished: export them while the table checks run
+        for check in row_checks:
+            if partial[check['name']]:
+                add(check, np.concatenate(partial.pop(check['name'])))
+
+        if grouped is not None and not out_of_core:
+            log('Running the grouped checks out of core')
+            for name, positions in grouped.positions().items():
+                # all rows with the WDPA_PIDs of the flagged rows, as run_checks does
+                grouped_positions[name] = find_wdpa_positions(wdpa_df, wdpa_df['WDPA_PID'].values[positions])
+
+        for check in checks:
+            if check['name'] in grouped_positions:
+                add(check, grouped_positions[check['name']])
+
+        if table_checks and len(wdpa_df):
+            run_checks(wdpa_df, table_checks, log, report, result, rules)
+
+        _put(result_queue, _DONE, stop)
+
+    except BaseException:
+        stop.set()
+        if grouped is not None:
+            grouped.close()
+        raise
+
+    finally:
+        for stage in stages:
+            stage.join()
+
+    _raise_errors(stages)
+
+    return result
+
+#######################
+#### END OF SCRIPT ####
+#######################
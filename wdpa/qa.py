@@ -43,10 +43,17 @@ In this document, we use:
 
 import numpy as np
 import pandas as pd
-import arcpy
 import datetime
+import functools
 import os
 import re
+from wdpa.index import key_index, find_rows
+from wdpa.features import register_isin_feature, field_isin
+from wdpa.columns import typed_column, parse_typed_columns
+from wdpa.rules import rule, rule_values
+from wdpa.names import similar_names
+from wdpa.text import text_anomalies
+from wdpa.memo import map_distinct, map_values
 
 #### Load fields present in the WDPA tables ####
 
@@ -72,6 +79,10 @@ INPUT_FIELDS_META = ['METADATAID','DATA_TITLE','RESP_PARTY','VERIFIER','YEAR',
                        'UPDATE_YR', 'LANGUAGE','CHAR_SET','REF_SYSTEM', 'SCALE',
                        'LINEAGE', 'CITATION','DISCLAIMER', ]
 
+# Polygon and Point fields for the integrity checks across tables
+
+INPUT_FIELDS_INTEGRITY = ['WDPAID', 'WDPA_PID', 'METADATAID', 'NAME', 'ISO3', 'DESIG']
+
 
 
 #####################################################
@@ -99,25 +110,163 @@ def arcgis_table_to_df(in_fc, input_fields, query=''):
     query='')
     '''
 
+    import arcpy # imported on first use, so that importing wdpa.qa does not load arcpy
+
     OIDFieldName = arcpy.Describe(in_fc).OIDFieldName # obtain OBJECTID field.
     final_fields = [OIDFieldName] + input_fields # Make a list of all fields that need to be extracted
     data = [row for row in arcpy.da.SearchCursor(in_fc,final_fields,where_clause=query)] # for all fields, obtain all rows
+    fc_dataframe = rows_to_df(data, final_fields)
+    parse_typed_columns(fc_dataframe) # parse e.g. STATUS_YR once, see wdpa.columns
+
+    return fc_dataframe
+
+def rows_to_df(data, final_fields):
+    '''
+    Return the rows read by an arcpy.da.SearchCursor as a DataFrame with an OBJECTID index.
+    The first of final_fields is the OBJECTID field.
+    '''
+
     fc_dataframe = pd.DataFrame(data,columns=final_fields) # Put data into pandas DataFrame
-    fc_dataframe = fc_dataframe.set_index(OIDFieldName,drop=True) # set OBJECTID as index, but no longer use it as column
+    fc_dataframe = fc_dataframe.set_index(final_fields[0],drop=True) # set OBJECTID as index, but no longer use it as column
     fc_dataframe.replace('', np.nan, inplace=True) # set '' to np.nan
 
     return fc_dataframe
 
+def read_table_chunks(in_fc, input_fields, query='', chunk_size=100000):
+    '''
+    Read an arcgis table as arcgis_table_to_df does, but yield it as DataFrames of
+    chunk_size rows while the SearchCursor is being read, so that the rows read can
+    already be checked (see wdpa.pipeline).
+
+    ## Arguments ##
+    in_fc --        feature class attribute table - inside geodatabase - to import.
+    input_fields -- list of all fields that must be imported from the dataset
+    query --        optional where_clause of arcpy.da.SearchCursor
+    chunk_size --   number of rows per DataFrame
+
+    ## Example ##
+    for poly_df in read_table_chunks(in_fc='WDPA_Jun2019_Public.gdb/WDPA_Jun2019_errortest',
+                                     input_fields=input_fields_poly):
+        ...
+    '''
+
+    import arcpy # imported on first use, so that importing wdpa.qa does not load arcpy
+
+    OIDFieldName = arcpy.Describe(in_fc).OIDFieldName # obtain OBJECTID field.
+    final_fields = [OIDFieldName] + input_fields
+
+    data = []
+    with arcpy.da.SearchCursor(in_fc,final_fields,where_clause=query) as cursor:
+        for row in cursor:
+            data.append(row)
+            if len(data) == chunk_size:
+                yield rows_to_df(data, final_fields)
+                data = []
+
+    if data:
+        yield rows_to_df(data, final_fields)
+
+###################################################
+#### 1.0. Where clause to scope the input rows ####
+###################################################
+
+def where_clause(iso3=None, metadataid=None, wdpaid=None):
+    '''
+    Return a where_clause for arcgis_table_to_df that only selects the rows of
+    the specified ISO3s, METADATAIDs and/or WDPAIDs, so that the filtering happens
+    in the SearchCursor and only the rows in scope are read.
+    Values of the same field are combined with OR, different fields with AND.
+    Return '' (all rows) if nothing is specified.
+
+    ## Arguments ##
+    iso3 --       list of ISO3 codes; rows with multiple ISO3 values (e.g. 'NLD;BEL')
+                  are selected if any of them matches
+    metadataid -- list of METADATAIDs
+    wdpaid --     list of WDPAIDs, or ranges of WDPAIDs written as 'min-max'
+
+    ## Example ##
+    arcgis_table_to_df(in_fc='WDPA_Jun2019_Public.gdb/WDPA_Jun2019_errortest',
+                       input_fields=INPUT_FIELDS_POLY,
+                       query=where_clause(iso3=['NLD'], wdpaid=['1-1000', 555555]))
+    '''
+
+    clauses = []
+
+    if iso3:
+        iso3_clauses = []
+        for code in iso3:
+            code = str(code).strip().upper()
+            if not re.match('^[A-Z]{3,4}$', code): # also ensures nothing but a code ends up in the query
+                raise ValueError(f'ERROR: invalid ISO3 code: {code}')
+            iso3_clauses += [f"ISO3 = '{code}'",
+                             f"ISO3 LIKE '{code};%'",
+                             f"ISO3 LIKE '%;{code};%'",
+                             f"ISO3 LIKE '%;{code}'"]
+        clauses.append('(' + ' OR '.join(iso3_clauses) + ')')
+
+    if metadataid:
+        clauses.append('METADATAID IN ({})'.format(', '.join(str(int(each)) for each in metadataid)))
+
+    if wdpaid:
+        wdpaid_clauses = []
+        single_ids = []
+        for each in wdpaid:
+            if isinstance(each, str) and '-' in each: # a range, e.g. '100-200'
+                low, high = each.strip().split('-', 1)
+                wdpaid_clauses.append(f'(WDPAID >= {int(low)} AND WDPAID <= {int(high)})')
+            else:
+                single_ids.append(str(int(float(each))))
+        if single_ids:
+            wdpaid_clauses.append('WDPAID IN ({})'.format(', '.join(single_ids)))
+        clauses.append('(' + ' OR '.join(wdpaid_clauses) + ')')
+
+    return ' AND '.join(clauses)
+
 
 #########################################
 ##### 1.1 Obtain allowed ISO3 values ####
 #########################################
 
-# Download from GitHub and store in a pandas DataFrame
-column_with_iso3 = ['alpha-3']
-url = 'https://raw.githubusercontent.com/lukes/ISO-3166-Countries-with-Regional-Codes/master/all/all.csv'
-iso3_df = pd.read_csv(url, usecols = column_with_iso3)
-iso3 = np.append(iso3_df['alpha-3'].values, 'ABNJ')
+ISO3_URL = 'https://raw.githubusercontent.com/lukes/ISO-3166-Countries-with-Regional-Codes/master/all/all.csv'
+
+@functools.lru_cache(maxsize=None)
+def get_iso3():
+    '''
+    Return the set of allowed ISO3 values: the ISO 3166 alpha-3 codes and 'ABNJ'.
+    The codes are downloaded from GitHub on first use, instead of when wdpa.qa is imported.
+    '''
+
+    # Download from GitHub and store in a pandas DataFrame
+    column_with_iso3 = ['alpha-3']
+    iso3_df = pd.read_csv(ISO3_URL, usecols = column_with_iso3)
+
+    return frozenset(np.append(iso3_df['alpha-3'].values, 'ABNJ'))
+
+###################################################
+#### 1.2 Intermediate results shared by checks ####
+###################################################
+
+# Fields tested against the same values by several checks. The checks that use
+# these declare them in poly_checks / pt_checks ('features'), so that each is only
+# computed once per run, see wdpa.features
+
+register_isin_feature('desig_eng_ramsar_whs', 'DESIG_ENG', ['Ramsar Site, Wetland of International Importance',
+                                                          'World Heritage Site (natural or mixed)'])
+register_isin_feature('desig_eng_unesco_whs', 'DESIG_ENG', ['UNESCO-MAB Biosphere Reserve',
+                                                          'World Heritage Site (natural or mixed)'])
+register_isin_feature('desig_eng_international', 'DESIG_ENG', ['Ramsar Site, Wetland of International Importance',
+                                                             'UNESCO-MAB Biosphere Reserve',
+                                                             'World Heritage Site (natural or mixed)'])
+register_isin_feature('desig_eng_regional', 'DESIG_ENG', ['Baltic Sea Protected Area (HELCOM)',
+                                                        'Specially Protected Area (Cartagena Convention)',
+                                                        'Marine Protected Area (CCAMLR)',
+                                                        'Marine Protected Area (OSPAR)',
+                                                        'Site of Community Importance (Habitats Directive)',
+                                                        'Special Protection Area (Birds Directive)',
+                                                        'Specially Protected Areas of Mediterranean Importance (Barcelona Convention)'])
+register_isin_feature('marine0', 'MARINE', ['0'])
+register_isin_feature('marine12', 'MARINE', ['1', '2'])
+register_isin_feature('no_take_not_applicable', 'NO_TAKE', ['Not Applicable'])
 
 #######################################
 #### 2. Utility & hardcoded checks ####
@@ -137,13 +286,40 @@ these are specific checks that have a set of input variables that cannot change.
 def find_wdpa_rows(wdpa_df, wdpa_pid):
     '''
     Return a subset of DataFrame based on wdpa_pid list
+    The rows are looked up in the WDPA_PID index shared by all checks.
 
     ## Arguments ##
     wdpa_df --  wdpa DataFrame
     wdpa_pid -- a list of WDPA_PIDs
     '''
 
-    return wdpa_df[wdpa_df['WDPA_PID'].isin(wdpa_pid)]
+    return wdpa_df.iloc[find_wdpa_positions(wdpa_df, wdpa_pid)]
+
+def find_wdpa_positions(wdpa_df, wdpa_pid, key='WDPA_PID'):
+    '''
+    Return the row positions of wdpa_df (as used by DataFrame.iloc) holding any of
+    the WDPA_PIDs in wdpa_pid, in table order. See find_wdpa_rows.
+    key is the field to look up instead of WDPA_PID, e.g. METADATAID for the Source Table.
+    '''
+
+    if pd.isna(wdpa_pid).any(): # missing WDPA_PIDs are not indexed
+        return np.flatnonzero(wdpa_df[key].isin(wdpa_pid).values)
+
+    return find_rows(wdpa_df, key, wdpa_pid)
+
+def offending_rows(wdpa_df, invalid, key='WDPA_PID'):
+    '''
+    Return the key values (e.g. WDPA_PIDs) of the rows of wdpa_df where the boolean
+    array invalid is True, or their row positions if key is None, e.g. for the
+    Source Table, where the key (METADATAID) is not unique if duplicate_metadataid fails.
+    '''
+
+    invalid = np.asarray(invalid, dtype=bool)
+
+    if key is None:
+        return np.flatnonzero(invalid)
+
+    return wdpa_df[invalid][key].values
 
 #######################################
 #### 2.1. Find duplicate WDPA_PIDs ####
@@ -166,122 +342,161 @@ def duplicate_wdpa_pid(wdpa_df, return_pid=False):
 #### 2.2. Invalid: MARINE designation based on GIS_AREA and GIS_M_AREA ####
 ###########################################################################
 
-def area_invalid_marine(wdpa_df, return_pid=False):
+def marine_gis_columns(rows, wdpa_df=None):
     '''
-    Assign a new 'MARINE' value based on GIS calculations, called marine_GIS_value
-    Return True if marine_GIS_value is unequal to MARINE
-    Return list of WDPA_PIDs where MARINE is invalid, if return_pid is set True
+    Return the proportion of marine vs total GIS area of each row (marine_GIS_proportion),
+    and the 'MARINE' value based on it (marine_GIS_value), as a DataFrame.
+    These columns are added to the output of area_invalid_marine; they only
+    depend on the rows, not on the whole table wdpa_df.
     '''
 
     # set min and max for 'coastal' designation (MARINE = 1)
-    coast_min = 0.1
-    coast_max = 0.9
+    coast_min = rule('coast_min')
+    coast_max = rule('coast_max')
 
-    # create new column with proportion marine vs total GIS area
-    wdpa_df['marine_GIS_proportion'] = wdpa_df['GIS_M_AREA'] / wdpa_df['GIS_AREA']
+    # proportion marine vs total GIS area
+    proportion = rows['GIS_M_AREA'] / rows['GIS_AREA']
 
-    def assign_marine_gis_value(wdpa_df):
-        if wdpa_df['marine_GIS_proportion'] <= coast_min:
-            return '0'
-        elif coast_min < wdpa_df['marine_GIS_proportion'] < coast_max:
-            return '1'
-        elif wdpa_df['marine_GIS_proportion'] >= coast_max:
-            return '2'
+    # calculate the marine_value; None if the proportion is not a number
+    marine_gis_value = np.select([proportion <= coast_min,
+                                  (coast_min < proportion) & (proportion < coast_max),
+                                  proportion >= coast_max],
+                                 ['0', '1', '2'], default=None)
 
-    # calculate the marine_value
-    wdpa_df['marine_GIS_value'] = wdpa_df.apply(assign_marine_gis_value, axis=1)
+    return pd.DataFrame({'marine_GIS_proportion': proportion,
+                         'marine_GIS_value': marine_gis_value}, index=rows.index)
+
+def area_invalid_marine(wdpa_df, return_pid=False):
+    '''
+    Assign a new 'MARINE' value based on GIS calculations, called marine_GIS_value
+    Return True if marine_GIS_value is unequal to MARINE
+    Return list of WDPA_PIDs where MARINE is invalid, if return_pid is set True
+    '''
 
     # find invalid WDPA_PIDs
-    invalid_wdpa_pid = wdpa_df[wdpa_df['marine_GIS_value'] != wdpa_df['MARINE']]['WDPA_PID'].values
+    marine_gis_value = marine_gis_columns(wdpa_df)['marine_GIS_value']
+    invalid_wdpa_pid = wdpa_df[marine_gis_value != wdpa_df['MARINE']]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
 
     return len(invalid_wdpa_pid) > 0
 
-############################################
-#### 2.3. Invalid: GIS_AREA >> REP_AREA ####
-############################################
+#####################################################################
+#### 2.3 - 2.6. Invalid: area too large compared to another area ####
+#####################################################################
 
-def area_invalid_too_large_gis(wdpa_df, return_pid=False):
+#### Factory Function ####
+
+def area_relative_size(wdpa_df, field_large_area, field_reference_area):
     '''
-    Return True if GIS_AREA is too large compared to REP_AREA - based on thresholds specified below.
-    Return list of WDPA_PIDs where GIS_AREA is too large compared to REP_AREA, if return_pid=True
+    Return the relative size of field_large_area compared to field_reference_area,
+    (field_reference_area + field_large_area) / field_reference_area, of each row,
+    and the mean and standard deviation of the relative sizes without outliers.
+
+    ## Example ##
+    area_relative_size(wdpa_df, field_large_area='GIS_AREA', field_reference_area='REP_AREA')
     '''
 
-    # Set maximum allowed absolute difference between GIS_AREA and REP_AREA (in km²)
-    MAX_ALLOWED_SIZE_DIFF_KM2 = 50
+    # Series: compare field_large_area to field_reference_area
+    relative_size = (wdpa_df[field_reference_area] + wdpa_df[field_large_area]) / wdpa_df[field_reference_area]
 
-    # Create two Series:
-    # One to calculate the mean and stdev without outliers
-    # One to use as index, to find WDPA_PIDs with a too large GIS_AREA
+    # replace outliers with NaN, then obtain mean and stdev
+    condition = [relative_size > 100,
+                 relative_size < 0]
+    choice =    [np.nan, np.nan]
+    relative_size_stats = pd.Series(np.select(condition, choice, default=relative_size))
 
-    # Compare GIS_AREA to REP_AREA, replace outliers with NaN, then obtain mean and stdev
-    # Settings
-    calc =      (wdpa_df['REP_AREA'] + wdpa_df['GIS_AREA']) / wdpa_df['REP_AREA']
-    condition = [calc > 100,
-                calc < 0]
-    choice =    [np.nan,np.nan]
+    return relative_size, relative_size_stats.mean(), relative_size_stats.std()
 
-    # Produce column without outliers
-    relative_size_stats = pd.Series(
-        np.select(condition, choice, default = calc))
+def area_invalid_too_large(wdpa_df, field_large_area, field_reference_area, return_pid=False):
+    '''
+    Factory Function: this generic function is to be linked to the
+    area_invalid_too_large_* input functions stated below.
 
-    # Calculate the maximum allowed values for relative_size using mean and stdev
-    max_gis = relative_size_stats.mean() + (2*relative_size_stats.std())
+    Return True if field_large_area is too large compared to field_reference_area: its
+    relative size (see area_relative_size) is larger than the mean + 2 stdev (rule
+    'area_outlier_sigma') of all rows, and the areas differ by more than 50 km² (rule
+    'max_allowed_size_diff_km2').
+    Return list of WDPA_PIDs where field_large_area is too large, if return_pid=True
 
-    # Series: compare REP_AREA to GIS_AREA
-    relative_size = pd.Series((wdpa_df['REP_AREA'] + wdpa_df['GIS_AREA']) / wdpa_df['REP_AREA'])
+    ## Arguments ##
+    field_large_area  --     string of the field to check for size - supposedly not larger
+    field_reference_area  -- string of the field to compare it to
 
-    # Find the rows with an incorrect GIS_AREA
-    invalid_wdpa_pid= wdpa_df[(relative_size > max_gis) & (abs(wdpa_df['GIS_AREA']-wdpa_df['REP_AREA']) > MAX_ALLOWED_SIZE_DIFF_KM2)]['WDPA_PID'].values
+    ## Example ##
+    area_invalid_too_large(
+        wdpa_df,
+        field_large_area="GIS_AREA",
+        field_reference_area="REP_AREA",
+        return_pid=True)
+    '''
+
+    # Set maximum allowed absolute difference between the areas (in km²)
+    MAX_ALLOWED_SIZE_DIFF_KM2 = rule('max_allowed_size_diff_km2')
+
+    # Calculate the maximum allowed relative size using mean and stdev
+    relative_size, mean, std = area_relative_size(wdpa_df, field_large_area, field_reference_area)
+    max_relative_size = mean + (rule('area_outlier_sigma')*std)
+
+    # Find the rows with an incorrect field_large_area
+    size_diff = abs(wdpa_df[field_large_area]-wdpa_df[field_reference_area])
+    invalid_wdpa_pid = wdpa_df[(relative_size > max_relative_size) & (size_diff > MAX_ALLOWED_SIZE_DIFF_KM2)]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
 
     return len(invalid_wdpa_pid) > 0
 
-############################################
-#### 2.4. Invalid: REP_AREA >> GIS_AREA ####
-############################################
-
-def area_invalid_too_large_rep(wdpa_df, return_pid=False):
+def area_too_large_columns(field_large_area, field_reference_area):
     '''
-    Return True if REP_AREA is too large compared to GIS_AREA - based on thresholds specified below.
-    Return list of WDPA_PIDs where REP_AREA is too large compared to GIS_AREA, if return_pid=True
+    Return the function adding why area_invalid_too_large flagged the rows: the relative
+    size and its threshold (computed on the whole table), and the difference of the areas
+    and its threshold.
     '''
 
-    # Set maximum allowed absolute difference between GIS_AREA and REP_AREA (in km²)
-    MAX_ALLOWED_SIZE_DIFF_KM2 = 50
+    def columns(rows, wdpa_df):
+        # the thresholds depend on all rows, the values on the offending rows only
+        mean, std = area_relative_size(wdpa_df, field_large_area, field_reference_area)[1:]
 
-    # Create two Series:
-    # One to calculate the mean and stdev without outliers
-    # One to use as index, to find WDPA_PIDs with a too large REP_AREA
+        return pd.DataFrame({'relative_size': area_relative_size(rows, field_large_area, field_reference_area)[0],
+                             'max_relative_size': mean + (rule('area_outlier_sigma')*std),
+                             'size_diff_km2': abs(rows[field_large_area]-rows[field_reference_area]),
+                             'max_size_diff_km2': rule('max_allowed_size_diff_km2')}, index=rows.index)
 
-    # Compare GIS_AREA to REP_AREA, replace outliers with NaN, then obtain mean and stdev
-    # Settings
-    calc =      (wdpa_df['REP_AREA'] + wdpa_df['GIS_AREA']) / wdpa_df['GIS_AREA']
-    condition = [calc > 100,
-                calc < 0]
-    choice =    [np.nan,np.nan]
+    return columns
 
-    # Produce Series without outliers
-    relative_size_stats = pd.Series(
-        np.select(condition, choice, default = calc))
+#### Input functions ####
 
-    # Calculate the maximum and minimum allowed values for relative_size using mean and stdev
-    max_rep = relative_size_stats.mean() + (2*relative_size_stats.std())
+# name of the check: (field_large_area, field_reference_area), see wdpa.sweep
+AREA_TOO_LARGE_FIELDS = {'gis_area_gt_rep_area': ('GIS_AREA', 'REP_AREA'),
+                         'rep_area_gt_gis_area': ('REP_AREA', 'GIS_AREA'),
+                         'gis_m_area_gt_rep_m_area': ('GIS_M_AREA', 'REP_M_AREA'),
+                         'rep_m_area_gt_gis_m_area': ('REP_M_AREA', 'GIS_M_AREA')}
 
-    # Series: compare REP_AREA to GIS_AREA
-    relative_size = pd.Series((wdpa_df['REP_AREA'] + wdpa_df['GIS_AREA']) / wdpa_df['GIS_AREA'])
+############################################
+#### 2.3. Invalid: GIS_AREA >> REP_AREA ####
+############################################
 
-    # Find the rows with an incorrect REP_AREA
-    invalid_wdpa_pid= wdpa_df[(relative_size > max_rep) & (abs(wdpa_df['REP_AREA']-wdpa_df['GIS_AREA']) > MAX_ALLOWED_SIZE_DIFF_KM2)]['WDPA_PID'].values
+def area_invalid_too_large_gis(wdpa_df, return_pid=False):
+    '''
+    Return True if GIS_AREA is too large compared to REP_AREA - based on the thresholds of area_invalid_too_large.
+    Return list of WDPA_PIDs where GIS_AREA is too large compared to REP_AREA, if return_pid=True
+    '''
 
-    if return_pid:
-        return invalid_wdpa_pid
+    return area_invalid_too_large(wdpa_df, 'GIS_AREA', 'REP_AREA', return_pid)
 
-    return len(invalid_wdpa_pid) > 0
+############################################
+#### 2.4. Invalid: REP_AREA >> GIS_AREA ####
+############################################
+
+def area_invalid_too_large_rep(wdpa_df, return_pid=False):
+    '''
+    Return True if REP_AREA is too large compared to GIS_AREA - based on the thresholds of area_invalid_too_large.
+    Return list of WDPA_PIDs where REP_AREA is too large compared to GIS_AREA, if return_pid=True
+    '''
+
+    return area_invalid_too_large(wdpa_df, 'REP_AREA', 'GIS_AREA', return_pid)
 
 ################################################
 #### 2.5. Invalid: GIS_M_AREA >> REP_M_AREA ####
@@ -289,41 +504,11 @@ def area_invalid_too_large_rep(wdpa_df, return_pid=False):
 
 def area_invalid_too_large_gis_m(wdpa_df, return_pid=False):
     '''
-    Return True if GIS_M_AREA is too large compared to REP_M_AREA - based on thresholds specified below.
+    Return True if GIS_M_AREA is too large compared to REP_M_AREA - based on the thresholds of area_invalid_too_large.
     Return list of WDPA_PIDs where GIS_M_AREA is too large compared to REP_M_AREA, if return_pid=True
     '''
 
-    # Set maximum allowed absolute difference between GIS_M_AREA and REP_M_AREA (in km²)
-    MAX_ALLOWED_SIZE_DIFF_KM2 = 50
-
-    # Create two Series:
-    # One to calculate the mean and stdev without outliers
-    # One to use as index, to find WDPA_PIDs with a too large GIS_M_AREA
-
-    # Compare GIS_M_AREA to REP_M_AREA, replace outliers with NaN, then obtain mean and stdev
-    # Settings
-    calc =      (wdpa_df['REP_M_AREA'] + wdpa_df['GIS_M_AREA']) / wdpa_df['REP_M_AREA']
-    condition = [calc > 100,
-                calc < 0]
-    choice =    [np.nan,np.nan]
-
-    # Produce column without outliers
-    relative_size_stats = pd.Series(
-        np.select(condition, choice, default = calc))
-
-    # Calculate the maximum and minimum allowed values for relative_size using mean and stdev
-    max_gis = relative_size_stats.mean() + (2*relative_size_stats.std())
-
-    # Series: compare REP_M_AREA to GIS_M_AREA
-    relative_size = pd.Series((wdpa_df['REP_M_AREA'] + wdpa_df['GIS_M_AREA']) / wdpa_df['REP_M_AREA'])
-
-    # Find the rows with an incorrect GIS_M_AREA
-    invalid_wdpa_pid= wdpa_df[(relative_size > max_gis) & (abs(wdpa_df['GIS_M_AREA']-wdpa_df['REP_M_AREA']) > MAX_ALLOWED_SIZE_DIFF_KM2)]['WDPA_PID'].values
-
-    if return_pid:
-        return invalid_wdpa_pid
-
-    return len(invalid_wdpa_pid) > 0
+    return area_invalid_too_large(wdpa_df, 'GIS_M_AREA', 'REP_M_AREA', return_pid)
 
 ################################################
 #### 2.6. Invalid: REP_M_AREA >> GIS_M_AREA ####
@@ -331,41 +516,11 @@ def area_invalid_too_large_gis_m(wdpa_df, return_pid=False):
 
 def area_invalid_too_large_rep_m(wdpa_df, return_pid=False):
     '''
-    Return True if REP_M_AREA is too large compared to GIS_M_AREA - based on thresholds specified below.
+    Return True if REP_M_AREA is too large compared to GIS_M_AREA - based on the thresholds of area_invalid_too_large.
     Return list of WDPA_PIDs where REP_M_AREA is too large compared to GIS_M_AREA, if return_pid=True
     '''
 
-    # Set maximum allowed absolute difference between GIS_M_AREA and REP_M_AREA (in km²)
-    MAX_ALLOWED_SIZE_DIFF_KM2 = 50
-
-    # Create two Series:
-    # One to calculate the mean and stdev without outliers
-    # One to use as index, to find WDPA_PIDs with a too large REP_M_AREA
-
-    # Compare GIS_M_AREA to REP_M_AREA, replace outliers with NaN, then obtain mean and stdev
-    # Settings
-    calc =      (wdpa_df['REP_M_AREA'] + wdpa_df['GIS_M_AREA']) / wdpa_df['GIS_M_AREA']
-    condition = [calc > 100,
-                calc < 0]
-    choice =    [np.nan,np.nan]
-
-    # Produce column without outliers
-    relative_size_stats = pd.Series(
-        np.select(condition, choice, default = calc))
-
-    # Calculate the maximum and minimum allowed values for relative_size using mean and stdev
-    max_rep = relative_size_stats.mean() + (2*relative_size_stats.std())
-
-    # Series: compare REP_M_AREA to GIS_M_AREA
-    relative_size = pd.Series((wdpa_df['REP_M_AREA'] + wdpa_df['GIS_M_AREA']) / wdpa_df['GIS_M_AREA'])
-
-    # Find the rows with an incorrect REP_M_AREA
-    invalid_wdpa_pid= wdpa_df[(relative_size > max_rep) & (abs(wdpa_df['REP_M_AREA']-wdpa_df['GIS_M_AREA']) > MAX_ALLOWED_SIZE_DIFF_KM2)]['WDPA_PID'].values
-
-    if return_pid:
-        return invalid_wdpa_pid
-
-    return len(invalid_wdpa_pid) > 0
+    return area_invalid_too_large(wdpa_df, 'REP_M_AREA', 'GIS_M_AREA', return_pid)
 
 #######################################################
 #### 2.7. Invalid: GIS_AREA <= 0.0001 km² (100 m²) ####
@@ -378,7 +533,7 @@ def area_invalid_gis_area(wdpa_df, return_pid=False):
     '''
 
     # Arguments
-    size_threshold = 0.0001
+    size_threshold = rule('min_area_km2')
     field_gis_area = 'GIS_AREA'
 
     # Find invalid WDPA_PIDs
@@ -400,7 +555,7 @@ def area_invalid_rep_area(wdpa_df, return_pid=False):
     '''
 
     # Arguments
-    size_threshold = 0.0001
+    size_threshold = rule('min_area_km2')
     field_rep_area = 'REP_AREA'
 
     # Find invalid WDPA_PIDs
@@ -428,7 +583,7 @@ def area_invalid_rep_m_area_marine12(wdpa_df, return_pid=False):
     condition_crit = ['1','2']
 
     # Find invalid WDPA_PIDs
-    invalid_wdpa_pid = wdpa_df[(wdpa_df[field] <= field_allowed_values) & (wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+    invalid_wdpa_pid = wdpa_df[(wdpa_df[field] <= field_allowed_values) & (field_isin(wdpa_df, condition_field, condition_crit))]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
@@ -452,7 +607,7 @@ def area_invalid_gis_m_area_marine12(wdpa_df, return_pid=False):
     condition_crit = ['1','2']
 
     # Find invalid WDPA_PIDs
-    invalid_wdpa_pid = wdpa_df[(wdpa_df[field] <= field_allowed_values) & (wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+    invalid_wdpa_pid = wdpa_df[(wdpa_df[field] <= field_allowed_values) & (field_isin(wdpa_df, condition_field, condition_crit))]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
@@ -494,13 +649,12 @@ def invalid_int_crit_desig_eng_other(wdpa_df, return_pid=False):
 
     # Arguments
     field = 'DESIG_ENG'
-    field_allowed_values = ['Ramsar Site, Wetland of International Importance',
-                            'World Heritage Site (natural or mixed)']
+    field_allowed_values = rule_values('ivd_int_crit_desig_eng_other')
     condition_field = 'INT_CRIT'
     condition_crit = ['Not Applicable']
 
     # Find invalid WDPA_PIDs
-    invalid_wdpa_pid = wdpa_df[(~wdpa_df[field].isin(field_allowed_values)) & (~wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+    invalid_wdpa_pid = wdpa_df[(~field_isin(wdpa_df, field, field_allowed_values)) & (~field_isin(wdpa_df, condition_field, condition_crit))]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
@@ -520,21 +674,13 @@ def invalid_desig_eng_iucn_cat_other(wdpa_df, return_pid=False):
 
     # Arguments
     field = 'IUCN_CAT'
-    field_allowed_values = ['Ia',
-                            'Ib',
-                            'II',
-                            'III',
-                            'IV',
-                            'V',
-                            'VI',
-                            'Not Reported',
-                            'Not Assigned']
+    field_allowed_values = rule_values('ivd_desig_eng_iucn_cat_other')
     condition_field = 'DESIG_ENG'
     condition_crit = ['UNESCO-MAB Biosphere Reserve',
                       'World Heritage Site (natural or mixed)']
 
     # Find invalid WDPA_PIDs
-    invalid_wdpa_pid = wdpa_df[(~wdpa_df[field].isin(field_allowed_values)) & (~wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+    invalid_wdpa_pid = wdpa_df[(~field_isin(wdpa_df, field, field_allowed_values)) & (~field_isin(wdpa_df, condition_field, condition_crit))]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
@@ -575,6 +721,10 @@ def inconsistent_fields_same_wdpaid(wdpa_df,
         return_pid=True):
     '''
 
+    # Only WDPAIDs present on more than one row can be inconsistent:
+    # use the WDPAID index to select those rows, instead of grouping the whole table
+    wdpa_df = wdpa_df.iloc[key_index(wdpa_df, 'WDPAID').duplicated_rows()]
+
     if return_pid:
         # Group by WDPAID to find duplicate WDPAIDs and count the
         # number of unique values for the field in question
@@ -896,7 +1046,7 @@ def inconsistent_iso3_same_wdpaid(wdpa_df, return_pid=False):
 
 #### Factory Function ####
 
-def invalid_value_in_field(wdpa_df, field, field_allowed_values, condition_field, condition_crit, return_pid=False):
+def invalid_value_in_field(wdpa_df, field, field_allowed_values, condition_field, condition_crit, return_pid=False, key='WDPA_PID'):
     '''
     Factory Function: this generic function is to be linked to
     the family of 'invalid' input functions stated below. These latter
@@ -918,6 +1068,8 @@ def invalid_value_in_field(wdpa_df, field, field_allowed_values, condition_field
                             invalid values depends; leave "" if no condition specified
     condition_crit       -- a list of values for which the condition_field
                             needs to be evaluated; leave [] if no condition specified
+    key                  -- the field identifying the rows returned, or None to return
+                            their row positions, see offending_rows
 
     ## Example ##
     invalid_value_in_field(
@@ -933,11 +1085,11 @@ def invalid_value_in_field(wdpa_df, field, field_allowed_values, condition_field
 
     # if condition_field and condition_crit are specified
     if condition_field != '' and condition_crit != []:
-        invalid_wdpa_pid = wdpa_df[(~wdpa_df[field].isin(field_allowed_values)) & (wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+        invalid_wdpa_pid = offending_rows(wdpa_df, (~field_isin(wdpa_df, field, field_allowed_values)) & (field_isin(wdpa_df, condition_field, condition_crit)), key)
 
     # If condition_field and condition_crit are not specified
     else:
-        invalid_wdpa_pid = wdpa_df[~wdpa_df[field].isin(field_allowed_values)]['WDPA_PID'].values
+        invalid_wdpa_pid = offending_rows(wdpa_df, ~field_isin(wdpa_df, field, field_allowed_values), key)
 
     if return_pid:
         # return list with invalid WDPA_PIDs
@@ -972,11 +1124,11 @@ def invalid_value_in_field_isnot(wdpa_df, field, field_allowed_values, condition
 
     # if condition_field and condition_crit are specified
     if condition_field != '' and condition_crit != []:
-        invalid_wdpa_pid = wdpa_df[(~wdpa_df[field].isin(field_allowed_values)) & (~wdpa_df[condition_field].isin(condition_crit))]['WDPA_PID'].values
+        invalid_wdpa_pid = wdpa_df[(~field_isin(wdpa_df, field, field_allowed_values)) & (~field_isin(wdpa_df, condition_field, condition_crit))]['WDPA_PID'].values
 
     # If condition_field and condition_crit are not specified
     else:
-        invalid_wdpa_pid = wdpa_df[~wdpa_df[field].isin(field_allowed_values)]['WDPA_PID'].values
+        invalid_wdpa_pid = wdpa_df[~field_isin(wdpa_df, field, field_allowed_values)]['WDPA_PID'].values
 
     if return_pid:
         # return list with invalid WDPA_PIDs
@@ -998,7 +1150,7 @@ def invalid_pa_def(wdpa_df, return_pid=False):
     '''
 
     field = 'PA_DEF'
-    field_allowed_values = ['1'] # WDPA datatype is string
+    field_allowed_values = rule_values('ivd_pa_def') # WDPA datatype is string
     condition_field = ''
     condition_crit = []
 
@@ -1015,9 +1167,7 @@ def invalid_desig_eng_international(wdpa_df, return_pid=False):
     '''
 
     field = 'DESIG_ENG'
-    field_allowed_values = ['Ramsar Site, Wetland of International Importance',
-                            'UNESCO-MAB Biosphere Reserve',
-                            'World Heritage Site (natural or mixed)']
+    field_allowed_values = rule_values('ivd_desig_eng_international')
     condition_field = 'DESIG_TYPE'
     condition_crit = ['International']
 
@@ -1034,7 +1184,7 @@ def invalid_desig_type_international(wdpa_df, return_pid=False):
     '''
 
     field = 'DESIG_TYPE'
-    field_allowed_values = ['International']
+    field_allowed_values = rule_values('ivd_desig_type_international')
     condition_field = 'DESIG_ENG'
     condition_crit = ['Ramsar Site, Wetland of International Importance',
                       'UNESCO-MAB Biosphere Reserve',
@@ -1054,13 +1204,7 @@ def invalid_desig_eng_regional(wdpa_df, return_pid=False):
     '''
 
     field = 'DESIG_ENG'
-    field_allowed_values = ['Baltic Sea Protected Area (HELCOM)',
-                            'Specially Protected Area (Cartagena Convention)',
-                            'Marine Protected Area (CCAMLR)',
-                            'Marine Protected Area (OSPAR)',
-                            'Site of Community Importance (Habitats Directive)',
-                            'Special Protection Area (Birds Directive)',
-                            'Specially Protected Areas of Mediterranean Importance (Barcelona Convention)']
+    field_allowed_values = rule_values('ivd_desig_eng_regional')
     condition_field = 'DESIG_TYPE'
     condition_crit = ['Regional']
 
@@ -1077,7 +1221,7 @@ def invalid_desig_type_regional(wdpa_df, return_pid=False):
     '''
 
     field = 'DESIG_TYPE'
-    field_allowed_values = ['Regional']
+    field_allowed_values = rule_values('ivd_desig_type_regional')
     condition_field = 'DESIG_ENG'
     condition_crit = ['Baltic Sea Protected Area (HELCOM)',
                       'Specially Protected Area (Cartagena Convention)',
@@ -1094,6 +1238,22 @@ def invalid_desig_type_regional(wdpa_df, return_pid=False):
 #### 4.6. Invalid INT_CRIT & DESIG_ENG  - Ramsar Site & World Heritage Sites ####
 #################################################################################
 
+# INT_CRIT is a strictly increasing sequence of criteria, e.g. '(i)(iii)(x)'.
+# Instead of listing all (>1000) combinations, values are validated by a regular
+# expression with one optional element per criterion, in order: a finite automaton
+# that grows linearly with the number of criteria.
+INT_CRIT_ELEMENTS = ['(i)','(ii)','(iii)','(iv)',
+                     '(v)','(vi)','(vii)','(viii)',
+                     '(ix)','(x)']
+INT_CRIT_PATTERN = re.compile(''.join(f'(?:{re.escape(element)})?' for element in INT_CRIT_ELEMENTS))
+
+def valid_int_crit(value):
+    '''
+    Return True if value is an ordered combination of INT_CRIT_ELEMENTS, e.g. '(i)(iii)'.
+    '''
+
+    return isinstance(value, str) and value != '' and INT_CRIT_PATTERN.fullmatch(value) is not None
+
 def invalid_int_crit_desig_eng_ramsar_whs(wdpa_df, return_pid=False):
     '''
     Return True if INT_CRIT is unequal to the allowed values (>1000 possible values)
@@ -1101,22 +1261,13 @@ def invalid_int_crit_desig_eng_ramsar_whs(wdpa_df, return_pid=False):
     Return list of WDPA_PIDs where INT_CRIT is invalid, if return_pid is set True
     '''
 
-    # Function to create the possible INT_CRIT combination
-    def generate_combinations():
-        import itertools
-        collection = []
-        INT_CRIT_ELEMENTS = ['(i)','(ii)','(iii)','(iv)',
-                             '(v)','(vi)','(vii)','(viii)',
-                             '(ix)','(x)']
-        for length_combi in range(1, len(INT_CRIT_ELEMENTS)+1): # for 1 - 10 elements
-            for combi in itertools.combinations(INT_CRIT_ELEMENTS, length_combi): # generate combinations
-                collection.append(''.join(combi)) # append to list, remove the '' in each combination
-        return collection
-
     # Arguments
     field = 'INT_CRIT'
-    field_allowed_values_extra = ['Not Reported']
-    field_allowed_values =  generate_combinations() + field_allowed_values_extra
+    field_allowed_values_extra = rule_values('ivd_int_crit')
+    # the allowed values are the distinct INT_CRIT values present that are valid
+    # combinations; each distinct value is only validated once, see wdpa.memo
+    valid = map_distinct(wdpa_df, field, valid_int_crit, key='valid_int_crit', na_value=False, dtype=bool)
+    field_allowed_values = list(pd.unique(wdpa_df[field].values[valid])) + field_allowed_values_extra
     condition_field = 'DESIG_ENG'
     condition_crit = ['Ramsar Site, Wetland of International Importance',
                       'World Heritage Site (natural or mixed)']
@@ -1134,10 +1285,7 @@ def invalid_desig_type(wdpa_df, return_pid=False):
     '''
 
     field = 'DESIG_TYPE'
-    field_allowed_values = ['National',
-                            'Regional',
-                            'International',
-                            'Not Applicable']
+    field_allowed_values = rule_values('ivd_desig_type')
     condition_field = ''
     condition_crit = []
 
@@ -1154,11 +1302,7 @@ def invalid_iucn_cat(wdpa_df, return_pid=False):
     '''
 
     field = 'IUCN_CAT'
-    field_allowed_values = ['Ia', 'Ib', 'II', 'III',
-                            'IV', 'V', 'VI',
-                            'Not Reported',
-                            'Not Applicable',
-                            'Not Assigned']
+    field_allowed_values = rule_values('ivd_iucn_cat')
     condition_field = ''
     condition_crit = []
 
@@ -1176,7 +1320,7 @@ def invalid_iucn_cat_unesco_whs(wdpa_df, return_pid=False):
     '''
 
     field = 'IUCN_CAT'
-    field_allowed_values = ['Not Applicable']
+    field_allowed_values = rule_values('ivd_iucn_cat_unesco_whs')
     condition_field = 'DESIG_ENG'
     condition_crit = ['UNESCO-MAB Biosphere Reserve',
                       'World Heritage Site (natural or mixed)']
@@ -1194,7 +1338,7 @@ def invalid_marine(wdpa_df, return_pid=False):
     '''
 
     field = 'MARINE'
-    field_allowed_values = ['0','1','2']
+    field_allowed_values = rule_values('ivd_marine')
     condition_field = ''
     condition_crit = []
 
@@ -1211,7 +1355,7 @@ def invalid_no_take_marine0(wdpa_df, return_pid=False):
     '''
 
     field = 'NO_TAKE'
-    field_allowed_values = ['Not Applicable']
+    field_allowed_values = rule_values('check_no_take_marine0')
     condition_field = 'MARINE'
     condition_crit = ['0']
 
@@ -1229,7 +1373,7 @@ def invalid_no_take_marine12(wdpa_df, return_pid=False):
     '''
 
     field = 'NO_TAKE'
-    field_allowed_values = ['All', 'Part', 'None', 'Not Reported']
+    field_allowed_values = rule_values('ivd_no_take_marine12')
     condition_field = 'MARINE'
     condition_crit = ['1', '2']
 
@@ -1246,7 +1390,7 @@ def invalid_no_tk_area_marine0(wdpa_df, return_pid=False):
     '''
 
     field = 'NO_TK_AREA'
-    field_allowed_values = [0]
+    field_allowed_values = rule_values('check_no_tk_area_marine0')
     condition_field = 'MARINE'
     condition_crit = ['0']
 
@@ -1263,7 +1407,7 @@ def invalid_no_tk_area_no_take(wdpa_df, return_pid=False):
     '''
 
     field = 'NO_TK_AREA'
-    field_allowed_values = [0]
+    field_allowed_values = rule_values('ivd_no_tk_area_no_take')
     condition_field = 'NO_TAKE'
     condition_crit = ['Not Applicable']
 
@@ -1283,7 +1427,7 @@ def invalid_status(wdpa_df, return_pid=False):
     '''
 
     field = 'STATUS'
-    field_allowed_values = ['Proposed', 'Designated', 'Established']
+    field_allowed_values = rule_values('ivd_status')
     condition_field = 'DESIG_ENG'
     condition_crit = ['World Heritage Site (natural or mixed)',
                       'Specially Protected Areas of Mediterranean Importance (Barcelona Convention)']
@@ -1304,7 +1448,7 @@ def invalid_status_WH(wdpa_df, return_pid=False):
     '''
 
     field = 'STATUS'
-    field_allowed_values = ["Proposed", "Inscribed"]
+    field_allowed_values = rule_values('ivd_status_WH')
     condition_field = 'DESIG_ENG'
     condition_crit = ['World Heritage Site (natural or mixed)']
 
@@ -1324,7 +1468,7 @@ def invalid_status_Barca(wdpa_df, return_pid=False):
     '''
 
     field = 'STATUS'
-    field_allowed_values = ["Proposed", "Adopted"]
+    field_allowed_values = rule_values('ivd_status_BarcelonaConv')
     condition_field = 'DESIG_ENG'
     condition_crit = ['Specially Protected Areas of Mediterranean Importance (Barcelona Convention)']
 
@@ -1339,16 +1483,43 @@ def invalid_status_yr(wdpa_df, return_pid=False):
     '''
     Return True if STATUS_YR is unequal to 0 or any year between 1750 and the current year
     Return list of WDPA_PIDs where STATUS_YR is invalid, if return_pid is set True
+
+    Note: STATUS_YR values that are not integers are captured by invalid_status_yr_format.
     '''
 
     field = 'STATUS_YR'
     year = datetime.date.today().year # obtain current year
-    yearArray = [0] + np.arange(1750, year + 1, 1).tolist() # make a list of all years, from 0 to current year
-    field_allowed_values = [str(x) for x in yearArray] # change all integers to strings
-    condition_field = ''
-    condition_crit = []
+    first_year = rule('first_status_yr')
 
-    return invalid_value_in_field(wdpa_df, field, field_allowed_values, condition_field, condition_crit, return_pid)
+    # compare the years as integers, parsed once per table (see wdpa.columns)
+    status_yr, parse_error = typed_column(wdpa_df, field)
+    invalid = ((status_yr < first_year) | (status_yr > year)) & (status_yr != 0)
+    invalid_wdpa_pid = wdpa_df[invalid.fillna(False).astype(bool).values]['WDPA_PID'].values
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+#########################################
+#### 4.16.a Invalid STATUS_YR format ####
+#########################################
+
+def invalid_status_yr_format(wdpa_df, return_pid=False):
+    '''
+    Return True if STATUS_YR is missing or is not an integer, e.g. 'unknown' or '1990.5'
+    Return list of WDPA_PIDs where STATUS_YR is not an integer, if return_pid is set True
+    '''
+
+    field = 'STATUS_YR'
+
+    status_yr, parse_error = typed_column(wdpa_df, field)
+    invalid_wdpa_pid = wdpa_df[(parse_error | status_yr.isna()).values]['WDPA_PID'].values
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
 
 ################################
 #### 4.17. Invalid GOV_TYPE ####
@@ -1361,18 +1532,7 @@ def invalid_gov_type(wdpa_df, return_pid=False):
     '''
 
     field = 'GOV_TYPE'
-    field_allowed_values = ['Federal or national ministry or agency',
-                            'Sub-national ministry or agency',
-                            'Government-delegated management',
-                            'Transboundary governance',
-                            'Collaborative governance',
-                            'Joint governance',
-                            'Individual landowners',
-                            'Non-profit organisations',
-                            'For-profit organisations',
-                            'Indigenous peoples',
-                            'Local communities',
-                            'Not Reported']
+    field_allowed_values = rule_values('ivd_gov_type')
 
     condition_field = ''
     condition_crit = []
@@ -1390,15 +1550,7 @@ def invalid_own_type(wdpa_df, return_pid=False):
     '''
 
     field = 'OWN_TYPE'
-    field_allowed_values = ['State',
-                            'Communal',
-                            'Individual landowners',
-                            'For-profit organisations',
-                            'Non-profit organisations',
-                            'Joint ownership',
-                            'Multiple ownership',
-                            'Contested',
-                            'Not Reported']
+    field_allowed_values = rule_values('ivd_own_type')
     condition_field = ''
     condition_crit = []
 
@@ -1415,9 +1567,7 @@ def invalid_verif(wdpa_df, return_pid=False):
     '''
 
     field = 'VERIF'
-    field_allowed_values = ['State Verified',
-                            'Expert Verified',
-                            'Not Reported']
+    field_allowed_values = rule_values('ivd_verif')
     condition_field = ''
     condition_crit = []
 
@@ -1428,6 +1578,8 @@ def invalid_verif(wdpa_df, return_pid=False):
 ###################################
 def invalid_country_codes(wdpa_df, field, return_pid=False):
 
+    iso3 = get_iso3()
+
     def _correct_iso3(field):
         for each in field.split(';'):
             if each in iso3:
@@ -1437,7 +1589,9 @@ def invalid_country_codes(wdpa_df, field, return_pid=False):
 
         return True
 
-    invalid_wdpa_pid = wdpa_df[~wdpa_df[field].apply(_correct_iso3)]['WDPA_PID'].values
+    # each distinct value of field is only checked once, see wdpa.memo
+    correct = map_distinct(wdpa_df, field, _correct_iso3, key=('correct_iso3', iso3), na_value=False, dtype=bool)
+    invalid_wdpa_pid = wdpa_df[~correct]['WDPA_PID'].values
 
     if return_pid:
         return invalid_wdpa_pid
@@ -1449,6 +1603,22 @@ def invalid_parent_iso3(wdpa_df, return_pid=False):
 
     return invalid_country_codes(wdpa_df, 'PARENT_ISO3', return_pid)
 
+def country_code_columns(field):
+    '''
+    Return the function adding the codes of field not in the ISO3 list to the
+    output of invalid_country_codes, as invalid_<field>, e.g. invalid_ISO3.
+    A missing value, or an empty code (e.g. 'NLD;'), is given as '<missing>'.
+    '''
+
+    def columns(rows, wdpa_df=None):
+        iso3 = get_iso3()
+        invalid = map_values(rows[field].values,
+                             lambda value: ';'.join(each or '<missing>' for each in value.split(';') if each not in iso3),
+                             key=('invalid_iso3', iso3), na_value='<missing>')
+        return pd.DataFrame({f'invalid_{field}': invalid}, index=rows.index)
+
+    return columns
+
 ############################
 #### 4.21. Invalid ISO3 ####
 ############################
@@ -1468,7 +1638,7 @@ def invalid_status_desig_type(wdpa_df, return_pid=False):
     '''
 
     field = 'STATUS'
-    field_allowed_values = ['Established']
+    field_allowed_values = rule_values('ivd_status_desig_type')
     condition_field = 'DESIG_TYPE'
     condition_crit = ['Not Applicable']
 
@@ -1507,7 +1677,7 @@ def area_invalid_size(wdpa_df, field_small_area, field_large_area, return_pid=Fa
         return_pid=True):
     '''
 
-    size_threshold = 1.0001 # due to the rounding of numbers, there are many false positives without a threshold.
+    size_threshold = rule('area_size_threshold') # due to the rounding of numbers, there are many false positives without a threshold.
 
     if field_small_area and field_large_area:
         invalid_wdpa_pid = wdpa_df[wdpa_df[field_small_area] >
@@ -1589,7 +1759,7 @@ def area_invalid_rep_m_area_rep_area(wdpa_df, return_pid=False):
 
 #### Factory Function ####
 
-def forbidden_character(wdpa_df, check_field, return_pid=False):
+def forbidden_character(wdpa_df, check_field, return_pid=False, key='WDPA_PID'):
     '''
     Factory Function: this generic function is to be linked to
     the family of 'forbidden character' input functions stated below. These latter
@@ -1606,6 +1776,8 @@ def forbidden_character(wdpa_df, check_field, return_pid=False):
 
     ## Arguments ##
     check_field -- string of the field to check for forbidden characters
+    key --         the field identifying the rows returned, or None to return their row
+                   positions, see offending_rows
 
     ## Example ##
     forbidden_character(
@@ -1615,21 +1787,39 @@ def forbidden_character(wdpa_df, check_field, return_pid=False):
     '''
 
     # Import regular expression package and the forbidden characters
-    forbidden_characters = ['<','>','?','*','\r','\n']
+    forbidden_characters = rule_values('forbidden_characters')
     forbidden_characters_esc = [re.escape(s) for s in forbidden_characters]
 
     pattern = '|'.join(forbidden_characters_esc)
+    compiled = re.compile(pattern, re.IGNORECASE)
 
-    # Obtain the WDPA_PIDs with forbidden characters
-    # remove those with nas
-    wdpa_df = wdpa_df.dropna()
-    invalid_wdpa_pid = wdpa_df[wdpa_df[check_field].str.contains(pattern, case=False)]['WDPA_PID'].values
+    # Obtain the WDPA_PIDs with forbidden characters, searched once per distinct value
+    # of the field to check (see wdpa.memo); nas have no forbidden characters
+    contains = map_distinct(wdpa_df, check_field, lambda value: isinstance(value, str) and compiled.search(value) is not None,
+                            key=('forbidden_character', pattern), na_value=False, dtype=bool)
+    invalid_wdpa_pid = offending_rows(wdpa_df, contains, key)
 
     if return_pid:
         return invalid_wdpa_pid
 
     return len(invalid_wdpa_pid) > 0
 
+def forbidden_character_columns(check_field):
+    '''
+    Return the function adding the forbidden characters found in check_field to
+    the output of forbidden_character, as forbidden_characters.
+    '''
+
+    def columns(rows, wdpa_df=None):
+        forbidden_characters = rule_values('forbidden_characters')
+        pattern = '|'.join(re.escape(s) for s in forbidden_characters)
+        compiled = re.compile(pattern, re.IGNORECASE)
+        found = map_values(rows[check_field].values, lambda value: ' '.join(dict.fromkeys(compiled.findall(str(value)))),
+                           key=('forbidden_characters', pattern), na_value='')
+        return pd.DataFrame({'forbidden_characters': found}, index=rows.index)
+
+    return columns
+
 #### Input functions ####
 
 #########################################
@@ -1750,7 +1940,7 @@ def forbidden_character_sub_loc(wdpa_df, return_pid=False):
 
 #### Factory Function ####
 
-def nan_present(wdpa_df, check_field, return_pid=False):
+def nan_present(wdpa_df, check_field, return_pid=False, key='WDPA_PID'):
     '''
     Factory Function: this generic function is to be linked to
     the family of 'nan_present' input functions stated below. These latter
@@ -1767,6 +1957,8 @@ def nan_present(wdpa_df, check_field, return_pid=False):
 
     ## Arguments ##
     check_field -- string of field to be checked for NaN / NA values
+    key --         the field identifying the rows returned, or None to return their row
+                   positions, see offending_rows
 
     ## Example ##
     na_present(
@@ -1775,7 +1967,7 @@ def nan_present(wdpa_df, check_field, return_pid=False):
         return_pid=True):
     '''
 
-    invalid_wdpa_pid = wdpa_df[pd.isna(wdpa_df[check_field])]['WDPA_PID'].values
+    invalid_wdpa_pid = offending_rows(wdpa_df, pd.isna(wdpa_df[check_field]), key)
 
     if return_pid:
         return invalid_wdpa_pid
@@ -1976,92 +2168,512 @@ def ivd_nan_present_metadataid(wdpa_df, return_pid=False):
 
 #     return len(invalid_metadataid) > 0
 
+#############################################################################
+#### 9. Integrity checks across the Polygon, Point and Source Table data ####
+#############################################################################
+
+# These checks compare the tables with each other, and return the offending rows
+# of one of the tables. They are run by wdpa.runner.run_integrity_checks.
+
+#########################################################
+#### 9.1. WDPAID present in both Polygons and Points ####
+#########################################################
+
+def integrity_rows(wdpa_df, positions):
+    '''
+    Return the rows at positions of the Polygons or Points wdpa_df, with the
+    INPUT_FIELDS_INTEGRITY only, whichever other fields were loaded, e.g. for
+    the polygon checks in combined.py.
+    '''
+
+    return wdpa_df.iloc[positions][[field for field in INPUT_FIELDS_INTEGRITY if field in wdpa_df.columns]]
+
+
+def overlap_wdpaid(poly_df, pt_df, meta_df):
+    '''
+    Return the polygons whose WDPAID is also present in the points
+    '''
+
+    # rows are looked up in the indexes of the key fields, see wdpa.index
+    overlap = np.intersect1d(poly_df['WDPAID'].values, pt_df['WDPAID'].values)
+
+    return integrity_rows(poly_df, find_rows(poly_df, 'WDPAID', overlap))
+
+###########################################################
+#### 9.2. WDPA_PID present in both Polygons and Points ####
+###########################################################
+
+def overlap_wdpa_pid(poly_df, pt_df, meta_df):
+    '''
+    Return the polygons whose WDPA_PID is also present in the points
+    '''
+
+    overlap = np.intersect1d(poly_df['WDPA_PID'].values, pt_df['WDPA_PID'].values)
+
+    return integrity_rows(poly_df, find_rows(poly_df, 'WDPA_PID', overlap))
+
+######################################################################
+#### 9.3. METADATAID present in the WDPA, not in the Source Table ####
+######################################################################
+
+def metaid_only_in_data(poly_df, pt_df, meta_df):
+    '''
+    Return the polygons whose METADATAID is present in the Polygons or Points,
+    but not in the Source Table
+    '''
+
+    indata_meta = np.union1d(poly_df['METADATAID'].values, pt_df['METADATAID'].values)
+    only_in_data = np.setdiff1d(indata_meta, meta_df['METADATAID'].values)
+
+    return integrity_rows(poly_df, find_rows(poly_df, 'METADATAID', only_in_data))
+
+######################################################################
+#### 9.4. METADATAID present in the Source Table, not in the WDPA ####
+######################################################################
+
+def metaid_only_in_metadata(poly_df, pt_df, meta_df):
+    '''
+    Return the Source Table rows whose METADATAID is neither present in the Polygons nor in the Points
+    '''
+
+    indata_meta = np.union1d(poly_df['METADATAID'].values, pt_df['METADATAID'].values)
+    only_in_metadata = np.setdiff1d(meta_df['METADATAID'].values, indata_meta)
+
+    return meta_df.iloc[find_rows(meta_df, 'METADATAID', only_in_metadata)]
+
+#################################
+#### 10. Source Table checks ####
+#################################
+
+# These checks are run on the Source Table (see meta_checks). The offending rows
+# are identified by METADATAID instead of WDPA_PID ('key': 'METADATAID'). As the
+# METADATAID of a row may be duplicate, the checks of single rows return the row
+# positions of the offending rows ('positions': True) instead of their METADATAIDs.
+
+#####################################
+#### 10.1. Duplicate METADATAIDs ####
+#####################################
+
+def duplicate_metadataid(meta_df, return_pid=False):
+    '''
+    Return True if METADATAID is duplicate in the Source Table
+    Return list of duplicate METADATAIDs, if return_pid is set True
+    '''
+
+    ids = meta_df['METADATAID']
+    invalid_metadataid = ids[ids.duplicated()].unique()
+
+    if return_pid:
+        return invalid_metadataid
+
+    return len(invalid_metadataid) > 0
+
+##########################################
+#### 10.2. Invalid YEAR and UPDATE_YR ####
+##########################################
+
+#### Factory Function ####
+
+def invalid_source_year(meta_df, field, return_pid=False):
+    '''
+    Return True if the year in field is missing, is not an integer, or is not
+    between 1750 (rule 'first_source_yr') and the current year
+    Return the row positions where the year is invalid, if return_pid is set True
+
+    ## Arguments ##
+    field -- string of the field holding a year, e.g. 'YEAR'
+    '''
+
+    year = datetime.date.today().year # obtain current year
+    first_year = rule('first_source_yr')
+
+    # compare the years as integers, parsed once per table (see wdpa.columns)
+    values, parse_error = typed_column(meta_df, field)
+    out_of_range = ((values < first_year) | (values > year)).fillna(False).astype(bool)
+    invalid = parse_error.values | values.isna().values | out_of_range.values
+    invalid_rows = offending_rows(meta_df, invalid, key=None)
+
+    if return_pid:
+        return invalid_rows
+
+    return len(invalid_rows) > 0
+
+#### Input functions ####
+
+def invalid_source_year_year(meta_df, return_pid=False):
+    '''
+    Capture invalid years in the field 'YEAR'
+    '''
+
+    return invalid_source_year(meta_df, 'YEAR', return_pid)
+
+def invalid_source_year_update_yr(meta_df, return_pid=False):
+    '''
+    Capture invalid years in the field 'UPDATE_YR'
+    '''
+
+    return invalid_source_year(meta_df, 'UPDATE_YR', return_pid)
+
+##############################################
+#### 10.3. Invalid: UPDATE_YR before YEAR ####
+##############################################
+
+def invalid_update_yr_before_year(meta_df, return_pid=False):
+    '''
+    Return True if the data set was updated (UPDATE_YR) before it was published (YEAR)
+    Return the row positions where UPDATE_YR is before YEAR, if return_pid is set True
+    '''
+
+    year, year_error = typed_column(meta_df, 'YEAR')
+    update_yr, update_yr_error = typed_column(meta_df, 'UPDATE_YR')
+    invalid = (update_yr < year).fillna(False).astype(bool)
+    invalid_rows = offending_rows(meta_df, invalid.values, key=None)
+
+    if return_pid:
+        return invalid_rows
+
+    return len(invalid_rows) > 0
+
+#############################################
+#### 10.4. Invalid LANGUAGE and CHAR_SET ####
+#############################################
+
+def invalid_source_language(meta_df, return_pid=False):
+    '''
+    Return True if LANGUAGE is not one of the languages of the rule 'check_meta_language'
+    Return the row positions where LANGUAGE is invalid, if return_pid is set True
+    '''
+
+    field = 'LANGUAGE'
+    field_allowed_values = rule_values('check_meta_language')
+
+    return invalid_value_in_field(meta_df, field, field_allowed_values, '', [], return_pid, key=None)
+
+def invalid_source_char_set(meta_df, return_pid=False):
+    '''
+    Return True if CHAR_SET is not one of the character sets of the rule 'check_meta_char_set'
+    Return the row positions where CHAR_SET is invalid, if return_pid is set True
+    '''
+
+    field = 'CHAR_SET'
+    field_allowed_values = rule_values('check_meta_char_set')
+
+    return invalid_value_in_field(meta_df, field, field_allowed_values, '', [], return_pid, key=None)
+
+########################################################
+#### 10.5. Forbidden characters in the Source Table ####
+########################################################
+
+def forbidden_character_source_data_title(meta_df, return_pid=False):
+    '''
+    Capture forbidden characters in the field 'DATA_TITLE' of the Source Table
+    '''
+
+    return forbidden_character(meta_df, 'DATA_TITLE', return_pid, key=None)
+
+def forbidden_character_source_resp_party(meta_df, return_pid=False):
+    '''
+    Capture forbidden characters in the field 'RESP_PARTY' of the Source Table
+    '''
+
+    return forbidden_character(meta_df, 'RESP_PARTY', return_pid, key=None)
+
+def forbidden_character_source_verifier(meta_df, return_pid=False):
+    '''
+    Capture forbidden characters in the field 'VERIFIER' of the Source Table
+    '''
+
+    return forbidden_character(meta_df, 'VERIFIER', return_pid, key=None)
+
+def forbidden_character_source_citation(meta_df, return_pid=False):
+    '''
+    Capture forbidden characters in the field 'CITATION' of the Source Table
+    '''
+
+    return forbidden_character(meta_df, 'CITATION', return_pid, key=None)
+
+###############################################
+#### 10.6. NaN present in the Source Table ####
+###############################################
+
+def nan_present_source_data_title(meta_df, return_pid=False):
+    '''
+    Capture NaN / NA in the field 'DATA_TITLE' of the Source Table
+    '''
+
+    return nan_present(meta_df, 'DATA_TITLE', return_pid, key=None)
+
+def nan_present_source_resp_party(meta_df, return_pid=False):
+    '''
+    Capture NaN / NA in the field 'RESP_PARTY' of the Source Table
+    '''
+
+    return nan_present(meta_df, 'RESP_PARTY', return_pid, key=None)
+
+def nan_present_source_citation(meta_df, return_pid=False):
+    '''
+    Capture NaN / NA in the field 'CITATION' of the Source Table
+    '''
+
+    return nan_present(meta_df, 'CITATION', return_pid, key=None)
+
+################################################
+#### 11. Similar names of different WDPAIDs ####
+################################################
+
+# The same protected area submitted twice under different WDPAIDs, with a slightly
+# different spelling. The names are only compared within the same ISO3 and
+# DESIG_ENG, see wdpa.names
+
+#### Factory Function ####
+
+def similar_name_different_wdpaid(wdpa_df, field, return_pid=False):
+    '''
+    Return True if the value of field is the same as or similar to the value of
+    a record with another WDPAID, in the same ISO3 and with the same DESIG_ENG,
+    ignoring the words of their DESIG and DESIG_ENG
+    Return list of WDPA_PIDs with similar values, if return_pid is set True
+
+    ## Arguments ##
+    field -- string of the field holding names, e.g. 'NAME'
+    '''
+
+    positions, matches = similar_names(wdpa_df, field)
+    invalid_wdpa_pid = wdpa_df['WDPA_PID'].values[positions]
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+def similar_name_columns(field):
+    '''
+    Return the function adding the most similar WDPAID, its value of field and
+    the similarity to the output of similar_name_different_wdpaid.
+    '''
+
+    def columns(rows, wdpa_df=None):
+        # both records of a similar pair are offending rows, so the pairs are found again among these
+        positions, matches = similar_names(rows, field)
+        return matches.set_axis(positions).reindex(np.arange(len(rows))).set_axis(rows.index)
+
+    return columns
+
+#### Input functions ####
+
+############################
+#### 11.1. Similar NAME ####
+############################
+
+def similar_name_dif_wdpaid(wdpa_df, return_pid=False):
+    '''
+    Capture records with the same or a similar NAME as a record with another WDPAID
+    '''
+
+    return similar_name_different_wdpaid(wdpa_df, 'NAME', return_pid)
+
+#################################
+#### 11.2. Similar ORIG_NAME ####
+#################################
+
+def similar_orig_name_dif_wdpaid(wdpa_df, return_pid=False):
+    '''
+    Capture records with the same or a similar ORIG_NAME as a record with another WDPAID
+    '''
+
+    return similar_name_different_wdpaid(wdpa_df, 'ORIG_NAME', return_pid)
+
+############################################
+#### 12. Encoding and Unicode anomalies ####
+############################################
+
+# Mojibake, text that is not Unicode NFC, zero-width and control characters, and
+# stray whitespace. Each distinct value of a field is classified once, see wdpa.text
+
+#### Factory Function ####
+
+def text_anomaly(wdpa_df, check_field, return_pid=False, key='WDPA_PID'):
+    '''
+    Return True if a value of check_field holds an encoding or Unicode anomaly
+    Return list of WDPA_PIDs with anomalies, if return_pid is set True
+
+    ## Arguments ##
+    check_field -- string of the field to check for anomalies
+    key --         the field identifying the rows returned, or None to return their row
+                   positions, see offending_rows
+
+    ## Example ##
+    text_anomaly(
+        wdpa_df,
+        check_field="NAME",
+        return_pid=True):
+    '''
+
+    anomalies = map_distinct(wdpa_df, check_field, lambda value: text_anomalies(str(value)), key='text_anomalies', na_value='')
+    invalid_wdpa_pid = offending_rows(wdpa_df, anomalies != '', key)
+
+    if return_pid:
+        return invalid_wdpa_pid
+
+    return len(invalid_wdpa_pid) > 0
+
+def text_anomaly_columns(field):
+    '''
+    Return the function adding the anomalies of field (text_anomalies) to the output of text_anomaly.
+    '''
+
+    def columns(rows, wdpa_df=None):
+        anomalies = map_distinct(rows, field, lambda value: text_anomalies(str(value)), key='text_anomalies', na_value='')
+        return pd.DataFrame({'text_anomalies': anomalies}, index=rows.index)
+
+    return columns
+
+#### Input functions ####
+
+#####################################
+#### 12.1. Text anomalies - NAME ####
+#####################################
+
+def text_anomaly_name(wdpa_df, return_pid=False):
+    '''
+    Capture encoding and Unicode anomalies in the field 'NAME'
+    '''
+
+    return text_anomaly(wdpa_df, 'NAME', return_pid)
+
+##########################################
+#### 12.2. Text anomalies - ORIG_NAME ####
+##########################################
+
+def text_anomaly_orig_name(wdpa_df, return_pid=False):
+    '''
+    Capture encoding and Unicode anomalies in the field 'ORIG_NAME'
+    '''
+
+    return text_anomaly(wdpa_df, 'ORIG_NAME', return_pid)
+
+######################################
+#### 12.3. Text anomalies - DESIG ####
+######################################
+
+def text_anomaly_desig(wdpa_df, return_pid=False):
+    '''
+    Capture encoding and Unicode anomalies in the field 'DESIG'
+    '''
+
+    return text_anomaly(wdpa_df, 'DESIG', return_pid)
+
+##########################################
+#### 12.4. Text anomalies - MANG_AUTH ####
+##########################################
+
+def text_anomaly_mang_auth(wdpa_df, return_pid=False):
+    '''
+    Capture encoding and Unicode anomalies in the field 'MANG_AUTH'
+    '''
+
+    return text_anomaly(wdpa_df, 'MANG_AUTH', return_pid)
+
 ############################################################################################
 #### Below is a dictionary that holds all checks' descriptive (as displayed in Excel)   ####
 #### and script function names (as displayed in this script, qa.py).                    ####
 #### These checks are subsequently called by the main functions, poly.py and point.py,  ####
 #### to run all checks on the WDPA input feature class attribute table.                 ####
+#### 'fields' lists the WDPA fields each check reads (WDPA_PID is always loaded), so    ####
+#### that only the columns needed by the selected checks are imported.                  ####
+#### 'features' lists the intermediate results a check shares with other checks.        ####
+#### 'columns' adds the values explaining each flag to its output: it is called with    ####
+#### the offending rows and the whole table (for thresholds computed on all rows).      ####
+#### 'scope': 'table' marks checks that compare rows with other rows (e.g. same WDPAID) ####
+#### or with statistics of the whole table; the others can be run on chunks of rows.    ####
+#### 'key' is the field identifying the rows a check returns; WDPA_PID if not given.    ####
+#### 'positions': True marks checks returning row positions instead of key values.      ####
 ############################################################################################
 
 # Checks to be run for both point and polygon data
 core_checks = [
-{'name': 'duplicate_wdpa_pid', 'func': duplicate_wdpa_pid},
-{'name': 'tiny_rep_area', 'func': area_invalid_rep_area},
-{'name': 'zero_rep_m_area_marine12', 'func': area_invalid_rep_m_area_marine12},
-{'name': 'ivd_rep_m_area_gt_rep_area', 'func': area_invalid_rep_m_area_rep_area},
-{'name': 'ivd_no_tk_area_gt_rep_m_area', 'func': area_invalid_no_tk_area_rep_m_area},
-{'name': 'ivd_no_tk_area_rep_m_area', 'func': invalid_no_take_no_tk_area_rep_m_area},
-{'name': 'ivd_int_crit_desig_eng_other', 'func': invalid_int_crit_desig_eng_other},
-{'name': 'ivd_desig_eng_iucn_cat_other', 'func': invalid_desig_eng_iucn_cat_other},
-{'name': 'dif_name_same_id', 'func': inconsistent_name_same_wdpaid},
-{'name': 'dif_orig_name_same_id', 'func': inconsistent_orig_name_same_wdpaid},
-{'name': 'ivd_dif_desig_same_id', 'func': inconsistent_desig_same_wdpaid},
-{'name': 'ivd_dif_desig_eng_same_id', 'func': inconsistent_desig_eng_same_wdpaid},
-{'name': 'dif_desig_type_same_id', 'func': inconsistent_desig_type_same_wdpaid},
-{'name': 'dif_int_crit_same_id', 'func': inconsistent_int_crit_same_wdpaid},
-{'name': 'dif_no_take_same_id', 'func': inconsistent_no_take_same_wdpaid},
-{'name': 'dif_status_same_id', 'func': inconsistent_status_same_wdpaid},
-{'name': 'dif_status_yr_same_id', 'func': inconsistent_status_yr_same_wdpaid},
-{'name': 'dif_gov_type_same_id', 'func': inconsistent_gov_type_same_wdpaid},
-{'name': 'dif_own_type_same_id', 'func': inconsistent_own_type_same_wdpaid},
-{'name': 'dif_mang_auth_same_id', 'func': inconsistent_mang_auth_same_wdpaid},
-{'name': 'dif_mang_plan_same_id', 'func': inconsistent_mang_plan_same_wdpaid},
-{'name': 'ivd_dif_verif_same_id', 'func': inconsistent_verif_same_wdpaid},
-{'name': 'ivd_dif_metadataid_same_id', 'func': inconsistent_metadataid_same_wdpaid},
-{'name': 'ivd_dif_sub_loc_same_id', 'func': inconsistent_sub_loc_same_wdpaid},
-{'name': 'ivd_dif_parent_iso3_same_id', 'func': inconsistent_parent_iso3_same_wdpaid},
-{'name': 'ivd_dif_iso3_same_id', 'func': inconsistent_iso3_same_wdpaid},
-{'name': 'ivd_pa_def', 'func': invalid_pa_def},
-{'name': 'ivd_desig_eng_international', 'func': invalid_desig_eng_international},
-{'name': 'ivd_desig_type_international', 'func': invalid_desig_type_international},
-{'name': 'ivd_desig_eng_regional', 'func': invalid_desig_eng_regional},
-{'name': 'ivd_desig_type_regional', 'func': invalid_desig_type_regional},
-{'name': 'ivd_int_crit', 'func': invalid_int_crit_desig_eng_ramsar_whs},
-{'name': 'ivd_desig_type', 'func': invalid_desig_type},
-{'name': 'ivd_iucn_cat', 'func': invalid_iucn_cat},
-{'name': 'ivd_iucn_cat_unesco_whs', 'func': invalid_iucn_cat_unesco_whs},
-{'name': 'ivd_marine', 'func': invalid_marine},
-{'name': 'check_no_take_marine0', 'func': invalid_no_take_marine0},
-{'name': 'ivd_no_take_marine12', 'func': invalid_no_take_marine12},
-{'name': 'check_no_tk_area_marine0', 'func': invalid_no_tk_area_marine0},
-{'name': 'ivd_no_tk_area_no_take', 'func': invalid_no_tk_area_no_take},
-{'name': 'ivd_status', 'func': invalid_status},
-{'name': 'ivd_status_WH', 'func': invalid_status_WH},
-{'name': 'ivd_status_BarcelonaConv', 'func': invalid_status_Barca},
-{'name': 'ivd_status_yr', 'func': invalid_status_yr},
-{'name': 'ivd_gov_type', 'func': invalid_gov_type},
-{'name': 'ivd_own_type', 'func': invalid_own_type},
-{'name': 'ivd_verif', 'func': invalid_verif},
-{'name': 'check_parent_iso3', 'func': invalid_parent_iso3},
-{'name': 'check_iso3', 'func': invalid_iso3},
-{'name': 'ivd_status_desig_type', 'func': invalid_status_desig_type},
-{'name': 'ivd_character_name', 'func': forbidden_character_name},
-{'name': 'ivd_character_orig_name', 'func': forbidden_character_orig_name},
-{'name': 'ivd_character_desig', 'func': forbidden_character_desig},
-{'name': 'ivd_character_desig_eng', 'func': forbidden_character_desig_eng},
-{'name': 'ivd_character_mang_auth', 'func': forbidden_character_mang_auth},
-{'name': 'ivd_character_mang_plan', 'func': forbidden_character_mang_plan},
-{'name': 'ivd_character_sub_loc', 'func': forbidden_character_sub_loc},
-{'name': 'ivd_nan_present_name', 'func': ivd_nan_present_name},
-{'name': 'ivd_nan_present_orig_name', 'func': ivd_nan_present_orig_name},
-{'name': 'ivd_nan_present_desig', 'func': ivd_nan_present_desig},
-{'name': 'ivd_nan_present_desig_eng', 'func': ivd_nan_present_desig_eng},
-{'name': 'ivd_nan_present_mang_auth', 'func': ivd_nan_present_mang_auth},
-{'name': 'ivd_nan_present_mang_plan', 'func': ivd_nan_present_mang_plan},
-{'name': 'ivd_nan_present_sub_loc', 'func': ivd_nan_present_sub_loc},
-{'name': 'ivd_nan_present_metadataid', 'func': ivd_nan_present_metadataid}]
+{'name': 'duplicate_wdpa_pid', 'func': duplicate_wdpa_pid, 'fields': ['WDPA_PID'], 'scope': 'table'},
+{'name': 'tiny_rep_area', 'func': area_invalid_rep_area, 'fields': ['REP_AREA']},
+{'name': 'zero_rep_m_area_marine12', 'func': area_invalid_rep_m_area_marine12, 'fields': ['REP_M_AREA', 'MARINE'], 'features': ['marine12']},
+{'name': 'ivd_rep_m_area_gt_rep_area', 'func': area_invalid_rep_m_area_rep_area, 'fields': ['REP_M_AREA', 'REP_AREA']},
+{'name': 'ivd_no_tk_area_gt_rep_m_area', 'func': area_invalid_no_tk_area_rep_m_area, 'fields': ['NO_TK_AREA', 'REP_M_AREA']},
+{'name': 'ivd_no_tk_area_rep_m_area', 'func': invalid_no_take_no_tk_area_rep_m_area, 'fields': ['NO_TAKE', 'REP_M_AREA', 'NO_TK_AREA']},
+{'name': 'ivd_int_crit_desig_eng_other', 'func': invalid_int_crit_desig_eng_other, 'fields': ['DESIG_ENG', 'INT_CRIT'], 'features': ['desig_eng_ramsar_whs']},
+{'name': 'ivd_desig_eng_iucn_cat_other', 'func': invalid_desig_eng_iucn_cat_other, 'fields': ['IUCN_CAT', 'DESIG_ENG'], 'features': ['desig_eng_unesco_whs']},
+{'name': 'dif_name_same_id', 'func': inconsistent_name_same_wdpaid, 'fields': ['WDPAID', 'NAME'], 'scope': 'table'},
+{'name': 'dif_orig_name_same_id', 'func': inconsistent_orig_name_same_wdpaid, 'fields': ['WDPAID', 'ORIG_NAME'], 'scope': 'table'},
+{'name': 'ivd_dif_desig_same_id', 'func': inconsistent_desig_same_wdpaid, 'fields': ['WDPAID', 'DESIG'], 'scope': 'table'},
+{'name': 'ivd_dif_desig_eng_same_id', 'func': inconsistent_desig_eng_same_wdpaid, 'fields': ['WDPAID', 'DESIG_ENG'], 'scope': 'table'},
+{'name': 'dif_desig_type_same_id', 'func': inconsistent_desig_type_same_wdpaid, 'fields': ['WDPAID', 'DESIG_TYPE'], 'scope': 'table'},
+{'name': 'dif_int_crit_same_id', 'func': inconsistent_int_crit_same_wdpaid, 'fields': ['WDPAID', 'INT_CRIT'], 'scope': 'table'},
+{'name': 'dif_no_take_same_id', 'func': inconsistent_no_take_same_wdpaid, 'fields': ['WDPAID', 'NO_TAKE'], 'scope': 'table'},
+{'name': 'dif_status_same_id', 'func': inconsistent_status_same_wdpaid, 'fields': ['WDPAID', 'STATUS'], 'scope': 'table'},
+{'name': 'dif_status_yr_same_id', 'func': inconsistent_status_yr_same_wdpaid, 'fields': ['WDPAID', 'STATUS_YR'], 'scope': 'table'},
+{'name': 'dif_gov_type_same_id', 'func': inconsistent_gov_type_same_wdpaid, 'fields': ['WDPAID', 'GOV_TYPE'], 'scope': 'table'},
+{'name': 'dif_own_type_same_id', 'func': inconsistent_own_type_same_wdpaid, 'fields': ['WDPAID', 'OWN_TYPE'], 'scope': 'table'},
+{'name': 'dif_mang_auth_same_id', 'func': inconsistent_mang_auth_same_wdpaid, 'fields': ['WDPAID', 'MANG_AUTH'], 'scope': 'table'},
+{'name': 'dif_mang_plan_same_id', 'func': inconsistent_mang_plan_same_wdpaid, 'fields': ['WDPAID', 'MANG_PLAN'], 'scope': 'table'},
+{'name': 'ivd_dif_verif_same_id', 'func': inconsistent_verif_same_wdpaid, 'fields': ['WDPAID', 'VERIF'], 'scope': 'table'},
+{'name': 'ivd_dif_metadataid_same_id', 'func': inconsistent_metadataid_same_wdpaid, 'fields': ['WDPAID', 'METADATAID'], 'scope': 'table'},
+{'name': 'ivd_dif_sub_loc_same_id', 'func': inconsistent_sub_loc_same_wdpaid, 'fields': ['WDPAID', 'SUB_LOC'], 'scope': 'table'},
+{'name': 'ivd_dif_parent_iso3_same_id', 'func': inconsistent_parent_iso3_same_wdpaid, 'fields': ['WDPAID', 'PARENT_ISO3'], 'scope': 'table'},
+{'name': 'ivd_dif_iso3_same_id', 'func': inconsistent_iso3_same_wdpaid, 'fields': ['WDPAID', 'ISO3'], 'scope': 'table'},
+{'name': 'ivd_pa_def', 'func': invalid_pa_def, 'fields': ['PA_DEF']},
+{'name': 'ivd_desig_eng_international', 'func': invalid_desig_eng_international, 'fields': ['DESIG_ENG', 'DESIG_TYPE'], 'features': ['desig_eng_international']},
+{'name': 'ivd_desig_type_international', 'func': invalid_desig_type_international, 'fields': ['DESIG_TYPE', 'DESIG_ENG'], 'features': ['desig_eng_international']},
+{'name': 'ivd_desig_eng_regional', 'func': invalid_desig_eng_regional, 'fields': ['DESIG_ENG', 'DESIG_TYPE'], 'features': ['desig_eng_regional']},
+{'name': 'ivd_desig_type_regional', 'func': invalid_desig_type_regional, 'fields': ['DESIG_TYPE', 'DESIG_ENG'], 'features': ['desig_eng_regional']},
+{'name': 'ivd_int_crit', 'func': invalid_int_crit_desig_eng_ramsar_whs, 'fields': ['INT_CRIT', 'DESIG_ENG'], 'features': ['desig_eng_ramsar_whs']},
+{'name': 'ivd_desig_type', 'func': invalid_desig_type, 'fields': ['DESIG_TYPE']},
+{'name': 'ivd_iucn_cat', 'func': invalid_iucn_cat, 'fields': ['IUCN_CAT']},
+{'name': 'ivd_iucn_cat_unesco_whs', 'func': invalid_iucn_cat_unesco_whs, 'fields': ['IUCN_CAT', 'DESIG_ENG'], 'features': ['desig_eng_unesco_whs']},
+{'name': 'ivd_marine', 'func': invalid_marine, 'fields': ['MARINE']},
+{'name': 'check_no_take_marine0', 'func': invalid_no_take_marine0, 'fields': ['NO_TAKE', 'MARINE'], 'features': ['marine0', 'no_take_not_applicable']},
+{'name': 'ivd_no_take_marine12', 'func': invalid_no_take_marine12, 'fields': ['NO_TAKE', 'MARINE'], 'features': ['marine12']},
+{'name': 'check_no_tk_area_marine0', 'func': invalid_no_tk_area_marine0, 'fields': ['NO_TK_AREA', 'MARINE'], 'features': ['marine0']},
+{'name': 'ivd_no_tk_area_no_take', 'func': invalid_no_tk_area_no_take, 'fields': ['NO_TK_AREA', 'NO_TAKE'], 'features': ['no_take_not_applicable']},
+{'name': 'ivd_status', 'func': invalid_status, 'fields': ['STATUS', 'DESIG_ENG']},
+{'name': 'ivd_status_WH', 'func': invalid_status_WH, 'fields': ['STATUS', 'DESIG_ENG']},
+{'name': 'ivd_status_BarcelonaConv', 'func': invalid_status_Barca, 'fields': ['STATUS', 'DESIG_ENG']},
+{'name': 'ivd_status_yr', 'func': invalid_status_yr, 'fields': ['STATUS_YR']},
+{'name': 'ivd_status_yr_format', 'func': invalid_status_yr_format, 'fields': ['STATUS_YR']},
+{'name': 'ivd_gov_type', 'func': invalid_gov_type, 'fields': ['GOV_TYPE']},
+{'name': 'ivd_own_type', 'func': invalid_own_type, 'fields': ['OWN_TYPE']},
+{'name': 'ivd_verif', 'func': invalid_verif, 'fields': ['VERIF']},
+{'name': 'check_parent_iso3', 'func': invalid_parent_iso3, 'fields': ['PARENT_ISO3'], 'columns': country_code_columns('PARENT_ISO3')},
+{'name': 'check_iso3', 'func': invalid_iso3, 'fields': ['ISO3'], 'columns': country_code_columns('ISO3')},
+{'name': 'ivd_status_desig_type', 'func': invalid_status_desig_type, 'fields': ['STATUS', 'DESIG_TYPE']},
+{'name': 'ivd_character_name', 'func': forbidden_character_name, 'fields': ['NAME'], 'columns': forbidden_character_columns('NAME')},
+{'name': 'ivd_character_orig_name', 'func': forbidden_character_orig_name, 'fields': ['ORIG_NAME'], 'columns': forbidden_character_columns('ORIG_NAME')},
+{'name': 'ivd_character_desig', 'func': forbidden_character_desig, 'fields': ['DESIG'], 'columns': forbidden_character_columns('DESIG')},
+{'name': 'ivd_character_desig_eng', 'func': forbidden_character_desig_eng, 'fields': ['DESIG_ENG'], 'columns': forbidden_character_columns('DESIG_ENG')},
+{'name': 'ivd_character_mang_auth', 'func': forbidden_character_mang_auth, 'fields': ['MANG_AUTH'], 'columns': forbidden_character_columns('MANG_AUTH')},
+{'name': 'ivd_character_mang_plan', 'func': forbidden_character_mang_plan, 'fields': ['MANG_PLAN'], 'columns': forbidden_character_columns('MANG_PLAN')},
+{'name': 'ivd_character_sub_loc', 'func': forbidden_character_sub_loc, 'fields': ['SUB_LOC'], 'columns': forbidden_character_columns('SUB_LOC')},
+{'name': 'ivd_text_name', 'func': text_anomaly_name, 'fields': ['NAME'], 'columns': text_anomaly_columns('NAME')},
+{'name': 'ivd_text_orig_name', 'func': text_anomaly_orig_name, 'fields': ['ORIG_NAME'], 'columns': text_anomaly_columns('ORIG_NAME')},
+{'name': 'ivd_text_desig', 'func': text_anomaly_desig, 'fields': ['DESIG'], 'columns': text_anomaly_columns('DESIG')},
+{'name': 'ivd_text_mang_auth', 'func': text_anomaly_mang_auth, 'fields': ['MANG_AUTH'], 'columns': text_anomaly_columns('MANG_AUTH')},
+{'name': 'ivd_nan_present_name', 'func': ivd_nan_present_name, 'fields': ['NAME']},
+{'name': 'ivd_nan_present_orig_name', 'func': ivd_nan_present_orig_name, 'fields': ['ORIG_NAME']},
+{'name': 'ivd_nan_present_desig', 'func': ivd_nan_present_desig, 'fields': ['DESIG']},
+{'name': 'ivd_nan_present_desig_eng', 'func': ivd_nan_present_desig_eng, 'fields': ['DESIG_ENG']},
+{'name': 'ivd_nan_present_mang_auth', 'func': ivd_nan_present_mang_auth, 'fields': ['MANG_AUTH']},
+{'name': 'ivd_nan_present_mang_plan', 'func': ivd_nan_present_mang_plan, 'fields': ['MANG_PLAN']},
+{'name': 'ivd_nan_present_sub_loc', 'func': ivd_nan_present_sub_loc, 'fields': ['SUB_LOC']},
+{'name': 'ivd_nan_present_metadataid', 'func': ivd_nan_present_metadataid, 'fields': ['METADATAID']}]
 
 # Checks to be run for polygon data only (includes GIS_AREA and/or GIS_M_AREA)
 area_checks = [
-{'name': 'gis_area_gt_rep_area', 'func': area_invalid_too_large_gis},
-{'name': 'rep_area_gt_gis_area', 'func': area_invalid_too_large_rep},
-{'name': 'gis_m_area_gt_rep_m_area', 'func': area_invalid_too_large_gis_m},
-{'name': 'rep_m_area_gt_gis_m_area', 'func': area_invalid_too_large_rep_m},
-{'name': 'tiny_gis_area', 'func': area_invalid_gis_area},
-{'name': 'no_tk_area_gt_gis_m_area', 'func': area_invalid_no_tk_area_gis_m_area},
-{'name': 'ivd_gis_m_area_gt_gis_area', 'func': area_invalid_gis_m_area_gis_area},
-{'name': 'zero_gis_m_area_marine12', 'func': area_invalid_gis_m_area_marine12},
-{'name': 'ivd_marine_designation', 'func': area_invalid_marine},]
+{'name': 'gis_area_gt_rep_area', 'func': area_invalid_too_large_gis, 'fields': ['GIS_AREA', 'REP_AREA'], 'scope': 'table', 'columns': area_too_large_columns('GIS_AREA', 'REP_AREA')},
+{'name': 'rep_area_gt_gis_area', 'func': area_invalid_too_large_rep, 'fields': ['REP_AREA', 'GIS_AREA'], 'scope': 'table', 'columns': area_too_large_columns('REP_AREA', 'GIS_AREA')},
+{'name': 'gis_m_area_gt_rep_m_area', 'func': area_invalid_too_large_gis_m, 'fields': ['GIS_M_AREA', 'REP_M_AREA'], 'scope': 'table', 'columns': area_too_large_columns('GIS_M_AREA', 'REP_M_AREA')},
+{'name': 'rep_m_area_gt_gis_m_area', 'func': area_invalid_too_large_rep_m, 'fields': ['REP_M_AREA', 'GIS_M_AREA'], 'scope': 'table', 'columns': area_too_large_columns('REP_M_AREA', 'GIS_M_AREA')},
+{'name': 'tiny_gis_area', 'func': area_invalid_gis_area, 'fields': ['GIS_AREA']},
+{'name': 'no_tk_area_gt_gis_m_area', 'func': area_invalid_no_tk_area_gis_m_area, 'fields': ['NO_TK_AREA', 'GIS_M_AREA']},
+{'name': 'ivd_gis_m_area_gt_gis_area', 'func': area_invalid_gis_m_area_gis_area, 'fields': ['GIS_M_AREA', 'GIS_AREA']},
+{'name': 'zero_gis_m_area_marine12', 'func': area_invalid_gis_m_area_marine12, 'fields': ['GIS_M_AREA', 'MARINE'], 'features': ['marine12']},
+{'name': 'ivd_marine_designation', 'func': area_invalid_marine, 'fields': ['GIS_M_AREA', 'GIS_AREA', 'MARINE'], 'columns': marine_gis_columns},]
 
 # Checks for polygons
 poly_checks = core_checks + area_checks
@@ -2069,6 +2681,40 @@ poly_checks = core_checks + area_checks
 # Checks for points (area checks excluded)
 pt_checks = core_checks
 
+# Checks and input fields of each type of table, e.g. of a submission to
+# wdpa.service or of a release in wdpa.batch: (checks, fields)
+CHECKS = {'poly': (poly_checks, INPUT_FIELDS_POLY),
+          'point': (pt_checks, INPUT_FIELDS_PT)}
+
+# Checks comparing the names of different WDPAIDs, for points and polygons; not
+# run by default, only when selected, e.g. run_checks(poly_df, name_checks)
+name_checks = [
+{'name': 'sim_name_dif_id', 'func': similar_name_dif_wdpaid, 'fields': ['WDPAID', 'NAME', 'ISO3', 'DESIG', 'DESIG_ENG'], 'scope': 'table', 'columns': similar_name_columns('NAME')},
+{'name': 'sim_orig_name_dif_id', 'func': similar_orig_name_dif_wdpaid, 'fields': ['WDPAID', 'ORIG_NAME', 'ISO3', 'DESIG', 'DESIG_ENG'], 'scope': 'table', 'columns': similar_name_columns('ORIG_NAME')},]
+
+# Checks across the Polygons, Points and Source Table
+integrity_checks = [
+{'name': 'overlap_wdpaid', 'func': overlap_wdpaid},
+{'name': 'overlap_wdpa_pid', 'func': overlap_wdpa_pid},
+{'name': 'metaid_only_in_data', 'func': metaid_only_in_data},
+{'name': 'metaid_only_in_metadata', 'func': metaid_only_in_metadata},]
+
+# Checks on the Source Table, with the rows identified by METADATAID
+meta_checks = [
+{'name': 'duplicate_metadataid', 'func': duplicate_metadataid, 'fields': ['METADATAID'], 'key': 'METADATAID', 'scope': 'table'},
+{'name': 'ivd_meta_year', 'func': invalid_source_year_year, 'fields': ['METADATAID', 'YEAR'], 'key': 'METADATAID', 'positions': True},
+{'name': 'ivd_meta_update_yr', 'func': invalid_source_year_update_yr, 'fields': ['METADATAID', 'UPDATE_YR'], 'key': 'METADATAID', 'positions': True},
+{'name': 'ivd_meta_update_yr_lt_year', 'func': invalid_update_yr_before_year, 'fields': ['METADATAID', 'YEAR', 'UPDATE_YR'], 'key': 'METADATAID', 'positions': True},
+{'name': 'check_meta_language', 'func': invalid_source_language, 'fields': ['METADATAID', 'LANGUAGE'], 'key': 'METADATAID', 'positions': True},
+{'name': 'check_meta_char_set', 'func': invalid_source_char_set, 'fields': ['METADATAID', 'CHAR_SET'], 'key': 'METADATAID', 'positions': True},
+{'name': 'ivd_meta_character_data_title', 'func': forbidden_character_source_data_title, 'fields': ['METADATAID', 'DATA_TITLE'], 'key': 'METADATAID', 'columns': forbidden_character_columns('DATA_TITLE'), 'positions': True},
+{'name': 'ivd_meta_character_resp_party', 'func': forbidden_character_source_resp_party, 'fields': ['METADATAID', 'RESP_PARTY'], 'key': 'METADATAID', 'columns': forbidden_character_columns('RESP_PARTY'), 'positions': True},
+{'name': 'ivd_meta_character_verifier', 'func': forbidden_character_source_verifier, 'fields': ['METADATAID', 'VERIFIER'], 'key': 'METADATAID', 'columns': forbidden_character_columns('VERIFIER'), 'positions': True},
+{'name': 'ivd_meta_character_citation', 'func': forbidden_character_source_citation, 'fields': ['METADATAID', 'CITATION'], 'key': 'METADATAID', 'columns': forbidden_character_columns('CITATION'), 'positions': True},
+{'name': 'ivd_meta_nan_data_title', 'func': nan_present_source_data_title, 'fields': ['METADATAID', 'DATA_TITLE'], 'key': 'METADATAID', 'positions': True},
+{'name': 'ivd_meta_nan_resp_party', 'func': nan_present_source_resp_party, 'fields': ['METADATAID', 'RESP_PARTY'], 'key': 'METADATAID', 'positions': True},
+{'name': 'ivd_meta_nan_citation', 'func': nan_present_source_citation, 'fields': ['METADATAID', 'CITATION'], 'key': 'METADATAID', 'positions': True}]
+
 #######################
 #### END OF SCRIPT ####
 #######################
@@ -0,0 +1,198 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to store the results of the QA checks                      ####
+###################################################################################
+
+'''
+A check on a bad submission can flag tens of thousands of rows. Instead of
+copying these rows into a DataFrame for each check and keeping all of them
+until the export, CheckResults stores the offending rows of each check as
+positions in the checked table:
+
+- an array of row positions, when few rows are flagged
+- a bitset of one bit per row of the table (numpy.packbits), when many are
+
+whichever is smaller. The rows are only copied from the table when a result is
+used, e.g. when its sheet is written to Excel, one check at a time.
+
+Of the offending rows, only the fields that explain why a check failed are
+copied: the fields identifying the rows (WDPAID, WDPA_PID or the 'key' of the
+check), the fields the check reads ('fields'), and the values it computed
+('columns'), e.g. the relative size and its threshold of the area checks.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import numpy as np
+import pandas as pd
+from wdpa.rules import active_rules, use_rules
+
+#########################
+#### 1. Sets of rows ####
+#########################
+
+def compress_rows(positions, nrows):
+    '''
+    Return the row positions as a bitset or as an array, whichever is smaller.
+
+    ## Arguments ##
+    positions -- sorted array of row positions
+    nrows --     number of rows of the table
+    '''
+
+    positions = np.asarray(positions)
+
+    # one bit per row of the table, or 4 or 8 bytes per row position
+    dtype = np.int32 if nrows < 2**31 else np.int64
+    if len(positions) * np.dtype(dtype).itemsize * 8 > nrows:
+        mask = np.zeros(nrows, dtype=bool)
+        mask[positions] = True
+        return ('bits', np.packbits(mask))
+
+    return ('rows', positions.astype(dtype))
+
+def decompress_rows(stored, nrows):
+    '''
+    Return the array of row positions stored by compress_rows.
+    '''
+
+    kind, values = stored
+
+    if kind == 'bits':
+        return np.flatnonzero(np.unpackbits(values)[:nrows])
+
+    return values.astype(np.int64)
+
+##########################
+#### 2. Check results ####
+##########################
+
+class CheckResults(Mapping):
+    '''
+    The offending rows of each check that failed on wdpa_df, by the name of the check.
+    It is used as the dictionary returned by run_checks: result[name] returns the
+    DataFrame of offending rows, copied from wdpa_df when it is used, with the
+    fields of the check if given. The additional columns of a check are computed
+    with the rules of the run (see wdpa.rules), also when the result is used in
+    another thread.
+
+    ## Example ##
+    result = CheckResults(wdpa_df)
+    result.add('ivd_iucn_cat', find_wdpa_positions(wdpa_df, wdpa_pid))
+    result.count('ivd_iucn_cat')
+    result['ivd_iucn_cat']
+    '''
+
+    def __init__(self, wdpa_df):
+        self.wdpa_df = wdpa_df
+        self.rows = OrderedDict()
+        self.counts = dict()
+        self.columns = dict()
+        self.fields = dict()
+        self.rules = active_rules()
+
+    def add(self, name, positions, columns=None, fields=None):
+        '''
+        Store the row positions of wdpa_df where the check name failed.
+
+        ## Arguments ##
+        columns -- optional function returning additional columns for the offending
+                   rows, e.g. the values a check computed, see the 'columns' of poly_checks
+        fields --  optional list of the fields of wdpa_df to output (default: all fields),
+                   see wdpa.runner.output_fields
+        '''
+
+        self.rows[name] = compress_rows(positions, len(self.wdpa_df))
+        self.counts[name] = len(positions)
+        if columns is not None:
+            self.columns[name] = columns
+        if fields is not None:
+            self.fields[name] = [field for field in self.wdpa_df.columns if field in fields]
+
+    def positions(self, name):
+        '''
+        Return the row positions of wdpa_df where the check name failed.
+        '''
+
+        return decompress_rows(self.rows[name], len(self.wdpa_df))
+
+    def count(self, name):
+        '''
+        Return the number of offending rows of the check name, without copying them.
+        '''
+
+        return self.counts[name]
+
+    def __getitem__(self, name):
+        rows = self.wdpa_df.iloc[self.positions(name)]
+        columns = None
+
+        if name in self.columns:
+            with use_rules(self.rules):
+                columns = self.columns[name](rows, self.wdpa_df)
+
+        if name in self.fields:
+            rows = rows[self.fields[name]]
+
+        return rows if columns is None else pd.concat([rows, columns], axis=1)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+#########################
+#### 3. Error matrix ####
+#########################
+
+def error_matrix(result, checks, fields=('WDPAID', 'WDPA_PID')):
+    '''
+    Return the errors of all checks as one table: one row per offending WDPA_PID,
+    with the fields, one boolean column per check that failed, and the number
+    of checks that failed (ERROR_COUNT).
+
+    The table is built from the row positions stored in result: the masks of
+    the checks are stacked into one boolean matrix, without copying the
+    offending rows of each check.
+
+    ## Arguments ##
+    result -- CheckResults, e.g. returned by run_checks
+    checks -- a list of the checks run, e.g. poly_checks; sets the order of the columns
+    fields -- fields of the table to add to each row
+
+    ## Example ##
+    error_matrix(run_checks(poly_df, poly_checks), poly_checks)
+    '''
+
+    names = [check['name'] for check in checks if check['name'] in result]
+    positions = [result.positions(name) for name in names]
+    rows = np.unique(np.concatenate(positions)) if positions else np.array([], dtype=np.int64)
+
+    # stack the masks of the checks, over the rows that failed any check
+    matrix = np.zeros((len(rows), len(names)), dtype=bool)
+    for column, check_rows in enumerate(positions):
+        matrix[np.searchsorted(rows, check_rows), column] = True
+
+    matrix_df = result.wdpa_df[list(fields)].iloc[rows].reset_index(drop=True)
+    matrix_df = pd.concat([matrix_df, pd.DataFrame(matrix, columns=names)], axis=1)
+
+    # rows sharing a WDPA_PID (see duplicate_wdpa_pid) are combined into one; rows
+    # without a WDPA_PID (see ivd_nan_present_wdpa_pid) are kept, one row each
+    present = matrix_df['WDPA_PID'].notna()
+    if matrix_df['WDPA_PID'][present].duplicated().any():
+        combined = matrix_df[present].groupby('WDPA_PID', sort=False, as_index=False).agg(
+            dict({field: 'first' for field in fields if field != 'WDPA_PID'}, **{name: 'max' for name in names}))
+        matrix_df = pd.concat([combined[list(fields) + names], matrix_df[~present]], ignore_index=True)
+
+    matrix_df['ERROR_COUNT'] = matrix_df[names].sum(axis=1).astype(int)
+
+    return matrix_df
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,335 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to load the thresholds and allowed values of the checks     ####
+###################################################################################
+
+'''
+The thresholds (e.g. the maximum difference between GIS_AREA and REP_AREA) and
+the allowed values (e.g. of IUCN_CAT) of the checks are kept in a rule pack,
+instead of in the bodies of the checks. DEFAULT_RULES holds the values of the
+WDPA manual; a rule pack file (JSON, YAML or TOML) overrides some of them:
+
+    {"name": "strict_area", "version": "2",
+     "thresholds": {"max_allowed_size_diff_km2": 20},
+     "values": {"ivd_iucn_cat": ["Ia", "Ib", "II", "III", "IV", "V", "VI", "Not Reported"]}}
+
+- thresholds - numbers, by the names in DEFAULT_RULES['thresholds']
+- values -     lists of allowed (or forbidden) values, by the name of the check
+
+A rule pack is validated and compiled into a RulePack once, and is cached by
+the hash of its content. The checks read the RulePack of the current run (see
+use_rules), which is kept per thread: runs with different rule packs can run
+in parallel on the same table, see wdpa.runner.run_rule_packs.
+
+YAML requires PyYAML; TOML requires Python 3.11 or the toml package.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_RULES = {
+'name': 'default',
+'version': '1',
+'thresholds': {
+    # area_invalid_too_large_*: maximum allowed absolute difference between GIS and reported area (km²)
+    'max_allowed_size_diff_km2': 50,
+    # area_invalid_too_large_*: relative sizes above mean + area_outlier_sigma stdev are outliers
+    'area_outlier_sigma': 2,
+    # marine_gis_columns: min and max proportion of marine GIS area for a 'coastal' designation (MARINE = 1)
+    'coast_min': 0.1,
+    'coast_max': 0.9,
+    # area_invalid_gis_area, area_invalid_rep_area: smallest valid area (km²)
+    'min_area_km2': 0.0001,
+    # area_invalid_size: margin for the rounding of areas
+    'area_size_threshold': 1.0001,
+    # invalid_status_yr: first valid STATUS_YR, other than 0
+    'first_status_yr': 1750,
+    # invalid_source_year: first valid YEAR and UPDATE_YR of the Source Table
+    'first_source_yr': 1750,
+    # similar_name_different_wdpaid: smallest similarity (Jaccard of the character trigrams) of similar names
+    'similar_name_jaccard': 0.6,
+    # duplicate_geometry (wdpa.spatial): smallest intersection over union of duplicate polygons
+    'duplicate_geometry_iou': 0.95,
+    # invalid_gis_area_geometry (wdpa.spatial): largest relative difference of GIS_AREA and the geometry's area
+    'gis_area_tolerance': 0.01,
+    # invalid_iso3_location (wdpa.spatial): largest distance (degrees) of a location outside its ISO3
+    'iso3_boundary_distance': 0.05},
+'values': {
+    'ivd_int_crit_desig_eng_other': ['Ramsar Site, Wetland of International Importance',
+                                     'World Heritage Site (natural or mixed)'],
+    'ivd_desig_eng_iucn_cat_other': ['Ia',
+                                     'Ib',
+                                     'II',
+                                     'III',
+                                     'IV',
+                                     'V',
+                                     'VI',
+                                     'Not Reported',
+                                     'Not Assigned'],
+    'ivd_pa_def': ['1'],
+    'ivd_desig_eng_international': ['Ramsar Site, Wetland of International Importance',
+                                    'UNESCO-MAB Biosphere Reserve',
+                                    'World Heritage Site (natural or mixed)'],
+    'ivd_desig_type_international': ['International'],
+    'ivd_desig_eng_regional': ['Baltic Sea Protected Area (HELCOM)',
+                               'Specially Protected Area (Cartagena Convention)',
+                               'Marine Protected Area (CCAMLR)',
+                               'Marine Protected Area (OSPAR)',
+                               'Site of Community Importance (Habitats Directive)',
+                               'Special Protection Area (Birds Directive)',
+                               'Specially Protected Areas of Mediterranean Importance (Barcelona Convention)'],
+    'ivd_desig_type_regional': ['Regional'],
+    # allowed besides the valid combinations of INT_CRIT_ELEMENTS
+    'ivd_int_crit': ['Not Reported'],
+    'ivd_desig_type': ['National', 'Regional', 'International', 'Not Applicable'],
+    'ivd_iucn_cat': ['Ia',
+                     'Ib',
+                     'II',
+                     'III',
+                     'IV',
+                     'V',
+                     'VI',
+                     'Not Reported',
+                     'Not Applicable',
+                     'Not Assigned'],
+    'ivd_iucn_cat_unesco_whs': ['Not Applicable'],
+    'ivd_marine': ['0', '1', '2'],
+    'check_no_take_marine0': ['Not Applicable'],
+    'ivd_no_take_marine12': ['All', 'Part', 'None', 'Not Reported'],
+    'check_no_tk_area_marine0': [0],
+    'ivd_no_tk_area_no_take': [0],
+    'ivd_status': ['Proposed', 'Designated', 'Established'],
+    'ivd_status_WH': ['Proposed', 'Inscribed'],
+    'ivd_status_BarcelonaConv': ['Proposed', 'Adopted'],
+    'ivd_gov_type': ['Federal or national ministry or agency',
+                     'Sub-national ministry or agency',
+                     'Government-delegated management',
+                     'Transboundary governance',
+                     'Collaborative governance',
+                     'Joint governance',
+                     'Individual landowners',
+                     'Non-profit organisations',
+                     'For-profit organisations',
+                     'Indigenous peoples',
+                     'Local communities',
+                     'Not Reported'],
+    'ivd_own_type': ['State',
+                     'Communal',
+                     'Individual landowners',
+                     'For-profit organisations',
+                     'Non-profit organisations',
+                     'Joint ownership',
+                     'Multiple ownership',
+                     'Contested',
+                     'Not Reported'],
+    'ivd_verif': ['State Verified', 'Expert Verified', 'Not Reported'],
+    'ivd_status_desig_type': ['Established'],
+    # Source Table: LANGUAGE and CHAR_SET
+    'check_meta_language': ['English', 'French', 'Spanish', 'Portuguese', 'Russian', 'Arabic', 'Chinese',
+                            'German', 'Italian', 'Dutch', 'Multiple', 'Not Reported'],
+    'check_meta_char_set': ['UTF8', 'UTF-8', 'UTF16', 'UTF-16', 'ASCII', 'ISO 8859-1', 'Windows-1252',
+                            'Not Reported'],
+    # forbidden_character: characters not allowed in text fields
+    'forbidden_characters': ['<', '>', '?', '*', '\r', '\n'],}}
+
+# Values that are searched for in the fields, which cannot be empty
+NONEMPTY_VALUES = ['forbidden_characters']
+
+##########################
+#### 1. Compile rules ####
+##########################
+
+class RulePack(object):
+    '''
+    The thresholds and values of a validated rule pack, merged with DEFAULT_RULES.
+    digest is the hash of the content the rule pack was compiled from.
+    '''
+
+    def __init__(self, name, version, digest, thresholds, values):
+        self.name = name
+        self.version = version
+        self.digest = digest
+        self.thresholds = thresholds
+        self.values = values
+
+    def __repr__(self):
+        return f'RulePack({self.name!r}, version={self.version!r})'
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def compile_rules(rules, digest=None):
+    '''
+    Validate rules - a dictionary as DEFAULT_RULES, holding some or all of its
+    thresholds and values - and return it as a RulePack.
+
+    ## Example ##
+    compile_rules({'name': 'strict_area', 'thresholds': {'max_allowed_size_diff_km2': 20}})
+    '''
+
+    if not isinstance(rules, dict):
+        raise ValueError('ERROR: a rule pack must be a mapping of name, version, thresholds and values')
+
+    unknown = set(rules) - set(DEFAULT_RULES)
+    if unknown:
+        raise ValueError(f'ERROR: unknown rule pack section(s): {", ".join(sorted(unknown))}')
+
+    if digest is None:
+        digest = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+    thresholds = dict(DEFAULT_RULES['thresholds'])
+    for name, value in rules.get('thresholds', {}).items():
+        if name not in thresholds:
+            raise ValueError(f'ERROR: unknown threshold: {name}')
+        if not _is_number(value):
+            raise ValueError(f'ERROR: threshold {name} must be a number, not {value!r}')
+        thresholds[name] = value
+
+    if not thresholds['coast_min'] < thresholds['coast_max']:
+        raise ValueError('ERROR: threshold coast_min must be smaller than coast_max')
+
+    values = {name: tuple(value) for name, value in DEFAULT_RULES['values'].items()}
+    for name, value in rules.get('values', {}).items():
+        if name not in values:
+            raise ValueError(f'ERROR: unknown values: {name}')
+        if not isinstance(value, list):
+            raise ValueError(f'ERROR: values of {name} must be a list')
+        # the values are compared with the field, thus must have the type of the defaults
+        number = _is_number(DEFAULT_RULES['values'][name][0])
+        if not all(_is_number(each) if number else isinstance(each, str) for each in value):
+            raise ValueError(f'ERROR: values of {name} must be {"numbers" if number else "strings"}')
+        # forbidden_character searches for any of the characters: an empty list, or an
+        # empty string, would match every value
+        if name in NONEMPTY_VALUES and (not value or '' in value):
+            raise ValueError(f'ERROR: values of {name} must be a list of one or more non-empty strings')
+        values[name] = tuple(value)
+
+    return RulePack(str(rules.get('name', 'default')), str(rules.get('version', '')), digest, thresholds, values)
+
+DEFAULT_PACK = compile_rules(DEFAULT_RULES)
+
+#################################
+#### 2. Load rule pack files ####
+#################################
+
+# digest of the file content: RulePack
+_packs = dict()
+_packs_lock = threading.Lock()
+
+def _parse(content, extension):
+    '''
+    Return the rule pack in content (bytes), in the format of the file extension.
+    '''
+
+    text = content.decode('utf-8')
+
+    if extension == '.json':
+        return json.loads(text)
+
+    if extension in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError('ERROR: reading YAML rule packs requires PyYAML')
+        return yaml.safe_load(text)
+
+    if extension == '.toml':
+        try:
+            import tomllib as toml
+        except ImportError:
+            try:
+                import toml
+            except ImportError:
+                raise ValueError('ERROR: reading TOML rule packs requires Python 3.11 or the toml package')
+        return toml.loads(text)
+
+    raise ValueError(f'ERROR: unknown rule pack format: {extension}, use .json, .yaml or .toml')
+
+def load_rules(path):
+    '''
+    Return the RulePack of the rule pack file at path. A rule pack is only
+    validated and compiled once for the same content.
+
+    ## Example ##
+    load_rules('C:/Users/paintern/Desktop/rules/strict_area.json')
+    '''
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+
+    with _packs_lock:
+        if digest not in _packs:
+            _packs[digest] = compile_rules(_parse(content, os.path.splitext(path)[1].lower()), digest)
+        return _packs[digest]
+
+#####################################
+#### 3. Rules of the current run ####
+#####################################
+
+_active = threading.local()
+
+def active_rules():
+    '''
+    Return the RulePack used by the checks in this thread.
+    '''
+
+    return getattr(_active, 'pack', DEFAULT_PACK)
+
+def as_rules(pack):
+    '''
+    Return pack as a RulePack: pack is a RulePack, the path of a rule pack file,
+    or None for the current rules.
+    '''
+
+    if pack is None:
+        return active_rules()
+
+    if isinstance(pack, RulePack):
+        return pack
+
+    return load_rules(pack)
+
+@contextlib.contextmanager
+def use_rules(pack):
+    '''
+    Use the RulePack pack (or the rule pack file at path pack) for the checks run
+    in this thread, within the with statement. None keeps the current rules.
+
+    ## Example ##
+    with use_rules('strict_area.json'):
+        run_checks(poly_df, poly_checks)
+    '''
+
+    pack = as_rules(pack)
+    previous = active_rules()
+    _active.pack = pack
+    try:
+        yield pack
+    finally:
+        _active.pack = previous
+
+def rule(name):
+    '''
+    Return the threshold name of the current rules, e.g. rule('coast_min').
+    '''
+
+    return active_rules().thresholds[name]
+
+def rule_values(name):
+    '''
+    Return the values name of the current rules as a list, e.g. rule_values('ivd_iucn_cat').
+    '''
+
+    return list(active_rules().values[name])
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,238 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to select and run the QA checks                            ####
+###################################################################################
+
+'''
+This Python script selects the QA checks to run, works out which WDPA fields
+these checks need, and runs them on a WDPA DataFrame.
+
+Each check in poly_checks / pt_checks declares the fields it reads ('fields').
+Only the union of those fields - plus the fields needed for reporting - has to be
+imported from the feature class, so targeted reruns of a few checks read a
+fraction of the data.
+'''
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from wdpa.context import table_context
+from wdpa.features import FeatureCache, schedule_checks, feature_cache_key
+from wdpa.rules import use_rules
+
+#######################################
+#### 1. Fields required for output ####
+#######################################
+
+# Fields that are always loaded: WDPA_PID is used to report the rows with errors,
+# WDPAID to relate the rows of the same protected area in the Excel output.
+REPORT_FIELDS = ['WDPAID', 'WDPA_PID']
+
+##########################
+#### 2. Select checks ####
+##########################
+
+def parse_multivalue(value):
+    '''
+    Return a list of values from a multivalue script argument.
+    ArcGIS passes multivalue parameters as a ';' separated string, and '#' or ''
+    for optional parameters that are left empty.
+
+    ## Example ##
+    parse_multivalue('ivd_iucn_cat;tiny_gis_area')
+    '''
+
+    if value is None or value.strip() in ('', '#'):
+        return []
+
+    return [each.strip().strip("'") for each in value.split(';') if each.strip()]
+
+def optional_argument(position):
+    '''
+    Return the list of values of the optional script argument at position,
+    or an empty list if the argument is not given.
+
+    ## Example ##
+    optional_argument(3)
+    '''
+
+    return parse_multivalue(sys.argv[position] if len(sys.argv) > position else None)
+
+def select_checks(checks, names=None, optional=()):
+    '''
+    Return the checks whose name is in names, in the order of checks.
+    Return all checks if names is empty or None.
+
+    ## Arguments ##
+    checks --   a list of checks, e.g. poly_checks or pt_checks
+    names --    a list of check names, as displayed in the Excel output
+    optional -- a list of checks that are only run if named, e.g. name_checks
+
+    ## Example ##
+    select_checks(checks=poly_checks,
+                  names=['tiny_gis_area', 'ivd_iucn_cat'])
+    '''
+
+    if not names:
+        return list(checks)
+
+    checks = list(checks) + list(optional)
+    unknown = set(names) - set(check['name'] for check in checks)
+    if unknown:
+        raise ValueError(f'ERROR: unknown check(s): {", ".join(sorted(unknown))}')
+
+    return [check for check in checks if check['name'] in names]
+
+def required_fields(checks, input_fields):
+    '''
+    Return the fields that need to be imported to run the checks: the union
+    of the fields each check reads and REPORT_FIELDS, in the order of input_fields.
+
+    ## Arguments ##
+    checks --       a list of checks, e.g. poly_checks or pt_checks
+    input_fields -- a list of all fields of the input, e.g. INPUT_FIELDS_POLY
+
+    ## Example ##
+    required_fields(checks=select_checks(poly_checks, ['tiny_gis_area']),
+                    input_fields=INPUT_FIELDS_POLY)
+    '''
+
+    needed = set(REPORT_FIELDS)
+    for check in checks:
+        # checks that do not declare their fields need all of them
+        needed.update(check.get('fields', input_fields))
+
+    return [field for field in input_fields if field in needed]
+
+def output_fields(check):
+    '''
+    Return the fields written to the output of check: REPORT_FIELDS, its 'key' and
+    the fields it reads, which explain why a row was flagged. Return None (all
+    fields) if the check does not declare its fields.
+
+    ## Example ##
+    output_fields({'name': 'ivd_iucn_cat', 'fields': ['IUCN_CAT']}) # ['WDPAID', 'WDPA_PID', 'IUCN_CAT']
+    '''
+
+    if 'fields' not in check:
+        return None
+
+    return list(dict.fromkeys(REPORT_FIELDS + [check.get('key', 'WDPA_PID')] + list(check['fields'])))
+
+#######################
+#### 3. Run checks ####
+#######################
+
+def run_checks(wdpa_df, checks, log=print, report=None, result=None, rules=None):
+    '''
+    Run the checks on wdpa_df and return a dictionary with the names of the checks
+    that failed as keys, and the DataFrame of the offending rows as values.
+    The dictionary is a CheckResults (see wdpa.results): it only stores the positions
+    of the offending rows, and copies them from wdpa_df when they are used.
+
+    Checks sharing intermediate results ('features') are run one after the other;
+    each feature is computed once and freed after the last check that needs it.
+
+    ## Arguments ##
+    wdpa_df -- wdpa DataFrame
+    checks --  a list of checks, e.g. poly_checks or pt_checks
+    log --     function used to report progress, e.g. arcpy.AddMessage
+    report --  optional function called with the name of each failed check,
+               as soon as the check has run
+    result --  optional CheckResults of wdpa_df to add the results to
+    rules --   optional RulePack, or path of a rule pack file, with the thresholds and
+               allowed values of the checks (see wdpa.rules); default: the current rules
+
+    ## Example ##
+    run_checks(wdpa_df=poly_df,
+               checks=poly_checks,
+               log=arcpy.AddMessage)
+    '''
+
+    # imported here, so that selecting checks does not load wdpa.qa, numpy and pandas
+    from wdpa.qa import find_wdpa_positions
+    from wdpa.results import CheckResults
+
+    with use_rules(rules):
+        if result is None:
+            result = CheckResults(wdpa_df)
+        context = table_context(wdpa_df)
+        key = feature_cache_key()
+        context[key] = cache = FeatureCache(checks)
+
+        try:
+            for check in schedule_checks(checks):
+                log('Running:' + check['name'])
+                # checks are not currently optimised, thus return all pids regardless
+                wdpa_pid = check['func'](wdpa_df, True)
+                cache.release(check)
+
+                # For each check, store the positions of the rows that contain errors
+                if wdpa_pid.size > 0:
+                    if check.get('positions'):
+                        positions = wdpa_pid # the check returns the row positions, e.g. meta_checks
+                    else:
+                        positions = find_wdpa_positions(wdpa_df, wdpa_pid, check.get('key', 'WDPA_PID'))
+                    result.add(check['name'], positions, check.get('columns'), output_fields(check))
+                    if report is not None:
+                        report(check['name'])
+        finally:
+            context.pop(key, None)
+
+    return result
+
+def run_rule_packs(wdpa_df, checks, packs, log=print):
+    '''
+    Run the checks on wdpa_df once for each rule pack, in parallel, e.g. to compare
+    thresholds on the whole table. Return a dictionary with the name of each rule
+    pack as key, and the result of run_checks as value.
+
+    ## Arguments ##
+    wdpa_df -- wdpa DataFrame
+    checks --  a list of checks, e.g. poly_checks or pt_checks
+    packs --   a list of RulePacks, or paths of rule pack files, see wdpa.rules
+    log --     function used to report progress, e.g. arcpy.AddMessage
+
+    ## Example ##
+    run_rule_packs(wdpa_df=poly_df,
+                   checks=poly_checks,
+                   packs=['rules/default.json', 'rules/strict_area.json'])
+    '''
+
+    from wdpa.rules import as_rules
+
+    packs = [as_rules(pack) for pack in packs]
+    names = [pack.name for pack in packs]
+    if len(set(names)) < len(names):
+        raise ValueError('ERROR: the rule packs to compare must have different names')
+
+    def run(pack):
+        return run_checks(wdpa_df, checks, lambda message: log(f'[{pack.name}] {message}'), rules=pack)
+
+    with ThreadPoolExecutor(max_workers=len(packs) or 1) as executor:
+        return dict(zip(names, executor.map(run, packs)))
+
+def run_integrity_checks(poly_df, pt_df, meta_df, checks, log=print):
+    '''
+    Run the integrity checks across the Polygon, Point and Source Table data, e.g.
+    integrity_checks, and return a dictionary with the names of the checks that
+    failed as keys, and the DataFrame of the offending rows as values.
+
+    ## Example ##
+    run_integrity_checks(poly_df, pt_df, meta_df,
+                         checks=integrity_checks,
+                         log=arcpy.AddMessage)
+    '''
+
+    result = dict()
+
+    for check in checks:
+        log('Running:' + check['name'])
+        errors = check['func'](poly_df, pt_df, meta_df)
+        if len(errors) > 0:
+            result[check['name']] = errors
+
+    return result
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,253 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to run the QA checks as a local service                    ####
+###################################################################################
+
+'''
+Running poly.py or point.py on a small correction batch spends most of its time
+starting up: importing pandas and arcpy, downloading the ISO3 list, compiling
+the rules. The QA service does this once, and keeps it in memory while it
+answers requests over HTTP:
+
+    GET  /checks   names of the checks in poly_checks and pt_checks
+    GET  /status   tables kept in memory
+    POST /check    check a submission, see check_submission
+
+Optionally, the current global WDPA snapshots (see wdpa.snapshot) are kept in
+memory too, indexed once (see wdpa.delta). A submission of the same type is
+then also checked against the global WDPA: WDPA_PIDs in use, records of the
+same WDPAID that disagree and METADATAIDs in use by other protected areas.
+
+Start the service with:
+
+    python -m wdpa.service --port 8765
+    python -m wdpa.service --poly <in_fc> --point <in_fc> --cache-dir <directory>
+
+and post a submission as JSON:
+
+    {"type": "poly", "checks": ["ivd_iucn_cat"], "rows": [{"WDPAID": 1, "WDPA_PID": "1", ...}]}
+
+The service only listens on localhost by default, as it has no authentication.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse
+from wdpa.qa import get_iso3, CHECKS
+from wdpa.runner import select_checks, run_checks
+from wdpa.delta import GlobalIndex, run_delta_checks, delta_checks
+from wdpa.columns import parse_typed_columns
+
+###############################
+#### 1. Check a submission ####
+###############################
+
+def submission_to_df(rows):
+    '''
+    Return the rows of a submission - a list of dictionaries of field: value - as a
+    wdpa DataFrame, as arcgis_table_to_df does.
+    '''
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError('ERROR: rows must be a list of objects of field: value')
+
+    wdpa_df = pd.DataFrame(rows)
+    wdpa_df.replace('', np.nan, inplace=True) # set '' to np.nan
+    parse_typed_columns(wdpa_df)
+
+    return wdpa_df
+
+def offending_pids(wdpa_df, check_results):
+    '''
+    Return a dictionary with the names of the checks that failed and the distinct
+    WDPA_PIDs of their offending rows, from the row positions stored by run_checks
+    (see wdpa.results).
+    '''
+
+    return {name: [str(pid) for pid in pd.unique(wdpa_df['WDPA_PID'].values[check_results.positions(name)])]
+            for name in check_results}
+
+def check_submission(submission, global_indexes=None):
+    '''
+    Run the checks on a submission, and return a dictionary with the names of the
+    checks that failed and the WDPA_PIDs of their offending rows ('result'), the
+    checks that passed ('passed'), and the checks that were not run because the
+    submission lacks fields they read ('skipped'). If the global WDPA of the type
+    of the submission is in global_indexes, the delta checks against it are run
+    too, and their offending WDPA_PIDs returned as 'global'.
+
+    ## Arguments ##
+    submission --     a dictionary with:
+                      'type':   'poly' or 'point'
+                      'rows':   list of dictionaries of field: value
+                      'checks': optional list of check names (default: all checks)
+                      'replaced_metadataid': optional list of the METADATAIDs whose
+                                global records are replaced by the submission
+    global_indexes -- optional dictionary of the GlobalIndex of the global WDPA by
+                      type, see wdpa.delta
+
+    ## Example ##
+    check_submission({'type': 'point',
+                      'rows': [{'WDPAID': 1, 'WDPA_PID': '1', 'NAME': 'De Veluwe'}],
+                      'checks': ['ivd_nan_present_name']})
+    '''
+
+    if not isinstance(submission, dict):
+        raise ValueError('ERROR: the submission must be an object with type and rows')
+    if submission.get('type') not in CHECKS:
+        raise ValueError(f'ERROR: type must be one of {", ".join(CHECKS)}')
+
+    global_index = (global_indexes or {}).get(submission['type'])
+    checks, input_fields = CHECKS[submission['type']]
+    names = submission.get('checks')
+
+    # the delta checks are named as the checks they extend to the global WDPA
+    extra = [check for check in delta_checks if check['name'] not in set(check['name'] for check in checks)]
+    select_checks(checks + extra if global_index is not None else checks, names) # raises an error for unknown checks
+    checks = [check for check in checks if not names or check['name'] in names]
+    wdpa_df = submission_to_df(submission.get('rows', []))
+
+    # only run the checks that can be run on the submitted fields
+    present = set(wdpa_df.columns)
+    runnable = [check for check in checks if set(check.get('fields', input_fields)) | {'WDPA_PID'} <= present]
+
+    result = offending_pids(wdpa_df, run_checks(wdpa_df, runnable, log=lambda message: None))
+    reply = {'result': result,
+             'passed': [check['name'] for check in runnable if check['name'] not in result],
+             'skipped': [check['name'] for check in checks if check not in runnable]}
+
+    if global_index is not None:
+        runnable = [check for check in delta_checks if (not names or check['name'] in names)
+                    and set(check['fields']) | {'WDPA_PID'} <= present]
+        reply['global'] = offending_pids(wdpa_df, run_delta_checks(wdpa_df, global_index, runnable,
+                                                                   submission.get('replaced_metadataid', ()),
+                                                                   log=lambda message: None))
+
+    return reply
+
+#############################
+#### 2. The HTTP service ####
+#############################
+
+class _Handler(BaseHTTPRequestHandler):
+    '''
+    Answer the requests to the QA service, see the top of this script.
+    '''
+
+    def _reply(self, status, body):
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        if path == '/checks':
+            self._reply(200, {datatype: [check['name'] for check in checks]
+                              for datatype, (checks, fields) in CHECKS.items()})
+        elif path == '/status':
+            self._reply(200, {'tables': {name: len(wdpa_df) for name, wdpa_df in self.server.tables.items()}})
+        else:
+            self._reply(404, {'error': f'ERROR: unknown path {path}'})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+
+        if path != '/check':
+            self._reply(404, {'error': f'ERROR: unknown path {path}'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            submission = json.loads(self.rfile.read(length).decode('utf-8'))
+            reply = check_submission(submission, self.server.global_indexes)
+        except (ValueError, KeyError, TypeError) as error:
+            # invalid JSON or submission
+            self._reply(400, {'error': str(error)})
+        except Exception as error:
+            self._reply(500, {'error': f'ERROR: {type(error).__name__}: {error}'})
+        else:
+            self._reply(200, reply)
+
+    def log_message(self, format, *args):
+        self.server.log(format % args)
+
+class QAServer(ThreadingMixIn, HTTPServer):
+    '''
+    HTTP server answering each request in its own thread. tables holds the
+    global WDPA tables kept in memory, by type ('poly' or 'point'), and
+    global_indexes their GlobalIndex, built once, to check the submissions of
+    the same type against them.
+
+    ## Example ##
+    server = QAServer(('127.0.0.1', 8765), tables={'poly': load_snapshot(...)})
+    '''
+
+    daemon_threads = True
+
+    def __init__(self, address, tables=None, log=print):
+        tables = dict(tables or {})
+        unknown = set(tables) - set(CHECKS)
+        if unknown:
+            raise ValueError(f'ERROR: unknown type(s) of table: {", ".join(sorted(unknown))}')
+
+        super().__init__(address, _Handler)
+        self.tables = tables
+        self.global_indexes = {name: GlobalIndex.build(wdpa_df) for name, wdpa_df in tables.items()}
+        self.log = log
+
+def serve(host='127.0.0.1', port=8765, tables=None, log=print):
+    '''
+    Run the QA service until it is interrupted.
+
+    ## Arguments ##
+    host, port -- address to listen on
+    tables --     optional dictionary of global WDPA tables to keep in memory, by
+                  type, e.g. {'poly': load_snapshot(...)}
+    log --        function used to report requests, e.g. print
+    '''
+
+    get_iso3() # download the reference data before the first request
+    server = QAServer((host, port), tables, log)
+    log(f'QA service listening on http://{host}:{port}')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the WDPA QA checks as a local service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--poly', help='global polygon feature class to keep in memory')
+    parser.add_argument('--point', help='global point feature class to keep in memory')
+    parser.add_argument('--cache-dir', help='directory of the snapshots, see wdpa.snapshot')
+    args = parser.parse_args()
+
+    tables = dict()
+    for name, in_fc in (('poly', args.poly), ('point', args.point)):
+        if in_fc:
+            if not args.cache_dir:
+                parser.error('--cache-dir is required to keep tables in memory')
+            from wdpa.snapshot import load_snapshot
+            tables[name] = load_snapshot(in_fc, CHECKS[name][1], args.cache_dir)
+
+    serve(args.host, args.port, tables)
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,122 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to cache WDPA tables and their indexes on disk             ####
+###################################################################################
+
+'''
+Reading the global WDPA through an arcpy.da.SearchCursor takes minutes. A snapshot
+is a WDPA table that has been read once and cached as a pickled DataFrame, with
+the secondary indexes on its key fields (see wdpa.index) stored next to it:
+
+    <cache_dir>/<table name>_<hash>.pkl
+    <cache_dir>/<table name>_<hash>.idx.npz
+
+The cache is keyed on the path of the feature class and the where_clause. It is
+read again from the feature class if its geodatabase was modified after caching,
+or if fields are requested that are not cached.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import hashlib
+import os
+import re
+import pandas as pd
+from wdpa.index import save_indexes, load_indexes
+from wdpa.columns import parse_typed_columns
+
+#########################
+#### 1. Cached files ####
+#########################
+
+def snapshot_paths(in_fc, cache_dir, query=''):
+    '''
+    Return the paths of the cached table and of its indexes.
+
+    ## Example ##
+    snapshot_paths(in_fc='WDPA_Jun2019_Public.gdb/WDPA_poly_Jun2019',
+                   cache_dir='C:/Users/paintern/Desktop/cache')
+    '''
+
+    name = re.sub(r'\W+', '_', os.path.basename(os.path.normpath(in_fc)))
+    digest = hashlib.sha1((in_fc + '|' + query).encode('utf-8')).hexdigest()[:8]
+    base = os.path.join(cache_dir, f'{name}_{digest}')
+
+    return base + '.pkl', base + '.idx.npz'
+
+def _source_mtime(in_fc):
+    '''
+    Return the modification time of in_fc, or of the first of its parent
+    directories that exists (e.g. the geodatabase). Return 0 if unknown.
+    '''
+
+    path = os.path.normpath(in_fc)
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return 0
+        path = parent
+
+    return os.path.getmtime(path) if path else 0
+
+########################
+#### 2. Load tables ####
+########################
+
+def load_snapshot(in_fc, input_fields, cache_dir, query=''):
+    '''
+    Return in_fc as a wdpa DataFrame with the input_fields, as arcgis_table_to_df does.
+    The table is read from the cache if possible; else it is read with arcgis_table_to_df
+    and cached, together with its indexes. The indexes are shared with the checks
+    run on the returned DataFrame.
+
+    ## Arguments ##
+    in_fc --        feature class attribute table - inside geodatabase - to import.
+    input_fields -- list of all fields that must be imported from the dataset
+    cache_dir --    directory to store the cached tables and indexes
+    query --        optional where_clause of arcpy.da.SearchCursor, see where_clause
+
+    ## Example ##
+    load_snapshot(in_fc='WDPA_Jun2019_Public.gdb/WDPA_poly_Jun2019',
+                  input_fields=INPUT_FIELDS_POLY,
+                  cache_dir='C:/Users/paintern/Desktop/cache')
+    '''
+
+    table_path, index_path = snapshot_paths(in_fc, cache_dir, query)
+    fields_to_read = list(input_fields)
+    wdpa_df = None
+
+    if os.path.exists(table_path) and os.path.getmtime(table_path) >= _source_mtime(in_fc):
+        wdpa_df = pd.read_pickle(table_path)
+        if not set(input_fields) <= set(wdpa_df.columns):
+            # read again, with the cached and the new fields
+            fields_to_read = [field for field in wdpa_df.columns] + \
+                             [field for field in input_fields if field not in wdpa_df.columns]
+            wdpa_df = None
+
+    if wdpa_df is None:
+        # imported here, as only needed to read from the feature class
+        from wdpa.qa import arcgis_table_to_df
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        wdpa_df = arcgis_table_to_df(in_fc, fields_to_read, query)
+        wdpa_df.to_pickle(table_path)
+        save_indexes(wdpa_df, index_path)
+
+    elif not os.path.exists(index_path):
+        save_indexes(wdpa_df, index_path)
+
+    # select the fields; the saved indexes stay valid as the rows are the same
+    wdpa_df = wdpa_df[list(input_fields)]
+    load_indexes(wdpa_df, index_path) # if this fails, the indexes are built on first use
+    parse_typed_columns(wdpa_df)
+
+    return wdpa_df
+
+#######################
+#### END OF SCRIPT ####
+#######################
@@ -0,0 +1,523 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script containing the spatial QA checks for the WDPA              ####
+###################################################################################
+
+'''
+The checks in qa.py only read the attributes of the WDPA, and trust GIS_AREA and
+GIS_M_AREA as given. The spatial checks read the geometries from a local file
+source (e.g. a GeoPackage or shapefile exported from the geodatabase), and check:
+
+- ivd_geometry --              invalid geometries, e.g. self-intersections
+- duplicate_geometry --        polygons that (nearly) cover the same area
+- pt_in_poly_same_wdpaid --    points that lie inside a polygon with the same WDPAID
+- ivd_gis_area_geometry --     GIS_AREA that differs from the area of the geometry
+- ivd_iso3_location_poly/pt -- polygons and points that do not lie in their ISO3,
+                               see BoundaryIndex
+
+Checks that compare geometries with each other do not compare all pairs: an
+STRtree of the polygons is built once per table (see wdpa.context), and only
+the pairs whose bounding boxes intersect are compared. The geometries, or the
+pairs of geometries, are checked in chunks run in parallel threads, as shapely
+releases the GIL while it computes.
+
+The spatial checks require shapely 2 and geopandas (with pyogrio or fiona),
+which are not installed with ArcGIS Pro; they are only imported when used.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from wdpa.context import table_context
+from wdpa.rules import rule, active_rules, use_rules
+
+# Equal-area projection in which GIS_AREA and GIS_M_AREA are computed (Mollweide)
+AREA_CRS = 'ESRI:54009'
+
+# Fields read with the geometries
+SPATIAL_FIELDS_POLY = ['WDPAID', 'WDPA_PID', 'ISO3', 'GIS_AREA']
+SPATIAL_FIELDS_PT = ['WDPAID', 'WDPA_PID', 'ISO3']
+
+# Coordinate reference system, simplification and tile size (degrees) of the BoundaryIndex
+BOUNDARY_CRS = 'EPSG:4326'
+BOUNDARY_SIMPLIFY = 0.01
+BOUNDARY_TILE_SIZE = 1
+
+# Number of geometries, or of pairs of geometries, checked in one chunk
+CHUNK_SIZE = 10000
+
+def _require_geometry():
+    '''
+    Return the shapely module, or raise an error if shapely 2 is not installed.
+    '''
+
+    try:
+        import shapely
+    except ImportError:
+        raise ImportError('ERROR: the spatial checks require shapely 2 and geopandas')
+
+    if not hasattr(shapely, 'STRtree') or int(shapely.__version__.split('.')[0]) < 2:
+        raise ImportError('ERROR: the spatial checks require shapely 2 and geopandas')
+
+    return shapely
+
+###########################################
+#### 1. Read geometries and index them ####
+###########################################
+
+def read_geometries(path, fields, layer=None):
+    '''
+    Return the geometries and fields of a local file source as a GeoDataFrame.
+
+    ## Arguments ##
+    path --   a file readable by GDAL, e.g. a GeoPackage, shapefile or file geodatabase
+    fields -- a list of fields to read with the geometries, e.g. SPATIAL_FIELDS_POLY
+    layer --  the layer to read, if path holds several
+
+    ## Example ##
+    read_geometries('C:/Users/paintern/Desktop/WDPA_Jun2019.gpkg', SPATIAL_FIELDS_POLY, layer='WDPA_poly_Jun2019')
+    '''
+
+    _require_geometry()
+    import geopandas
+
+    if not os.path.exists(path):
+        raise ValueError(f'ERROR: geometry source not found: {path}')
+
+    gdf = geopandas.read_file(path, layer=layer, columns=list(fields))
+
+    return gdf.reset_index(drop=True)
+
+def geometry_tree(gdf):
+    '''
+    Return the STRtree of the geometries of gdf, built on first use and shared
+    by all spatial checks run on gdf.
+    '''
+
+    shapely = _require_geometry()
+    context = table_context(gdf)
+
+    if 'strtree' not in context:
+        context['strtree'] = shapely.STRtree(np.asarray(gdf.geometry.values))
+
+    return context['strtree']
+
+def _map_chunks(func, n, workers=None, chunk_size=None):
+    '''
+    Return the results of func(start, stop) for the chunks of range(n), run in
+    parallel threads with the rules of the current thread. chunk_size defaults
+    to CHUNK_SIZE, read when called.
+    '''
+
+    pack = active_rules()
+    chunk_size = chunk_size or CHUNK_SIZE
+
+    def run(start):
+        with use_rules(pack):
+            return func(start, min(start + chunk_size, n))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, range(0, n, chunk_size)))
+
+def _rows(gdf, positions, columns=None):
+    '''
+    Return the rows of gdf at positions without the geometry, as a DataFrame
+    that can be written to Excel, with the additional columns.
+    '''
+
+    rows = pd.DataFrame(gdf.drop(columns=gdf.geometry.name).iloc[positions])
+
+    if columns is not None:
+        for name, values in columns.items():
+            rows[name] = values
+
+    return rows
+
+##############################
+#### 2. Geometry validity ####
+##############################
+
+def invalid_geometry(poly_gdf, pt_gdf, workers=None):
+    '''
+    Return the polygons with an invalid geometry, e.g. self-intersections or
+    unclosed rings, with the reason (invalid_reason).
+    '''
+
+    shapely = _require_geometry()
+    geometries = np.asarray(poly_gdf.geometry.values)
+
+    def check(start, stop):
+        return np.flatnonzero(~shapely.is_valid(geometries[start:stop])) + start
+
+    positions = np.concatenate(_map_chunks(check, len(geometries), workers) or [np.array([], dtype=int)])
+
+    return _rows(poly_gdf, positions, {'invalid_reason': shapely.is_valid_reason(geometries[positions])})
+
+#################################
+#### 3. Duplicate geometries ####
+#################################
+
+def duplicate_geometry(poly_gdf, pt_gdf, workers=None):
+    '''
+    Return the polygons that cover nearly the same area as another polygon: the
+    intersection over the union of their areas is at least 0.95 (rule
+    'duplicate_geometry_iou'). Each polygon is returned once, with the WDPA_PID
+    of the polygon it duplicates (duplicate_of) and their overlap (iou).
+    '''
+
+    shapely = _require_geometry()
+    geometries = np.asarray(poly_gdf.geometry.values)
+    min_iou = rule('duplicate_geometry_iou')
+
+    # candidate pairs: bounding boxes intersect, each pair once
+    left, right = geometry_tree(poly_gdf).query(geometries)
+    keep = left < right
+    left, right = left[keep], right[keep]
+
+    def check(start, stop):
+        a, b = geometries[left[start:stop]], geometries[right[start:stop]]
+        # the areas of the polygons are corrected for invalid geometries by make_valid
+        a, b = shapely.make_valid(a), shapely.make_valid(b)
+        intersection = shapely.area(shapely.intersection(a, b))
+        union = shapely.area(a) + shapely.area(b) - intersection
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return intersection / union
+
+    iou = np.concatenate(_map_chunks(check, len(left), workers) or [np.array([])])
+    duplicate = iou >= min_iou
+    left, right, iou = left[duplicate], right[duplicate], iou[duplicate]
+
+    # both polygons of each pair, in table order
+    positions = np.concatenate([left, right])
+    other = np.concatenate([right, left])
+    iou = np.concatenate([iou, iou])
+    order = np.lexsort((other, positions))
+    positions, other, iou = positions[order], other[order], iou[order]
+    first = np.r_[True, positions[1:] != positions[:-1]] if len(positions) else np.array([], dtype=bool)
+
+    return _rows(poly_gdf, positions[first], {'duplicate_of': poly_gdf['WDPA_PID'].values[other[first]],
+                                              'iou': iou[first]})
+
+#######################################################
+#### 4. Points inside a polygon of the same WDPAID ####
+#######################################################
+
+def point_in_polygon_same_wdpaid(poly_gdf, pt_gdf, workers=None):
+    '''
+    Return the points that lie inside a polygon with the same WDPAID: the
+    protected area is reported both as a polygon and as a point.
+    '''
+
+    if pt_gdf is None or len(pt_gdf) == 0:
+        return pd.DataFrame()
+
+    points = np.asarray(pt_gdf.geometry.values)
+    tree = geometry_tree(poly_gdf)
+    poly_wdpaid = poly_gdf['WDPAID'].values
+    pt_wdpaid = pt_gdf['WDPAID'].values
+
+    def check(start, stop):
+        point, polygon = tree.query(points[start:stop], predicate='within')
+        point = point + start
+        return np.unique(point[pt_wdpaid[point] == poly_wdpaid[polygon]])
+
+    positions = np.unique(np.concatenate(_map_chunks(check, len(points), workers) or [np.array([], dtype=int)]))
+
+    return _rows(pt_gdf, positions)
+
+##################################################
+#### 5. GIS_AREA recomputed from the geometry ####
+##################################################
+
+def geometry_area_km2(gdf, workers=None):
+    '''
+    Return the area of the geometries of gdf in km², in the equal-area projection
+    AREA_CRS in which GIS_AREA is computed.
+    '''
+
+    shapely = _require_geometry()
+
+    if gdf.crs is None:
+        raise ValueError('ERROR: the geometries have no coordinate reference system')
+
+    projected = gdf.geometry.to_crs(AREA_CRS)
+    geometries = np.asarray(projected.values)
+
+    def area(start, stop):
+        return shapely.area(shapely.make_valid(geometries[start:stop])) / 1e6
+
+    return np.concatenate(_map_chunks(area, len(geometries), workers) or [np.array([])])
+
+def invalid_gis_area_geometry(poly_gdf, pt_gdf, workers=None):
+    '''
+    Return the polygons whose GIS_AREA differs by more than 1% (rule
+    'gis_area_tolerance') from the area of their geometry, with the area
+    of the geometry (geometry_GIS_AREA).
+    '''
+
+    tolerance = rule('gis_area_tolerance')
+    geometry_area = geometry_area_km2(poly_gdf, workers)
+    gis_area = poly_gdf['GIS_AREA'].values.astype(float)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        invalid = np.abs(gis_area - geometry_area) > tolerance * geometry_area
+    positions = np.flatnonzero(invalid)
+
+    return _rows(poly_gdf, positions, {'geometry_GIS_AREA': geometry_area[positions]})
+
+#################################################
+#### 6. Location in the ISO3 of the boundary ####
+#################################################
+
+class BoundaryIndex(object):
+    '''
+    Index of the boundaries of the countries and their EEZs, to look up the
+    ISO3s at the location of protected areas.
+
+    check_iso3 only verifies that the ISO3 codes exist. To verify that a protected
+    area lies in its ISO3, its location is looked up in a boundary dataset with
+    one (multi)polygon per ISO3, e.g. the union of the countries and EEZs of
+    marineregions.org. The boundary dataset is not distributed with the WDPA QA
+    tool; see load_boundary_index.
+
+    The boundaries are simplified, and each is cut into tiles of BOUNDARY_TILE_SIZE
+    degrees: a point is then tested against a small tile instead of the whole
+    coastline of its country. The tiles of all countries are held in one STRtree,
+    and are looked up for all locations at once.
+
+    ## Example ##
+    boundaries = BoundaryIndex.build(read_geometries('C:/Users/paintern/Desktop/EEZ_land_union.gpkg', ['ISO3']))
+    boundaries.lookup(points)
+    '''
+
+    def __init__(self, tiles, iso3):
+        self.tiles = tiles
+        self.iso3 = iso3
+        self._tree = None
+
+    @classmethod
+    def build(cls, boundary_gdf, iso3_field='ISO3', simplify=BOUNDARY_SIMPLIFY, tile_size=BOUNDARY_TILE_SIZE):
+        '''
+        Build the BoundaryIndex of the boundaries in boundary_gdf, with the ISO3 of
+        each boundary in iso3_field.
+        '''
+
+        shapely = _require_geometry()
+
+        if iso3_field not in boundary_gdf.columns:
+            raise ValueError(f'ERROR: the boundary dataset has no field {iso3_field}')
+
+        boundary_gdf = boundary_gdf[boundary_gdf[iso3_field].notna()].to_crs(BOUNDARY_CRS)
+        tiles, iso3 = [], []
+
+        # one boundary per ISO3, e.g. of the country and of its EEZ
+        for code, boundary in boundary_gdf.groupby(iso3_field).geometry:
+            geometry = shapely.simplify(shapely.make_valid(shapely.union_all(np.asarray(boundary.values))),
+                                        simplify, preserve_topology=True)
+
+            # cut the boundary into the tiles of a grid of tile_size degrees
+            xmin, ymin, xmax, ymax = shapely.bounds(geometry)
+            x, y = np.meshgrid(np.arange(np.floor(xmin / tile_size), np.ceil(xmax / tile_size)) * tile_size,
+                               np.arange(np.floor(ymin / tile_size), np.ceil(ymax / tile_size)) * tile_size)
+            grid = shapely.box(x.ravel(), y.ravel(), x.ravel() + tile_size, y.ravel() + tile_size)
+            cut = shapely.intersection(geometry, grid[shapely.intersects(geometry, grid)])
+            cut = cut[~shapely.is_empty(cut)]
+
+            tiles.append(cut)
+            iso3 += [code] * len(cut)
+
+        tiles = np.concatenate(tiles) if tiles else np.array([], dtype=object)
+
+        return cls(tiles, np.asarray(iso3, dtype=object))
+
+    @property
+    def tree(self):
+        '''
+        The STRtree of the tiles, built on first use.
+        '''
+
+        if self._tree is None:
+            self._tree = _require_geometry().STRtree(self.tiles)
+
+        return self._tree
+
+    def lookup(self, points, distance=0):
+        '''
+        Return the ISO3s at the points, as two arrays: the positions of the points,
+        and the ISO3 of a tile within distance (degrees) of each.
+        '''
+
+        if distance > 0:
+            point, tile = self.tree.query(points, predicate='dwithin', distance=distance)
+        else:
+            point, tile = self.tree.query(points, predicate='intersects')
+
+        return point, self.iso3[tile]
+
+    def __getstate__(self):
+        # the STRtree is built again after loading
+        return {'tiles': self.tiles, 'iso3': self.iso3}
+
+    def __setstate__(self, state):
+        self.__init__(state['tiles'], state['iso3'])
+
+def load_boundary_index(path, cache_dir=None, iso3_field='ISO3', layer=None, log=print):
+    '''
+    Return the BoundaryIndex of the boundary dataset path, from the cache if it is
+    up to date, else built from path and cached in cache_dir (if given).
+
+    ## Arguments ##
+    path --       boundary dataset with one or more polygons per ISO3, e.g. the union of
+                  the countries and EEZs, as a file readable by GDAL
+    cache_dir --  directory to cache the BoundaryIndex in
+    iso3_field -- field of the boundary dataset holding the ISO3 codes
+
+    ## Example ##
+    load_boundary_index('C:/Users/paintern/Desktop/EEZ_land_union.gpkg',
+                        cache_dir='C:/Users/paintern/Desktop/cache')
+    '''
+
+    if not os.path.exists(path):
+        raise ValueError(f'ERROR: boundary dataset not found: {path}. The boundary dataset is not distributed '
+                         'with the WDPA QA tool; download the countries and EEZs with their ISO3 codes, '
+                         'e.g. from marineregions.org')
+
+    settings = (os.path.abspath(path), layer, iso3_field, BOUNDARY_SIMPLIFY, BOUNDARY_TILE_SIZE)
+    cache_path = None
+    if cache_dir:
+        name = os.path.splitext(os.path.basename(path))[0]
+        cache_path = os.path.join(cache_dir, f'{name}.boundaries.pkl')
+
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            with open(cache_path, 'rb') as f:
+                cached_settings, boundaries = pickle.load(f)
+            if cached_settings == settings:
+                return boundaries
+
+    log('Building the index of the boundary dataset')
+    boundaries = BoundaryIndex.build(read_geometries(path, [iso3_field], layer), iso3_field)
+
+    if cache_path:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with open(cache_path, 'wb') as f:
+            pickle.dump((settings, boundaries), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    return boundaries
+
+def invalid_iso3_location(gdf, boundaries, workers=None):
+    '''
+    Return the rows of gdf whose location does not lie in (any of) their ISO3s,
+    with the ISO3s found at their location (location_ISO3). Rows with ISO3 'ABNJ'
+    are returned if their location lies in any ISO3. Rows without ISO3 are left
+    to check_iso3.
+
+    The location of a polygon is a point inside it (shapely.point_on_surface),
+    which, unlike the centroid, also lies inside concave and multipart polygons.
+    Locations up to 0.05 degrees (rule 'iso3_boundary_distance') outside their
+    ISO3 are accepted, as the boundaries are simplified; locations in ABNJ are
+    only returned if they lie inside an ISO3.
+
+    ## Arguments ##
+    gdf --        GeoDataFrame with the field ISO3, e.g. of the polygons or points
+    boundaries -- BoundaryIndex, see load_boundary_index
+    '''
+
+    shapely = _require_geometry()
+
+    if gdf is None or len(gdf) == 0:
+        return pd.DataFrame()
+
+    if gdf.crs is None:
+        raise ValueError('ERROR: the geometries have no coordinate reference system')
+
+    locations = shapely.point_on_surface(np.asarray(gdf.geometry.to_crs(BOUNDARY_CRS).values))
+
+    # the declared ISO3s of each row, e.g. 'NLD;BEL'
+    declared = gdf['ISO3'].reset_index(drop=True).dropna().str.split(';').explode().str.strip()
+    declared = pd.DataFrame({'position': declared.index.values, 'ISO3': declared.values})
+
+    def find(positions, distance):
+        def lookup(start, stop):
+            point, iso3 = boundaries.lookup(locations[positions[start:stop]], distance)
+            return positions[point + start], iso3
+        chunks = _map_chunks(lookup, len(positions), workers)
+        return pd.DataFrame({'position': np.concatenate([chunk[0] for chunk in chunks] or [np.array([], dtype=int)]),
+                             'ISO3': np.concatenate([chunk[1] for chunk in chunks] or [np.array([], dtype=object)])})
+
+    # a row is valid if any of its ISO3s is found within the distance of its location,
+    # or if it is in ABNJ and its location does not lie in any ISO3
+    abnj = declared.loc[declared['ISO3'] == 'ABNJ', 'position'].unique()
+    found = find(np.setdiff1d(declared['position'].unique(), abnj), rule('iso3_boundary_distance'))
+    found = pd.concat([found, find(abnj, 0)], ignore_index=True)
+
+    matched = declared.merge(found, on=['position', 'ISO3'])['position']
+    valid = np.union1d(matched.values, np.setdiff1d(abnj, found['position'].values))
+    positions = np.setdiff1d(declared['position'].unique(), valid)
+
+    location_iso3 = found[found['position'].isin(positions)].drop_duplicates() \
+                    .groupby('position')['ISO3'].agg(lambda codes: ';'.join(sorted(codes)))
+
+    return _rows(gdf, positions, {'location_ISO3': location_iso3.reindex(positions).fillna('').values})
+
+###########################################################################
+#### Below is a dictionary that holds all spatial checks, as in qa.py. ####
+#### Each check takes the Polygon and Point GeoDataFrames (the latter  ####
+#### can be None), and returns the offending rows.                     ####
+###########################################################################
+
+spatial_checks = [
+{'name': 'ivd_geometry', 'func': invalid_geometry},
+{'name': 'duplicate_geometry', 'func': duplicate_geometry},
+{'name': 'pt_in_poly_same_wdpaid', 'func': point_in_polygon_same_wdpaid},
+{'name': 'ivd_gis_area_geometry', 'func': invalid_gis_area_geometry},]
+
+def boundary_checks(boundaries):
+    '''
+    Return the checks of the location of the polygons and points in their ISO3,
+    against the BoundaryIndex boundaries, to be run with the spatial checks.
+
+    ## Example ##
+    checks = spatial_checks + boundary_checks(load_boundary_index(input_boundaries, cache_dir))
+    '''
+
+    return [{'name': 'ivd_iso3_location_poly',
+             'func': lambda poly_gdf, pt_gdf, workers=None: invalid_iso3_location(poly_gdf, boundaries, workers)},
+            {'name': 'ivd_iso3_location_pt',
+             'func': lambda poly_gdf, pt_gdf, workers=None: invalid_iso3_location(pt_gdf, boundaries, workers)}]
+
+def run_spatial_checks(poly_gdf, pt_gdf, checks=spatial_checks, log=print, workers=None):
+    '''
+    Run the spatial checks, and return a dictionary with the names of the checks
+    that failed as keys, and the DataFrame of the offending rows as values.
+
+    ## Arguments ##
+    poly_gdf -- GeoDataFrame of the polygons, see read_geometries
+    pt_gdf --   GeoDataFrame of the points, or None
+    workers --  number of threads checking chunks in parallel (default: number of processors)
+
+    ## Example ##
+    run_spatial_checks(read_geometries(input_poly, SPATIAL_FIELDS_POLY),
+                       read_geometries(input_pt, SPATIAL_FIELDS_PT),
+                       log=arcpy.AddMessage)
+    '''
+
+    result = dict()
+
+    for check in checks:
+        log('Running:' + check['name'])
+        errors = check['func'](poly_gdf, pt_gdf, workers)
+        if len(errors) > 0:
+            result[check['name']] = errors
+
+    return result
+
+#######################
+#### END OF SCRIPT ####
+#######################
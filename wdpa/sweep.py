@@ -0,0 +1,133 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to sweep the thresholds of the statistical area checks     ####
+###################################################################################
+
+'''
+The area_invalid_too_large_* checks flag a row if its relative size is above
+mean + 2 stdev of all rows, and its areas differ by more than 50 km² (see
+area_invalid_too_large and wdpa.rules). To find how many rows other thresholds
+would flag, AreaSweep computes the relative sizes of each check once, and sorts
+them: the rows above a threshold are then the end of the sorted array, found by
+binary search, and so are the rows of these above a km² floor.
+
+    sweep = AreaSweep(poly_df)
+    sweep.table(sigmas=[1.5, 2, 3], floors=[0, 25, 50, 100])
+    sweep.pids('gis_area_gt_rep_area', sigma=1.5, floor=25)
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import numpy as np
+import pandas as pd
+from wdpa.qa import area_relative_size, AREA_TOO_LARGE_FIELDS
+
+# Default thresholds of the sweep
+SIGMAS = [1.5, 2, 2.5, 3]
+FLOORS = [0, 25, 50, 100]
+
+#######################
+#### 1. Area sweep ####
+#######################
+
+class AreaSweep(object):
+    '''
+    The relative sizes and area differences of the rows of wdpa_df for each
+    statistical area check, sorted by relative size.
+
+    ## Arguments ##
+    wdpa_df -- wdpa DataFrame with GIS_AREA, REP_AREA, GIS_M_AREA and REP_M_AREA
+    checks --  names of the checks to sweep, see AREA_TOO_LARGE_FIELDS
+
+    ## Example ##
+    AreaSweep(poly_df).count('gis_area_gt_rep_area', sigma=3, floor=50)
+    '''
+
+    def __init__(self, wdpa_df, checks=tuple(AREA_TOO_LARGE_FIELDS)):
+        self.wdpa_df = wdpa_df
+        self.checks = dict()
+
+        for name in checks:
+            field_large_area, field_reference_area = AREA_TOO_LARGE_FIELDS[name]
+            relative_size, mean, std = area_relative_size(wdpa_df, field_large_area, field_reference_area)
+            relative_size = relative_size.values.astype(float)
+            size_diff = np.abs(wdpa_df[field_large_area].values - wdpa_df[field_reference_area].values).astype(float)
+
+            # rows with a NaN relative size or difference are never flagged
+            positions = np.flatnonzero(~np.isnan(relative_size) & ~np.isnan(size_diff))
+            order = positions[np.argsort(relative_size[positions], kind='stable')]
+
+            self.checks[name] = {'mean': mean,
+                                 'std': std,
+                                 'relative_size': relative_size[order],
+                                 'size_diff': size_diff[order],
+                                 'positions': order}
+
+    def max_relative_size(self, name, sigma):
+        '''
+        Return the largest relative size not flagged by the check name at sigma stdev.
+        '''
+
+        check = self.checks[name]
+
+        # as in area_invalid_too_large
+        return check['mean'] + (sigma*check['std'])
+
+    def _start(self, name, sigma):
+        # first of the sorted rows with a relative size above the threshold
+        return np.searchsorted(self.checks[name]['relative_size'], self.max_relative_size(name, sigma), side='right')
+
+    def positions(self, name, sigma, floor):
+        '''
+        Return the row positions flagged by the check name at sigma stdev and a
+        difference of more than floor km².
+        '''
+
+        check = self.checks[name]
+        start = self._start(name, sigma)
+
+        return np.sort(check['positions'][start:][check['size_diff'][start:] > floor])
+
+    def pids(self, name, sigma, floor):
+        '''
+        Return the WDPA_PIDs flagged by the check name at sigma stdev and floor km².
+        '''
+
+        return self.wdpa_df['WDPA_PID'].values[self.positions(name, sigma, floor)]
+
+    def count(self, name, sigma, floor):
+        '''
+        Return the number of rows flagged by the check name at sigma stdev and floor km².
+        '''
+
+        return int(self.table([sigma], [floor], [name])['flagged'].iloc[0])
+
+    def table(self, sigmas=SIGMAS, floors=FLOORS, checks=None):
+        '''
+        Return the sensitivity table: the number of rows flagged by each check for
+        each combination of sigma and floor, as a DataFrame.
+        '''
+
+        floors = np.asarray(sorted(floors), dtype=float)
+        rows = []
+
+        for name in checks or self.checks:
+            for sigma in sorted(sigmas):
+                # the differences of the rows above the threshold, sorted to count those above each floor
+                size_diff = np.sort(self.checks[name]['size_diff'][self._start(name, sigma):])
+                flagged = len(size_diff) - np.searchsorted(size_diff, floors, side='right')
+
+                for floor, count in zip(floors, flagged):
+                    rows.append({'check': name,
+                                 'sigma': sigma,
+                                 'max_relative_size': self.max_relative_size(name, sigma),
+                                 'floor_km2': floor,
+                                 'flagged': int(count)})
+
+        return pd.DataFrame(rows, columns=['check', 'sigma', 'max_relative_size', 'floor_km2', 'flagged'])
+
+#######################
+#### END OF SCRIPT ####
+#######################
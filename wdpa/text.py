@@ -0,0 +1,106 @@
+###################################################################################
+#### RAMBO: a Quality Assurance Tool for the World Database on Protected Areas ####
+#### Python script to find encoding and Unicode anomalies in text fields      ####
+###################################################################################
+
+'''
+forbidden_character only looks for the characters <>?* and line breaks. Text
+submitted to the WDPA also holds anomalies that are not visible in ArcGIS or Excel:
+
+- mojibake --         UTF-8 text decoded as Windows-1252 or Latin-1, e.g. 'RÃ©serve'
+- not_nfc --          accents written as separate combining characters (not Unicode NFC),
+                      e.g. 'e' followed by U+0301, so that equal names compare as different
+- zero_width --       zero-width spaces, joiners, soft hyphens and byte order marks
+- control --          control characters, e.g. tabs, line breaks or NUL
+- whitespace --       leading or trailing whitespace, or several spaces in a row
+
+A field holds few distinct values compared to its number of rows, e.g. the
+same DESIG on thousands of rows. The anomalies are therefore classified once
+for each distinct value (see wdpa.memo), and the result is broadcast back to
+the rows.
+'''
+
+#######################
+#### Load packages ####
+#######################
+
+import re
+import unicodedata
+from wdpa.memo import map_values
+
+# Invisible characters that are not control characters
+ZERO_WIDTH_CHARACTERS = '\u00ad\u180e\u200b\u200c\u200d\u2060\ufeff'
+
+_ZERO_WIDTH = re.compile(f'[{ZERO_WIDTH_CHARACTERS}]')
+_WHITESPACE = re.compile(r'^\s|\s$|\s{2}')
+_NON_ASCII = re.compile('[^\x00-\x7f]')
+
+#############################
+#### 1. Classify a value ####
+#############################
+
+def is_mojibake(value):
+    '''
+    Return True if value is UTF-8 text that was decoded as Windows-1252 or
+    Latin-1: encoding it back gives valid UTF-8 with other characters.
+
+    ## Example ##
+    is_mojibake('RÃ©serve naturelle') # True
+    '''
+
+    if _NON_ASCII.search(value) is None:
+        return False
+
+    for encoding in ('cp1252', 'latin-1'):
+        try:
+            decoded = value.encode(encoding).decode('utf-8')
+        except UnicodeError:
+            continue
+        if decoded != value:
+            return True
+
+    return False
+
+def is_control(char):
+    # control characters (Unicode category Cc), e.g. '\t', '\n', '\x00'
+    return unicodedata.category(char) == 'Cc'
+
+# Name of each anomaly: function returning True if a value has the anomaly
+TEXT_ANOMALIES = {
+    'mojibake': is_mojibake,
+    'not_nfc': lambda value: unicodedata.normalize('NFC', value) != value,
+    'zero_width': lambda value: _ZERO_WIDTH.search(value) is not None,
+    'control': lambda value: any(is_control(char) for char in value),
+    'whitespace': lambda value: _WHITESPACE.search(value) is not None}
+
+def text_anomalies(value):
+    '''
+    Return the names of the anomalies of value, joined by ';', or '' if it has none.
+
+    ## Example ##
+    text_anomalies('De Veluwe\\u200b ') # 'zero_width;whitespace'
+    '''
+
+    return ';'.join(name for name, func in TEXT_ANOMALIES.items() if func(value))
+
+#############################
+#### 2. Classify a field ####
+#############################
+
+def classify_text(values):
+    '''
+    Return the anomalies of each value of values (see text_anomalies), as an
+    array. Each distinct value is classified once; NaN has no anomalies.
+
+    ## Arguments ##
+    values -- a Series or array of strings, e.g. wdpa_df['NAME']
+
+    ## Example ##
+    classify_text(wdpa_df['NAME'])
+    '''
+
+    return map_values(values, lambda value: text_anomalies(str(value)), key='text_anomalies', na_value='')
+
+#######################
+#### END OF SCRIPT ####
+#######################